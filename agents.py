@@ -1,48 +1,186 @@
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
 import openai
 from openai import OpenAI
 import os
 import json
+import time
+import sqlite3
 import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from passage_index import PassageIndex
+from tracing import Tracer, current_span, record_usage
+
+class ResponseCache:
+    """LRU + TTL cache for model outputs, optionally backed by SQLite.
+
+    Keys are hashes of everything that determines the output, so a hit can be
+    returned without calling the model.
+    """
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.db = None
+        if db_path:
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS response_cache (key TEXT PRIMARY KEY, value TEXT, created_at REAL)")
+            self.db.commit()
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        payload = json.dumps(parts, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None and self.db is not None:
+                row = self.db.execute("SELECT value, created_at FROM response_cache WHERE key = ?", (key,)).fetchone()
+                if row:
+                    entry = (row[0], row[1])
+                    self.entries[key] = entry
+            if entry is not None and now - entry[1] < self.ttl_seconds:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                self._delete(key)
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        created_at = time.time()
+        with self.lock:
+            self.entries[key] = (value, created_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                evicted, _ = self.entries.popitem(last=False)
+                if self.db is not None:
+                    self.db.execute("DELETE FROM response_cache WHERE key = ?", (evicted,))
+            if self.db is not None:
+                self.db.execute("INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?)", (key, value, created_at))
+                self.db.commit()
+
+    def _delete(self, key: str) -> None:
+        self.entries.pop(key, None)
+        if self.db is not None:
+            self.db.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            self.db.commit()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM response_cache")
+                self.db.commit()
 
 class Tool:
-    def __init__(self):
+    model = None
+
+    def __init__(self, cache: Optional[ResponseCache] = None):
         self.name = self.__class__.__name__
+        self.cache = cache
 
     async def run(self, input_text: str) -> str:
         raise NotImplementedError
 
+    def cache_scope(self) -> str:
+        """Part of the cache key that changes when the tool's backing source changes."""
+        return self.model or ""
+
+    async def cached_run(self, input_text: str, stats: Optional[Dict[str, int]] = None) -> str:
+        """Run the tool, serving repeated inputs from the tool cache if one is set."""
+        span = current_span()
+        if self.cache is None:
+            if span:
+                span.set(cache="disabled")
+            return await self.run(input_text)
+        key = ResponseCache.make_key(self.name, self.cache_scope(), input_text)
+        cached = self.cache.get(key)
+        if stats is not None:
+            stats["cache_hits" if cached is not None else "cache_misses"] += 1
+        if span:
+            span.set(cache="hit" if cached is not None else "miss")
+        if cached is not None:
+            return cached
+        result = await self.run(input_text)
+        self.cache.set(key, result)
+        return result
+
 class WebSearchTool(Tool):
+    model = "gpt-4"
+
     async def run(self, input_text: str) -> str:
         # Simulate web search with OpenAI
         client = OpenAI()
         response = client.chat.completions.create(
-            model="gpt-4",
+            model=self.model,
             messages=[
                 {"role": "system", "content": "You are a web search tool. Provide relevant information from the web about biblical topics, including scholarly sources and archaeological findings. Include DOIs and permanent URLs where available."},
                 {"role": "user", "content": input_text}
             ]
         )
+        record_usage(response.usage)
         return response.choices[0].message.content
 
 class KnowledgeBaseTool(Tool):
-    def __init__(self, bible_files: Optional[List[str]] = None):
-        super().__init__()
+    model = "gpt-4"
+    top_k = 5
+
+    def __init__(self, bible_files: Optional[List[str]] = None, cache: Optional[ResponseCache] = None):
+        super().__init__(cache)
         self.bible_files = bible_files or []
+        # Compiled on first use; reuses the on-disk index while the files are unchanged
+        self.index: Optional[PassageIndex] = None
+
+    def cache_scope(self) -> str:
+        if self.bible_files:
+            return f"index:{self.get_index().fingerprint}"
+        return super().cache_scope()
+
+    def get_index(self) -> PassageIndex:
+        if self.index is None:
+            self.index = PassageIndex(self.bible_files)
+        return self.index
 
     async def run(self, input_text: str) -> str:
-        # Use Bible knowledge base with OpenAI
+        if self.bible_files:
+            return self.search_passages(input_text)
+
+        # No local files supplied: use Bible knowledge base with OpenAI
         client = OpenAI()
         response = client.chat.completions.create(
-            model="gpt-4",
+            model=self.model,
             messages=[
                 {"role": "system", "content": "You are a Bible knowledge base tool. Search through the provided translations and Strong's Concordance to provide accurate biblical information. Include proper citations for all translations and references."},
                 {"role": "user", "content": input_text}
             ]
         )
+        record_usage(response.usage)
         return response.choices[0].message.content
 
+    def search_passages(self, input_text: str) -> str:
+        """Return the top passages from the local index with formatted citations"""
+        index = self.get_index()
+        hits = index.search(input_text, self.top_k)
+        if not hits:
+            return "No matching passages found in the supplied translations."
+        lines = []
+        for i, _ in hits:
+            passage = index.passages[i]
+            citation = CitationFormatter.format_bible_citation(
+                passage["book"], passage["chapter"], passage["verse"], passage["translation"]
+            )
+            lines.append(f"{citation}: {index.text(i)}")
+        return "\n".join(lines)
+
 class CitationFormatter:
     @staticmethod
     def format_bible_citation(book: str, chapter: int, verse: int, translation: str) -> str:
@@ -67,13 +205,39 @@ class CitationFormatter:
             citation += f" https://doi.org/{doi}"
         return citation
 
+# Add citation formatting instructions
+CITATION_INSTRUCTIONS = """
+            Format your response following these rules:
+            1. Use APA 7th Edition format for all citations
+            2. Include DOIs or stable URLs for all sources
+            3. Provide page numbers for direct quotes
+            4. Include access dates for web resources
+            5. Format Bible references as: Book Chapter:Verse (Translation)
+            6. Add a References section at the end
+            7. Include clickable hyperlinks in appropriate format
+            8. Add an Additional Resources section with relevant databases
+            9. Include a note about citation compliance and source verification
+            """
+
 class Agent:
-    def __init__(self, name, instructions):
+    model = "gpt-4-1106-preview"
+
+    def __init__(self, name, instructions, cache: Optional[ResponseCache] = None,
+                 tool_cache: Optional[ResponseCache] = None, bible_files: Optional[List[str]] = None,
+                 tracer: Optional[Tracer] = None):
+        """``cache`` holds final answers; ``tool_cache`` holds tool results.
+
+        Pass ``ResponseCache(db_path=...)`` to keep either across processes.
+        ``bible_files`` are indexed locally by the knowledge base tool.
+        ``tracer`` defaults to Tracer.from_env() (see tracing.py).
+        """
         self.name = name
         self.instructions = instructions
         self.client = OpenAI()
-        self.web_search = WebSearchTool()
-        self.knowledge_base = KnowledgeBaseTool()
+        self.cache = cache
+        self.tracer = tracer or Tracer.from_env()
+        self.web_search = WebSearchTool(cache=tool_cache)
+        self.knowledge_base = KnowledgeBaseTool(bible_files, cache=tool_cache)
         self.citation_formatter = CitationFormatter()
         self.current_date = datetime.now().strftime("%Y-%m-%d")
 
@@ -86,64 +250,91 @@ class Agent:
 
     async def run(self, user_input):
         """Run the agent with the given input"""
+        output, _ = await self.run_with_stats(user_input)
+        return output
+
+    async def run_with_stats(self, user_input):
+        """Run the agent and return the output with cache counters and a trace summary"""
+        stats = {"cache_hits": 0, "cache_misses": 0, "answer_cached": False, "error": None}
+        trace = self.tracer.start_trace()
         try:
-            # Determine which search methods to use based on instructions
-            use_web = "Web search is enabled" in self.instructions
-            use_kb = "Knowledge Base search is enabled" in self.instructions
-            
-            # Gather information from enabled tools
-            tool_results = []
-            
-            if use_web:
-                web_result = await self.web_search.run(user_input)
-                tool_results.append("Web Search Results:\n" + web_result)
-                
-            if use_kb:
-                kb_result = await self.knowledge_base.run(user_input)
-                tool_results.append("Bible Knowledge Base Results:\n" + kb_result)
+            with trace.span("agent.run", agent=self.name):
+                output = await self._run_traced(user_input, stats, trace)
+        except Exception as e:
+            # The span already holds the exception type and traceback
+            stats["error"] = {"type": type(e).__name__, "message": str(e)}
+            output = f"Error running agent: {str(e)}"
+        trace.export()
+        stats["trace"] = trace.summary()
+        return output, stats
+
+    async def _run_traced(self, user_input, stats, trace):
+        # Determine which search methods to use based on instructions
+        use_web = "Web search is enabled" in self.instructions
+        use_kb = "Knowledge Base search is enabled" in self.instructions
+        
+        # Gather information from enabled tools
+        tool_results = []
+        
+        if use_web:
+            with trace.span(f"tool.{self.web_search.name}"):
+                web_result = await self.web_search.cached_run(user_input, stats)
+            tool_results.append("Web Search Results:\n" + web_result)
             
+        if use_kb:
+            with trace.span(f"tool.{self.knowledge_base.name}"):
+                kb_result = await self.knowledge_base.cached_run(user_input, stats)
+            tool_results.append("Bible Knowledge Base Results:\n" + kb_result)
+        
+        with trace.span("prompt.assemble") as span:
             # Combine results with the main query
             combined_input = f"User Query: {user_input}\n\n"
             if tool_results:
                 combined_input += "\n\n".join(tool_results)
-            
-            # Add citation formatting instructions
-            citation_instructions = """
-            Format your response following these rules:
-            1. Use APA 7th Edition format for all citations
-            2. Include DOIs or stable URLs for all sources
-            3. Provide page numbers for direct quotes
-            4. Include access dates for web resources
-            5. Format Bible references as: Book Chapter:Verse (Translation)
-            6. Add a References section at the end
-            7. Include clickable hyperlinks in appropriate format
-            8. Add an Additional Resources section with relevant databases
-            9. Include a note about citation compliance and source verification
-            """
+            answer_key = ResponseCache.make_key(self.instructions, CITATION_INSTRUCTIONS, combined_input, self.model)
+            span.set(prompt_chars=len(self.instructions) + len(CITATION_INSTRUCTIONS) + len(combined_input))
+        
+        with trace.span("completion", model=self.model) as span:
+            # Reuse the final answer when instructions, inputs and model all match
+            if self.cache is not None:
+                cached = self.cache.get(answer_key)
+                stats["cache_hits" if cached is not None else "cache_misses"] += 1
+                span.set(cache="hit" if cached is not None else "miss")
+                if cached is not None:
+                    stats["answer_cached"] = True
+                    return self.format_response(cached)
+            else:
+                span.set(cache="disabled")
             
             # Get final response
             response = self.client.chat.completions.create(
-                model="gpt-4-1106-preview",
+                model=self.model,
                 messages=[
-                    {"role": "system", "content": self.instructions + citation_instructions},
+                    {"role": "system", "content": self.instructions + CITATION_INSTRUCTIONS},
                     {"role": "user", "content": combined_input}
                 ]
             )
-            
-            # Format the response
-            formatted_response = self.format_response(response.choices[0].message.content)
-            return formatted_response
-            
-        except Exception as e:
-            return f"Error running agent: {str(e)}"
+            record_usage(response.usage)
+            content = response.choices[0].message.content
+            if self.cache is not None:
+                self.cache.set(answer_key, content)
+        
+        # Format the response
+        return self.format_response(content)
 
 class Runner:
     @staticmethod
     async def run(agent, input_text):
         """Run an agent with the given input"""
-        result = await agent.run(input_text)
-        return AgentResult(result)
+        result, stats = await agent.run_with_stats(input_text)
+        return AgentResult(result, **stats)
 
 class AgentResult:
-    def __init__(self, final_output):
-        self.final_output = final_output 
\ No newline at end of file
+    def __init__(self, final_output, cache_hits: int = 0, cache_misses: int = 0, answer_cached: bool = False,
+                 error: Optional[Dict[str, str]] = None, trace: Optional[Dict[str, Any]] = None):
+        self.final_output = final_output
+        self.cache_hits = cache_hits
+        self.cache_misses = cache_misses
+        self.answer_cached = answer_cached
+        self.error = error
+        self.trace = trace
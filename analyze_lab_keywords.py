@@ -1,7 +1,31 @@
 import json
 import re
-from collections import Counter, defaultdict
-from typing import List, Dict, Tuple
+import heapq
+from collections import Counter
+from operator import itemgetter
+from typing import List, Dict, Tuple, Optional
+import pandas as pd
+
+# Common words to exclude
+STOP_WORDS = {
+    'with', 'using', 'from', 'this', 'that', 'these', 'those', 'then', 'than',
+    'they', 'them', 'their', 'there', 'when', 'where', 'what', 'which', 'who',
+    'whom', 'have', 'has', 'had', 'for', 'and', 'not', 'but', 'the', 'a', 'an',
+    'lab', 'labs', 'guide', 'exercise', 'exercises', 'introduction', 'overview'
+}
+
+# Title keywords that place a lab in a category
+KEYWORD_CATEGORIES = {
+    'security': ['security', 'cyber', 'hack', 'attack', 'defense', 'threat', 'vulnerability', 'penetration', 'pentest', 'malware'],
+    'networking': ['network', 'tcp/ip', 'subnet', 'vlan', 'router', 'switch', 'firewall', 'dns', 'dhcp', 'vpn'],
+    'cloud': ['aws', 'azure', 'gcp', 'cloud', 'amazon', 'microsoft', 'google', 's3', 'ec2', 'lambda'],
+    'linux': ['linux', 'ubuntu', 'debian', 'centos', 'redhat', 'bash', 'shell', 'kernel', 'unix'],
+    'windows': ['windows', 'active directory', 'ad', 'powershell', 'iis', 'server', 'microsoft'],
+    'programming': ['python', 'java', 'javascript', 'c++', 'programming', 'script', 'api', 'json', 'xml'],
+    'certification': ['comptia', 'a+', 'network+', 'security+', 'cyber', 'cissp', 'ceh', 'cism', 'ccna', 'ccnp'],
+    'data': ['database', 'sql', 'mysql', 'postgresql', 'mongodb', 'oracle', 'data', 'analytics', 'big data'],
+    'devops': ['devops', 'docker', 'kubernetes', 'ci/cd', 'jenkins', 'ansible', 'terraform', 'iac', 'infrastructure as code']
+}
 
 def clean_title(title: str) -> str:
     """Clean and normalize the title text."""
@@ -15,48 +39,82 @@ def clean_title(title: str) -> str:
 
 def extract_keywords(title: str, min_length: int = 4) -> List[str]:
     """Extract meaningful keywords from a title."""
-    # Common words to exclude
-    stop_words = {
-        'with', 'using', 'from', 'this', 'that', 'these', 'those', 'then', 'than',
-        'they', 'them', 'their', 'there', 'when', 'where', 'what', 'which', 'who',
-        'whom', 'have', 'has', 'had', 'for', 'and', 'not', 'but', 'the', 'a', 'an',
-        'lab', 'labs', 'guide', 'exercise', 'exercises', 'introduction', 'overview'
-    }
-    
     words = title.split()
     # Filter out short words and stop words
     keywords = [
         word for word in words 
-        if len(word) >= min_length and word not in stop_words
+        if len(word) >= min_length and word not in STOP_WORDS
     ]
     return keywords
 
-def analyze_titles_by_type(data: List[dict]) -> Dict[str, Counter]:
+def tokenize_titles(df: pd.DataFrame) -> pd.DataFrame:
+    """Clean and split every title at once; one row per token, in title order."""
+    titles = df['Title'].fillna('').astype(str)
+    # Same cleaning as clean_title, applied to the whole column
+    cleaned = titles.str.lower().str.replace(r'[^\w\s-]', ' ', regex=True)
+    tokens = cleaned.str.split().explode().dropna()
+    return pd.DataFrame({
+        'content_type': df['Content type'].fillna('unknown').reindex(tokens.index).values,
+        'row': tokens.index,
+        'token': tokens.values
+    })
+
+def count_keywords(data: List[dict], ngram: int = 1, min_length: int = 4) -> pd.Series:
+    """Count keywords (or n-grams) per content type with vectorized string ops.
+
+    Unigrams keep words of at least ``min_length`` characters that are not stop
+    words. N-grams are runs of ``ngram`` adjacent words within one title that
+    contain no stop word. Returns counts indexed by (content type, keyword).
+    """
+    df = pd.DataFrame(data)
+    if df.empty or 'Title' not in df:
+        return pd.Series(dtype='int64', index=pd.MultiIndex.from_tuples([], names=['content_type', 'keyword']))
+    if 'Content type' not in df:
+        df['Content type'] = 'unknown'
+    tokens = tokenize_titles(df).reset_index(drop=True)
+
+    if ngram == 1:
+        mask = (tokens['token'].str.len() >= min_length) & ~tokens['token'].isin(STOP_WORDS)
+        keywords = tokens.loc[mask, ['content_type', 'token']].rename(columns={'token': 'keyword'})
+    else:
+        # Shift tokens within each title to line up the following words
+        by_title = tokens.groupby('row')['token']
+        parts = [tokens['token']] + [by_title.shift(-k) for k in range(1, ngram)]
+        valid = pd.concat(parts, axis=1).notna().all(axis=1)
+        for part in parts:
+            valid &= ~part.isin(STOP_WORDS)
+        keyword = parts[0][valid]
+        for part in parts[1:]:
+            keyword = keyword + ' ' + part[valid]
+        keywords = pd.DataFrame({'content_type': tokens.loc[valid, 'content_type'], 'keyword': keyword})
+
+    counts = keywords.groupby('content_type')['keyword'].value_counts()
+    counts.index = counts.index.set_names(['content_type', 'keyword'])
+    return counts
+
+def analyze_titles_by_type(data: List[dict], ngram: int = 1) -> Dict[str, Counter]:
     """Analyze titles by content type."""
-    type_keywords = defaultdict(Counter)
-    
-    for item in data:
-        content_type = item.get('Content type', 'unknown')
-        title = item.get('Title', '')
-        
-        if not title:
-            continue
-            
-        clean_t = clean_title(title)
-        keywords = extract_keywords(clean_t)
-        
-        # Count keywords for this content type
-        type_keywords[content_type].update(keywords)
-    
-    return type_keywords
+    counts = count_keywords(data, ngram=ngram)
+    return {
+        content_type: Counter(group.droplevel(0).to_dict())
+        for content_type, group in counts.groupby(level=0)
+    }
 
 def find_common_keywords(keyword_counts: Dict[str, Counter], top_n: int = 20) -> Dict[str, List[Tuple[str, int]]]:
     """Find the most common keywords for each content type."""
+    # Heap selection instead of sorting every counter in full
     return {
-        content_type: counter.most_common(top_n)
+        content_type: heapq.nlargest(top_n, counter.items(), key=itemgetter(1))
         for content_type, counter in keyword_counts.items()
     }
 
+def top_keywords(counts: pd.Series, top_n: int = 20) -> Dict[str, List[Tuple[str, int]]]:
+    """Top-N keywords per content type straight from count_keywords output."""
+    return {
+        content_type: list(group.droplevel(0).nlargest(top_n).items())
+        for content_type, group in counts.groupby(level=0)
+    }
+
 def categorize_labs_by_keywords(data: List[dict], keyword_categories: Dict[str, List[str]]) -> Dict[str, List[dict]]:
     """Categorize labs based on keywords in their titles."""
     categorized = {category: [] for category in keyword_categories}
@@ -78,18 +136,26 @@ def categorize_labs_by_keywords(data: List[dict], keyword_categories: Dict[str,
     return categorized
 
 def save_keyword_analysis(common_keywords: Dict[str, List[Tuple[str, int]]], 
-                         output_file: str) -> None:
-    """Save the keyword analysis to a markdown file."""
+                         output_file: str,
+                         ngram_keywords: Optional[Dict[str, Dict[str, List[Tuple[str, int]]]]] = None) -> None:
+    """Save the keyword analysis (and optional n-gram sections) to a markdown file."""
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write("# Lab Title Keyword Analysis\n\n")
         
         for content_type, keywords in common_keywords.items():
             f.write(f"## {content_type} Labs\n\n")
-            f.write(f"Top 20 most common keywords in {content_type} titles:\n\n")
+            f.write(f"Top {len(keywords)} most common keywords in {content_type} titles:\n\n")
             
             for word, count in keywords:
                 f.write(f"- `{word}`: {count} occurrences\n")
             
+            for label, by_type in (ngram_keywords or {}).items():
+                phrases = by_type.get(content_type, [])
+                if phrases:
+                    f.write(f"\nTop {len(phrases)} {label} in {content_type} titles:\n\n")
+                    for phrase, count in phrases:
+                        f.write(f"- `{phrase}`: {count} occurrences\n")
+            
             f.write("\n---\n\n")
 
 def save_categorized_labs(categorized: Dict[str, List[dict]], 
@@ -122,25 +188,27 @@ def main():
     with open(input_json, 'r', encoding='utf-8') as f:
         data = json.load(f)
     
+    # Unigram counts are kept in the precomputed snapshot when pyarrow is available
+    from lab_analytics import LabAnalyticsSnapshot, pyarrow
+    if pyarrow is not None:
+        snapshot = LabAnalyticsSnapshot()
+        snapshot.refresh_from_export(input_json)
+        unigram_counts = snapshot.keyword_counts()
+    else:
+        unigram_counts = count_keywords(data)
+    
     # 1. Analyze keywords in titles
     print("Analyzing keywords...")
-    type_keywords = analyze_titles_by_type(data)
-    common_keywords = find_common_keywords(type_keywords)
-    save_keyword_analysis(common_keywords, keywords_output)
+    common_keywords = top_keywords(unigram_counts)
+    ngram_keywords = {
+        'bigrams': top_keywords(count_keywords(data, ngram=2), top_n=10),
+        'trigrams': top_keywords(count_keywords(data, ngram=3), top_n=10)
+    }
+    save_keyword_analysis(common_keywords, keywords_output, ngram_keywords)
     
     # 2. Categorize labs by keywords
     print("Categorizing labs...")
-    keyword_categories = {
-        'security': ['security', 'cyber', 'hack', 'attack', 'defense', 'threat', 'vulnerability', 'penetration', 'pentest', 'malware'],
-        'networking': ['network', 'tcp/ip', 'subnet', 'vlan', 'router', 'switch', 'firewall', 'dns', 'dhcp', 'vpn'],
-        'cloud': ['aws', 'azure', 'gcp', 'cloud', 'amazon', 'microsoft', 'google', 's3', 'ec2', 'lambda'],
-        'linux': ['linux', 'ubuntu', 'debian', 'centos', 'redhat', 'bash', 'shell', 'kernel', 'unix'],
-        'windows': ['windows', 'active directory', 'ad', 'powershell', 'iis', 'server', 'microsoft'],
-        'programming': ['python', 'java', 'javascript', 'c++', 'programming', 'script', 'api', 'json', 'xml'],
-        'certification': ['comptia', 'a+', 'network+', 'security+', 'cyber', 'cissp', 'ceh', 'cism', 'ccna', 'ccnp'],
-        'data': ['database', 'sql', 'mysql', 'postgresql', 'mongodb', 'oracle', 'data', 'analytics', 'big data'],
-        'devops': ['devops', 'docker', 'kubernetes', 'ci/cd', 'jenkins', 'ansible', 'terraform', 'iac', 'infrastructure as code']
-    }
+    keyword_categories = KEYWORD_CATEGORIES
     
     categorized_labs = categorize_labs_by_keywords(data, keyword_categories)
     save_categorized_labs(categorized_labs, categories_output)
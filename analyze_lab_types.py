@@ -1,23 +1,29 @@
 import json
 from collections import Counter
+from lab_analytics import LabAnalyticsSnapshot, pyarrow
 
-def analyze_lab_types(json_file_path, output_file_path):
-    # Read the JSON file
+def count_lab_types(json_file_path):
+    """(content type, count) pairs sorted by count, and the number of labs."""
+    if pyarrow is not None:
+        # Counts come from the precomputed snapshot, refreshed only if the export changed
+        snapshot = LabAnalyticsSnapshot()
+        snapshot.refresh_from_export(json_file_path)
+        return snapshot.type_counts(), snapshot.meta.get('rows', 0)
+    
+    # Without pyarrow there is no snapshot; count the export directly
     with open(json_file_path, 'r', encoding='utf-8') as file:
         data = json.load(file)
-    
-    # Extract all content types
-    content_types = [item.get('Content type', 'N/A') for item in data]
-    
-    # Count occurrences of each content type
-    type_counts = Counter(content_types)
-    
-    # Sort by count (descending)
-    sorted_types = sorted(type_counts.items(), key=lambda x: x[1], reverse=True)
+    type_counts = Counter(item.get('Content type', 'N/A') for item in data)
+    return sorted(type_counts.items(), key=lambda x: x[1], reverse=True), len(data)
+
+def analyze_lab_types(json_file_path, output_file_path):
+    # Already sorted by count (descending)
+    sorted_types, total_labs = count_lab_types(json_file_path)
+    type_counts = dict(sorted_types)
     
     # Generate markdown content
     markdown_content = "# Lab Types Analysis\n\n"
-    markdown_content += f"Total labs analyzed: {len(data)}\n\n"
+    markdown_content += f"Total labs analyzed: {total_labs}\n\n"
     markdown_content += "## Lab Types and Counts\n\n"
     
     for content_type, count in sorted_types:
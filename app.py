@@ -2,46 +2,82 @@ import streamlit as st
 import os
 from openai import OpenAI
 from dotenv import load_dotenv
-from datetime import datetime
-import time
 import json
+from run_waiter import create_and_wait
+from conversation_export import EXPORT_FORMATS, DOCX_UNAVAILABLE, export_to_tempfile
+from deployment_registry import DeploymentRegistry, REGISTRY_FILE, DEFAULT_DEPLOYMENT
+
+DEPLOYMENT_NAME = os.getenv("ASSISTANT_DEPLOYMENT", DEFAULT_DEPLOYMENT)
+
+@st.cache_data(show_spinner=False)
+def load_active_deployment(name, registry_mtime):
+    """Active version from the deployment registry; re-read only when the file changes"""
+    return DeploymentRegistry(REGISTRY_FILE).active(name)
 
 def load_assistant_info():
-    """Load assistant information from the saved file"""
+    """Load assistant information from the deployment registry or the legacy file"""
+    if REGISTRY_FILE.exists():
+        deployment = load_active_deployment(DEPLOYMENT_NAME, REGISTRY_FILE.stat().st_mtime)
+        if deployment:
+            return deployment
     try:
         with open('assistant_info.json', 'r') as f:
             return json.load(f)
     except FileNotFoundError:
-        return {
-            'assistant_id': 'asst_6jOyAqWW9jQxHFgJfSGOze8c',
-            'vector_store_id': 'vs_682b3d34985c819181e0468d38c5001e'
-        }
-
-def convert_to_text(messages):
-    """Convert chat messages to plain text format"""
-    text = ""
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    text += f"Lab Intake Assistant\n"
-    text += f"Conversation Export ({current_time})\n\n"
-    
-    for msg in messages:
-        role = msg["role"].title()
-        content = msg["content"]
-        
-        if role == "User":
-            text += f"Question:\n{content}\n\n"
-        else:
-            text += f"Answer:\n{content}\n\n"
-    return text
+        return {}
 
-# Callback to initiate processing
-def start_download_processing():
-    st.session_state.download_stage = 'processing'
+def summarize_turns(summary, turns):
+    """Fold older turns into the running conversation summary"""
+    transcript = "\n".join(f"{msg['role'].title()}: {msg['content']}" for msg in turns)
+    response = client.chat.completions.create(
+        model=SUMMARY_MODEL,
+        max_tokens=400,
+        messages=[
+            {"role": "system", "content": "You maintain a compact memory of a lab intake conversation. Merge the existing summary with the new turns. Keep facts the user stated (organization, lab names, VM counts, operating systems, constraints) and open questions. Use terse bullet points, at most 200 words."},
+            {"role": "user", "content": f"Existing summary:\n{summary or '(none)'}\n\nNew turns:\n{transcript}"}
+        ]
+    )
+    return response.choices[0].message.content
+
+def update_memory():
+    """Summarize turns that have fallen out of the run's truncation window"""
+    messages = st.session_state.messages
+    cutoff = len(messages) - THREAD_WINDOW_MESSAGES
+    if cutoff - st.session_state.summarized_upto < SUMMARY_BATCH_MESSAGES:
+        return
+    try:
+        st.session_state.memory_summary = summarize_turns(
+            st.session_state.memory_summary,
+            messages[st.session_state.summarized_upto:cutoff]
+        )
+        st.session_state.summarized_upto = cutoff
+    except Exception as e:
+        # Memory is best effort; the run still sees the recent window
+        print(f"Could not update conversation summary: {str(e)}")
+
+def memory_instructions():
+    """Additional run instructions carrying the summary of truncated turns"""
+    if not st.session_state.memory_summary:
+        return None
+    return f"Summary of earlier conversation (older messages are not shown to you):\n{st.session_state.memory_summary}"
+
+# Callback to build the export file as soon as it is requested
+def prepare_download():
+    current_messages = st.session_state.get("messages", [])
+    if not current_messages:
+        return
+    fmt = st.session_state.export_format
+    st.session_state.export_path = export_to_tempfile(current_messages, fmt)
+    st.session_state.export_format_ready = fmt
+    st.session_state.download_stage = 'ready_to_download'
 
 # Function to reset download state
 def reset_download_state():
+    export_path = st.session_state.get("export_path")
+    if export_path and os.path.exists(export_path):
+        os.remove(export_path)
     st.session_state.download_stage = 'initial'
-    st.session_state.text_to_download = None
+    st.session_state.export_path = None
 
 # Load environment variables
 load_dotenv(override=True)
@@ -49,19 +85,34 @@ load_dotenv(override=True)
 # Ensure your OpenAI key is available from .env file
 OPENAI_API_KEY = os.environ["OPENAI_API_KEY"]
 
-# Load assistant information
-assistant_info = load_assistant_info()
-ASSISTANT_ID = assistant_info.get('assistant_id', 'asst_6jOyAqWW9jQxHFgJfSGOze8c')
-VECTOR_STORE_ID = assistant_info.get('vector_store_id', 'vs_682b3d34985c819181e0468d38c5001e')
+# Conversation memory: the run only sees the last THREAD_WINDOW_MESSAGES thread
+# messages, older turns are folded into a summary passed as extra instructions,
+# and only the last VISIBLE_MESSAGES are rendered unless the user asks for more
+THREAD_WINDOW_MESSAGES = 10
+SUMMARY_BATCH_MESSAGES = 6
+VISIBLE_MESSAGES = 20
+SUMMARY_MODEL = "gpt-4o-mini"
+
+# Load assistant information; a session stays on the version it started with,
+# new sessions pick up whatever version is active
+if not st.session_state.get("assistant_info"):
+    st.session_state.assistant_info = load_assistant_info()
+assistant_info = st.session_state.assistant_info
+ASSISTANT_ID = assistant_info.get('assistant_id')
+VECTOR_STORE_ID = assistant_info.get('vector_store_id')
 
 # Initialize session state
 if "messages" not in st.session_state:
     st.session_state.messages = []
 if "thread_id" not in st.session_state:
     st.session_state.thread_id = None
-if "text_to_download" not in st.session_state:
-    st.session_state.text_to_download = None
-if "download_stage" not in st.session_state:  # 'initial', 'processing', 'ready_to_download'
+if "export_path" not in st.session_state:
+    st.session_state.export_path = None
+if "memory_summary" not in st.session_state:
+    st.session_state.memory_summary = ""
+if "summarized_upto" not in st.session_state:
+    st.session_state.summarized_upto = 0
+if "download_stage" not in st.session_state:  # 'initial', 'ready_to_download'
     st.session_state.download_stage = 'initial'
 
 # Streamlit UI
@@ -78,6 +129,11 @@ st.set_page_config(
 st.title(" Lab Intake Assistant")
 st.write("Get help with lab intake documentation and requirements.")
 
+if not ASSISTANT_ID:
+    st.error("No lab intake assistant is deployed. Run create_new_assistant.py or "
+             "update_lab_intake_assistant.py to deploy one, then reload this page.")
+    st.stop()
+
 # Sidebar controls
 st.sidebar.title("Settings")
 
@@ -86,6 +142,8 @@ st.sidebar.subheader("Conversation Controls")
 if st.sidebar.button("Clear Conversation"):
     st.session_state.messages = []
     st.session_state.thread_id = None
+    st.session_state.memory_summary = ""
+    st.session_state.summarized_upto = 0
     reset_download_state()  # Reset download stage
     st.rerun()
 
@@ -95,38 +153,33 @@ st.sidebar.subheader("Download Conversation")
 # Stateful Download UI
 if st.session_state.download_stage == 'initial':
     initial_button_disabled = not st.session_state.get("messages", [])
+    st.sidebar.selectbox("Format", list(EXPORT_FORMATS), key="export_format")
+    if DOCX_UNAVAILABLE:
+        st.sidebar.caption(DOCX_UNAVAILABLE)
     st.sidebar.button(
-        "Process & Download Chat (TXT)",
-        on_click=start_download_processing,
+        "Prepare Download",
+        on_click=prepare_download,
         disabled=initial_button_disabled,
         key="initiate_download_process_btn"
     )
-elif st.session_state.download_stage == 'processing':
-    st.sidebar.info("Processing conversation... please wait.")
-    # Perform the actual processing and delay here
-    current_messages = st.session_state.get("messages", [])
-    if current_messages:
-        generated_text = convert_to_text(current_messages)
-        st.session_state.text_to_download = generated_text
-        time.sleep(5) # The 5-second delay
-        st.session_state.download_stage = 'ready_to_download'
-    else:
-        # Should not happen if button was enabled, but as a fallback
-        reset_download_state()
-    st.rerun() # Force rerun to show the download button or revert
 
 elif st.session_state.download_stage == 'ready_to_download':
-    if st.session_state.get("text_to_download"):
-        st.sidebar.download_button(
-            label="Click Here to Download TXT",
-            data=st.session_state.text_to_download,
-            file_name="conversation_export.txt",
-            mime="text/plain",
-            key="final_download_action_btn",
-            on_click=reset_download_state # Reset state after download click
-        )
+    export_path = st.session_state.get("export_path")
+    if export_path and os.path.exists(export_path):
+        fmt = st.session_state.export_format_ready
+        export_info = EXPORT_FORMATS[fmt]
+        # Hand the file object to Streamlit instead of keeping the transcript in session state
+        with open(export_path, "rb") as export_file:
+            st.sidebar.download_button(
+                label=f"Click Here to Download {fmt}",
+                data=export_file,
+                file_name=f"conversation_export.{export_info['extension']}",
+                mime=export_info["mime"],
+                key="final_download_action_btn",
+                on_click=reset_download_state # Reset state after download click
+            )
     else:
-        # If somehow no text to download, revert to initial state
+        # If somehow no file to download, revert to initial state
         st.sidebar.warning("No data to download. Please try again.")
         reset_download_state()
         st.rerun()
@@ -154,8 +207,13 @@ def create_thread():
 # Initialize the OpenAI client
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-# Display chat messages
-for message in st.session_state.messages:
+# Display chat messages, rendering only the most recent ones by default
+hidden_count = max(0, len(st.session_state.messages) - VISIBLE_MESSAGES)
+if hidden_count and st.toggle(f"Show {hidden_count} earlier messages", key="show_earlier_messages"):
+    visible_messages = st.session_state.messages
+else:
+    visible_messages = st.session_state.messages[hidden_count:]
+for message in visible_messages:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
 
@@ -184,33 +242,28 @@ if prompt := st.chat_input("Ask about lab requirements..."):
             content=prompt
         )
         
-        # Create a run with the assistant
-        run = client.beta.threads.runs.create(
-            thread_id=st.session_state.thread_id,
-            assistant_id=ASSISTANT_ID,
-            instructions="You are a helpful lab intake assistant. Provide detailed, accurate information based on the provided documentation."
+        # Create a run with the assistant and wait for it with adaptive backoff
+        run_result = create_and_wait(
+            client,
+            st.session_state.thread_id,
+            ASSISTANT_ID,
+            instructions="You are a helpful lab intake assistant. Provide detailed, accurate information based on the provided documentation.",
+            additional_instructions=memory_instructions(),
+            truncation_strategy={"type": "last_messages", "last_messages": THREAD_WINDOW_MESSAGES}
         )
+        run_status = run_result.run
         
-        # Poll for the run to complete
-        while True:
-            run_status = client.beta.threads.runs.retrieve(
-                thread_id=st.session_state.thread_id,
-                run_id=run.id
-            )
-            
-            if run_status.status == 'completed':
-                break
-            elif run_status.status in ['failed', 'cancelled', 'expired']:
+        if not run_result.ok:
+            if run_result.status == 'timed_out':
+                full_response = "Sorry, the assistant took too long to respond. Please try again."
+            else:
                 full_response = "Sorry, I encountered an error processing your request. Please try again."
-                break
-            
-            # Small delay to avoid hitting rate limits
-            time.sleep(0.5)
         
         # Get the assistant's response
-        if run_status.status == 'completed':
+        if run_result.ok:
             messages = client.beta.threads.messages.list(
-                thread_id=st.session_state.thread_id
+                thread_id=st.session_state.thread_id,
+                run_id=run_status.id
             )
             
             # Get the latest assistant message
@@ -229,5 +282,8 @@ if prompt := st.chat_input("Ask about lab requirements..."):
     # Add assistant response to chat history
     st.session_state.messages.append({"role": "assistant", "content": full_response})
     
+    # Fold turns that left the truncation window into the memory summary
+    update_memory()
+    
     # Rerun to update the UI
     st.rerun()
\ No newline at end of file
@@ -0,0 +1,128 @@
+import os
+import json
+import math
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from typing import List, Dict, Any
+from openai import OpenAI
+from dotenv import load_dotenv
+from file_search import search_documents, create_search_assistant
+
+# Load environment variables
+load_dotenv()
+
+DEFAULT_CONCURRENCY = 8
+SNIPPET_CHARS = 500
+
+def load_queries(path: Path) -> List[str]:
+    """Read queries from a text file (one per line) or a JSONL file with a "query" field."""
+    queries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if path.suffix == '.jsonl':
+                queries.append(json.loads(line)['query'])
+            else:
+                queries.append(line)
+    return queries
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+async def run_query(client, semaphore: asyncio.Semaphore, vector_store_id: str, assistant_id: str,
+                    index: int, query: str, limit: int) -> Dict[str, Any]:
+    """Run one query in a worker thread, bounded by the semaphore."""
+    async with semaphore:
+        started = time.perf_counter()
+        record: Dict[str, Any] = {'index': index, 'query': query}
+        try:
+            response = await asyncio.to_thread(
+                search_documents, client, vector_store_id, query, limit, assistant_id
+            )
+            record['status'] = 'ok'
+            record['usage'] = response['usage']
+            record['run'] = response['run']
+            record['snippets'] = [r['content'][:SNIPPET_CHARS] for r in response['results']]
+        except Exception as e:
+            record['status'] = 'error'
+            record['error'] = str(e)
+        record['latency_s'] = round(time.perf_counter() - started, 3)
+        return record
+
+async def run_batch(queries: List[str], output_path: Path, vector_store_id: str,
+                    limit: int = 5, concurrency: int = DEFAULT_CONCURRENCY) -> Dict[str, Any]:
+    """Run all queries concurrently with one shared client and assistant, streaming results to JSONL."""
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=5)
+    assistant_id = create_search_assistant(client, vector_store_id)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    total_tokens = 0
+    errors = 0
+    started = time.perf_counter()
+    try:
+        tasks = [
+            asyncio.create_task(run_query(client, semaphore, vector_store_id, assistant_id, i, q, limit))
+            for i, q in enumerate(queries)
+        ]
+        with open(output_path, 'w', encoding='utf-8') as out:
+            for done in asyncio.as_completed(tasks):
+                record = await done
+                out.write(json.dumps(record, default=str) + "\n")
+                latencies.append(record['latency_s'])
+                if record['status'] == 'ok':
+                    total_tokens += (record.get('usage') or {}).get('total_tokens', 0) or 0
+                else:
+                    errors += 1
+                print(f"[{len(latencies)}/{len(queries)}] {record['status']} {record['latency_s']:.2f}s  {record['query'][:60]}")
+    finally:
+        try:
+            client.beta.assistants.delete(assistant_id)
+        except Exception:
+            pass
+
+    elapsed = time.perf_counter() - started
+    return {
+        'queries': len(queries),
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_qps': round(len(queries) / elapsed, 3) if elapsed else 0.0,
+        'p50_s': percentile(latencies, 50),
+        'p95_s': percentile(latencies, 95),
+        'p99_s': percentile(latencies, 99),
+        'total_tokens': total_tokens,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a file of search queries against the vector store")
+    parser.add_argument("queries", type=Path, help="Text file (one query per line) or JSONL with a 'query' field")
+    parser.add_argument("-o", "--output", type=Path, default=Path("batch_search_results.jsonl"))
+    parser.add_argument("-c", "--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("-l", "--limit", type=int, default=5, help="Max results per query")
+    parser.add_argument("--vector-store-id", default=os.getenv("VECTOR_STORE_ID"))
+    args = parser.parse_args()
+
+    if not args.vector_store_id:
+        print("❌ VECTOR_STORE_ID not set; pass --vector-store-id or add it to .env")
+        return
+
+    queries = load_queries(args.queries)
+    print(f"🚀 Running {len(queries)} queries with concurrency {args.concurrency}...")
+    summary = asyncio.run(run_batch(queries, args.output, args.vector_store_id, args.limit, args.concurrency))
+
+    print(f"\n✅ Results written to {args.output}")
+    print(f"   Queries: {summary['queries']} ({summary['errors']} errors) in {summary['elapsed_s']:.1f}s")
+    print(f"   Throughput: {summary['throughput_qps']:.2f} queries/s")
+    print(f"   Latency p50/p95/p99: {summary['p50_s']:.2f}s / {summary['p95_s']:.2f}s / {summary['p99_s']:.2f}s")
+    print(f"   Total tokens: {summary['total_tokens']}")
+
+if __name__ == "__main__":
+    main()
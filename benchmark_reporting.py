@@ -0,0 +1,110 @@
+import os
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Callable
+from pymongo import MongoClient
+from dotenv import load_dotenv
+from survey_reporting import ensure_report_indexes, query_submissions, count_submissions
+
+# Load environment variables
+load_dotenv()
+
+ORGANIZATIONS = [f"Organization {i}" for i in range(200)]
+ORG_TYPES = ["Educational Institution", "Enterprise", "Government", "Non-Profit", "Other"]
+DEVELOPERS = ["ACI", "Customer SME", "Joint Development"]
+
+def make_submission(now: datetime) -> Dict[str, Any]:
+    """Synthetic submission shaped like lab_survey_app's, labs and VMs included."""
+    num_labs = random.randint(1, 12)
+    return {
+        "contact_info": {
+            "first_name": "Test", "last_name": "User", "email": "test@example.com",
+            "organization": random.choice(ORGANIZATIONS),
+            "org_type": random.choice(ORG_TYPES)
+        },
+        "course_info": {
+            "course_name": f"Course {random.randint(1, 5000)}",
+            "course_duration": random.choice(["3 months", "6 months", "12 months"]),
+            "num_labs": num_labs,
+            "developer": random.choice(DEVELOPERS),
+            "description": "Benchmark course " * 10,
+            "labs": [{
+                "lab_name": f"Lab {i}",
+                "persistence": "Non-Persistent (Default, Fresh instance each time)",
+                "vms": [{"os": "Ubuntu 20.04", "cpus": 2, "ram": 4, "drives": [50]} for _ in range(random.randint(1, 4))]
+            } for i in range(num_labs)]
+        },
+        "submitted_at": now - timedelta(minutes=random.randint(0, 60 * 24 * 365))
+    }
+
+def seed(collection, count: int, batch_size: int = 1000) -> None:
+    now = datetime.utcnow()
+    for start in range(0, count, batch_size):
+        collection.insert_many([make_submission(now) for _ in range(min(batch_size, count - start))], ordered=False)
+
+def time_query(fn: Callable[[], Any], repeats: int) -> float:
+    """Median latency in milliseconds."""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return sorted(timings)[len(timings) // 2]
+
+def plan_stage(collection, query: Dict[str, Any]) -> str:
+    plan = collection.find(query).sort([("submitted_at", -1), ("_id", -1)]).limit(51).explain()
+    stage = plan["queryPlanner"]["winningPlan"]
+    stages = []
+    while stage:
+        stages.append(stage.get("stage"))
+        stage = stage.get("inputStage")
+    return " <- ".join(s for s in stages if s)
+
+def run_benchmark(db, repeats: int) -> List[Dict[str, Any]]:
+    since = datetime.utcnow() - timedelta(days=30)
+    second_page = query_submissions(db, page_size=50)["next_cursor"]
+    cases = [
+        ("organization, newest 50", lambda: query_submissions(db, organization=ORGANIZATIONS[0]),
+         {"contact_info.organization": ORGANIZATIONS[0]}),
+        ("org type, last 30 days", lambda: query_submissions(db, org_type="Government", since=since),
+         {"contact_info.org_type": "Government", "submitted_at": {"$gte": since}}),
+        ("developer, newest 50", lambda: query_submissions(db, developer="Customer SME"),
+         {"course_info.developer": "Customer SME"}),
+        ("all, second page", lambda: query_submissions(db, cursor=second_page), {}),
+        ("count, last 30 days", lambda: count_submissions(db, since=since), {"submitted_at": {"$gte": since}}),
+    ]
+    return [{"case": name, "ms": time_query(fn, repeats), "plan": plan_stage(db.responses, query)}
+            for name, fn, query in cases]
+
+def main():
+    parser = argparse.ArgumentParser(description="Reporting query latency before and after indexing")
+    parser.add_argument('-n', '--submissions', type=int, default=20000)
+    parser.add_argument('-r', '--repeats', type=int, default=15)
+    parser.add_argument('--keep', action='store_true', help="Keep the benchmark database afterwards")
+    args = parser.parse_args()
+
+    client = MongoClient(os.getenv("MONGODB_BENCH_URI", "mongodb://localhost:27017/"), serverSelectionTimeoutMS=5000)
+    db = client["lab_survey_benchmark"]
+    db.responses.drop()
+    print(f"Seeding {args.submissions} submissions...")
+    seed(db.responses, args.submissions)
+
+    before = run_benchmark(db, args.repeats)
+    ensure_report_indexes(db)
+    after = run_benchmark(db, args.repeats)
+
+    print(f"\n{'Query':<26}{'Before (ms)':>12}{'After (ms)':>12}{'Speedup':>9}")
+    for b, a in zip(before, after):
+        speedup = b["ms"] / a["ms"] if a["ms"] else float('inf')
+        print(f"{b['case']:<26}{b['ms']:>12.2f}{a['ms']:>12.2f}{speedup:>8.1f}x")
+    print("\nWinning plans after indexing:")
+    for a in after:
+        print(f"- {a['case']}: {a['plan']}")
+
+    if not args.keep:
+        client.drop_database("lab_survey_benchmark")
+
+if __name__ == "__main__":
+    main()
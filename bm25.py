@@ -0,0 +1,46 @@
+import re
+import math
+import heapq
+from collections import Counter, defaultdict
+from typing import List, Dict, Tuple
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+# Keeps product names, versions, CLI flags and acronyms intact: esxi, 802.1q, --force, c#
+TOKEN_RE = re.compile(r'-{0,2}[a-z0-9][a-z0-9_.+#/-]*[a-z0-9+#]|[a-z0-9]')
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase tokens for BM25, keeping exact technical terms whole."""
+    return TOKEN_RE.findall(text.lower())
+
+class BM25Index:
+    """In-memory inverted index: term -> [(document position, term frequency)]."""
+
+    def __init__(self, documents: List[str]):
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+        for i, text in enumerate(documents):
+            tokens = tokenize(text)
+            self.doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                self.postings[term].append((i, tf))
+        n = len(documents)
+        self.avg_length = (sum(self.doc_lengths) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+            for term, p in self.postings.items()
+        }
+
+    def rank(self, query: str, top_n: int) -> List[Tuple[int, float]]:
+        """Return the top_n (document position, score) pairs for the query."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                norm = K1 * (1 - B + B * self.doc_lengths[i] / self.avg_length)
+                scores[i] += idf * tf * (K1 + 1) / (tf + norm)
+        return heapq.nlargest(top_n, scores.items(), key=lambda item: item[1])
@@ -0,0 +1,236 @@
+import os
+import re
+import time
+import argparse
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Sequence
+import numpy as np
+import pandas as pd
+from pymongo import MongoClient
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Used when a course duration is missing or cannot be parsed
+DEFAULT_DURATION_MONTHS = 3.0
+RESOURCE_COLUMNS = ['cpus', 'ram', 'storage']
+
+# Group-by names accepted by capacity_totals / aggregate_totals
+GROUP_FIELDS = {
+    'course': 'course_name',
+    'organization': 'organization',
+    'org_type': 'org_type',
+    'developer': 'developer',
+    'window': 'window',
+}
+WINDOW_FORMATS = {'day': '%Y-%m-%d', 'month': '%Y-%m', 'year': '%Y'}
+WINDOW_PERIODS = {'day': 'D', 'month': 'M', 'year': 'Y'}
+
+DURATION_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(day|week|month|year)', re.IGNORECASE)
+MONTHS_PER_UNIT = {'day': 1 / 30, 'week': 7 / 30, 'month': 1.0, 'year': 12.0}
+
+VM_COLUMNS = [
+    'submission_id', 'submitted_at', 'organization', 'org_type', 'course_name', 'developer',
+    'course_duration', 'num_labs', 'lab_index', 'lab_name', 'persistence', 'vm_index',
+    'os', 'role', 'cpus', 'ram', 'storage'
+]
+
+def get_database():
+    client = MongoClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017/"), serverSelectionTimeoutMS=5000)
+    return client["lab_survey"]
+
+def parse_duration_months(durations: pd.Series) -> pd.Series:
+    """Course durations ("12 months", "Custom: 6 weeks") as a number of months."""
+    parts = durations.fillna('').astype(str).str.extract(DURATION_RE)
+    amount = pd.to_numeric(parts[0], errors='coerce')
+    factor = parts[1].str.lower().map(MONTHS_PER_UNIT)
+    return (amount * factor).fillna(DEFAULT_DURATION_MONTHS)
+
+def is_persistent(persistence: pd.Series) -> pd.Series:
+    # "Non-Persistent (...)" also contains the word, so match the prefix
+    return persistence.fillna('').astype(str).str.startswith('Persistent')
+
+def flatten_submissions(submissions: List[Dict[str, Any]]) -> pd.DataFrame:
+    """One row per VM across all submissions, with its course and contact context."""
+    rows = []
+    for submission in submissions:
+        contact = submission.get('contact_info') or {}
+        course = submission.get('course_info') or {}
+        base = (
+            submission.get('_id'), submission.get('submitted_at'),
+            contact.get('organization'), contact.get('org_type'),
+            course.get('course_name'), course.get('developer'),
+            course.get('course_duration'), course.get('num_labs')
+        )
+        for lab_index, lab in enumerate(course.get('labs') or []):
+            for vm_index, vm in enumerate(lab.get('vms') or []):
+                rows.append(base + (
+                    lab_index, lab.get('lab_name'), lab.get('persistence'), vm_index,
+                    vm.get('os'), vm.get('role'), vm.get('cpus'), vm.get('ram'), sum(vm.get('drives') or [])
+                ))
+    return prepare_vm_table(pd.DataFrame(rows, columns=VM_COLUMNS))
+
+def prepare_vm_table(vms: pd.DataFrame) -> pd.DataFrame:
+    """Normalize types on a VM table from either the Python or the MongoDB path."""
+    vms = vms.reindex(columns=VM_COLUMNS)
+    for column in RESOURCE_COLUMNS + ['num_labs', 'lab_index', 'vm_index']:
+        vms[column] = pd.to_numeric(vms[column], errors='coerce').fillna(0)
+    vms['submitted_at'] = pd.to_datetime(vms['submitted_at'])
+    vms['persistent'] = is_persistent(vms['persistence'])
+    vms['duration_months'] = parse_duration_months(vms['course_duration'])
+    return vms
+
+def window_labels(dates: pd.Series, window: str) -> pd.Series:
+    """Window labels matching WINDOW_FORMATS; only the distinct periods are formatted."""
+    periods = pd.Categorical(dates.dt.to_period(WINDOW_PERIODS[window]))
+    labels = np.asarray(periods.categories.astype(str), dtype=object)
+    return pd.Series(np.where(periods.codes >= 0, labels[periods.codes] if len(labels) else None, None), index=dates.index)
+
+def capacity_totals(vms: pd.DataFrame, by: Sequence[str] = ('course',), window: str = 'month') -> pd.DataFrame:
+    """Total vCPU, RAM (GB) and storage (GB) requested, grouped by the given dimensions."""
+    columns = [GROUP_FIELDS[name] for name in by]
+    if 'window' in by:
+        vms = vms.assign(window=window_labels(vms['submitted_at'], window))
+    grouped = vms.groupby(columns, dropna=False)
+    totals = grouped[RESOURCE_COLUMNS].sum()
+    totals['vms'] = grouped.size()
+    totals['submissions'] = grouped['submission_id'].nunique()
+    return totals.reset_index().sort_values(RESOURCE_COLUMNS, ascending=False, ignore_index=True)
+
+def project_demand(vms: pd.DataFrame) -> pd.DataFrame:
+    """Project concurrent demand per month.
+
+    Each course starts when it was submitted and runs for its duration, with
+    its labs taken in order over equal slices of that time (``num_labs`` slices).
+    A non-persistent lab only holds resources during its slice; a persistent lab
+    keeps its VMs from the start of its slice until the course ends.
+    """
+    if vms.empty:
+        return pd.DataFrame(columns=['month'] + RESOURCE_COLUMNS + ['vms'])
+    labs = vms['num_labs'].where(vms['num_labs'] > 0, vms['lab_index'] + 1)
+    slice_months = vms['duration_months'] / labs
+    start = vms['submitted_at'].dt.year * 12 + vms['submitted_at'].dt.month - 1
+    first = start + np.floor(vms['lab_index'] * slice_months)
+    end = np.where(vms['persistent'], start + vms['duration_months'], start + (vms['lab_index'] + 1) * slice_months)
+    last = np.maximum(np.ceil(end) - 1, first).astype(int)
+    first = first.astype(int)
+
+    # Expand every VM into one row per month it is active
+    spans = (last - first + 1).to_numpy()
+    positions = np.repeat(np.arange(len(vms)), spans)
+    offsets = np.arange(spans.sum()) - np.repeat(np.cumsum(spans) - spans, spans)
+    months = first.to_numpy()[positions] + offsets
+    active = pd.DataFrame({column: vms[column].to_numpy()[positions] for column in RESOURCE_COLUMNS})
+    active['month'] = months
+
+    demand = active.groupby('month')[RESOURCE_COLUMNS].sum()
+    demand['vms'] = active.groupby('month').size()
+    demand.index = [f"{m // 12:04d}-{m % 12 + 1:02d}" for m in demand.index]
+    return demand.rename_axis('month').reset_index()
+
+# MongoDB path
+
+def vm_pipeline(match: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Flatten responses into VM rows server-side, projecting only what planning needs."""
+    return [
+        {"$match": match or {}},
+        {"$project": {
+            "submitted_at": 1,
+            "organization": "$contact_info.organization",
+            "org_type": "$contact_info.org_type",
+            "course_name": "$course_info.course_name",
+            "developer": "$course_info.developer",
+            "course_duration": "$course_info.course_duration",
+            "num_labs": "$course_info.num_labs",
+            "labs": "$course_info.labs"
+        }},
+        {"$unwind": {"path": "$labs", "includeArrayIndex": "lab_index"}},
+        {"$unwind": {"path": "$labs.vms", "includeArrayIndex": "vm_index"}},
+        {"$project": {
+            "_id": 0,
+            "submission_id": "$_id",
+            "submitted_at": 1, "organization": 1, "org_type": 1, "course_name": 1, "developer": 1,
+            "course_duration": 1, "num_labs": 1, "lab_index": 1, "vm_index": 1,
+            "lab_name": "$labs.lab_name",
+            "persistence": "$labs.persistence",
+            "os": "$labs.vms.os",
+            "role": "$labs.vms.role",
+            "cpus": "$labs.vms.cpus",
+            "ram": "$labs.vms.ram",
+            "storage": {"$sum": "$labs.vms.drives"}
+        }}
+    ]
+
+def load_vm_table(db, since: Optional[datetime] = None) -> pd.DataFrame:
+    match = {"submitted_at": {"$gte": since}} if since else {}
+    return prepare_vm_table(pd.DataFrame(list(db.responses.aggregate(vm_pipeline(match)))))
+
+def aggregate_totals(db, by: Sequence[str] = ('course',), window: str = 'month',
+                     since: Optional[datetime] = None) -> pd.DataFrame:
+    """capacity_totals computed by MongoDB; only the grouped rows leave the server."""
+    match = {"submitted_at": {"$gte": since}} if since else {}
+    pipeline = vm_pipeline(match)
+    group_id = {}
+    for name in by:
+        if name == 'window':
+            group_id['window'] = {"$dateToString": {"format": WINDOW_FORMATS[window], "date": "$submitted_at"}}
+        else:
+            group_id[GROUP_FIELDS[name]] = f"${GROUP_FIELDS[name]}"
+    pipeline += [
+        {"$group": {
+            "_id": group_id,
+            "cpus": {"$sum": "$cpus"},
+            "ram": {"$sum": "$ram"},
+            "storage": {"$sum": "$storage"},
+            "vms": {"$sum": 1},
+            "submission_ids": {"$addToSet": "$submission_id"}
+        }},
+        {"$project": {
+            "_id": 0, "group": "$_id", "cpus": 1, "ram": 1, "storage": 1, "vms": 1,
+            "submissions": {"$size": "$submission_ids"}
+        }},
+        {"$sort": {"cpus": -1, "ram": -1, "storage": -1}}
+    ]
+    rows = list(db.responses.aggregate(pipeline, allowDiskUse=True))
+    columns = [GROUP_FIELDS[name] for name in by]
+    if not rows:
+        return pd.DataFrame(columns=columns + RESOURCE_COLUMNS + ['vms', 'submissions'])
+    totals = pd.DataFrame([{**row.pop('group'), **row} for row in rows])
+    return totals[columns + RESOURCE_COLUMNS + ['vms', 'submissions']]
+
+def main():
+    parser = argparse.ArgumentParser(description="Capacity planning over lab survey submissions")
+    parser.add_argument('--by', default='course', help="Comma-separated: course, organization, org_type, developer, window")
+    parser.add_argument('--window', default='month', choices=sorted(WINDOW_FORMATS))
+    parser.add_argument('--since', type=datetime.fromisoformat, help="Only submissions from this date (YYYY-MM-DD)")
+    parser.add_argument('--local', action='store_true', help="Aggregate in pandas instead of MongoDB")
+    parser.add_argument('--no-projection', action='store_true', help="Skip the monthly demand projection")
+    args = parser.parse_args()
+
+    by = [name.strip() for name in args.by.split(',') if name.strip()]
+    unknown = [name for name in by if name not in GROUP_FIELDS]
+    if unknown:
+        parser.error(f"Unknown group-by fields: {', '.join(unknown)}")
+
+    db = get_database()
+    started = time.perf_counter()
+    # Only the pandas totals and the projection need every VM row client-side
+    vms = load_vm_table(db, args.since) if args.local or not args.no_projection else None
+    if args.local:
+        totals = capacity_totals(vms, by, args.window)
+    else:
+        totals = aggregate_totals(db, by, args.window, args.since)
+    demand = project_demand(vms) if not args.no_projection else None
+    elapsed = (time.perf_counter() - started) * 1000
+
+    pd.set_option('display.width', 160)
+    print(f"📊 Capacity totals by {', '.join(by)} ({int(totals['vms'].sum())} VMs)\n")
+    print(totals.to_string(index=False) if not totals.empty else "No submissions found.")
+    if demand is not None:
+        print("\n📈 Projected concurrent demand per month\n")
+        print(demand.to_string(index=False) if not demand.empty else "No demand to project.")
+    print(f"\nComputed in {elapsed:.0f} ms")
+
+if __name__ == "__main__":
+    main()
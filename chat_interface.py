@@ -2,6 +2,7 @@ import streamlit as st
 from pymongo import MongoClient
 from dotenv import load_dotenv
 import os
+from lab_analytics import load_lab_summary
 
 # Load environment variables
 load_dotenv()
@@ -56,10 +57,17 @@ def get_questionnaire_questions(db):
 
 def get_labs_count(db):
     """Get total number of labs"""
+    # The precomputed summary is a single _id lookup; fall back to counting
+    summary = load_lab_summary(db)
+    if summary and "labs_count" in summary:
+        return summary["labs_count"]
     return db.labs.count_documents({})
 
 def get_categories(db):
     """Get all unique categories"""
+    summary = load_lab_summary(db)
+    if summary and summary.get("category_counts"):
+        return list(summary["category_counts"])
     return db.labs.distinct("categories")
 
 def search_labs(db, query: str, limit: int = 5):
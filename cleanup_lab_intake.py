@@ -2,6 +2,7 @@ import os
 import json
 from openai import OpenAI
 from dotenv import load_dotenv
+from deployment_registry import load_registry, DEFAULT_DEPLOYMENT
 
 # Load environment variables
 load_dotenv()
@@ -106,23 +107,39 @@ class LabIntakeCleanup:
             return False
     
     def update_assistant_files(self, keep_file_ids):
-        """Update the assistant with the cleaned file set."""
+        """Create an assistant for the cleaned file set and make it the active version."""
         try:
-            # In the current API, we need to create a new assistant with the correct files
-            # and delete the old one
+            keep_file_ids = list(keep_file_ids)
+            registry = load_registry()
+            # Reuses the existing vector store when the kept files are unchanged
+            store = registry.ensure_vector_store(self.client, keep_file_ids, "Lab Intake Documents")
             new_assistant = self.client.beta.assistants.create(
                 name=f"{self.assistant.name} (Cleaned)",
                 instructions=self.assistant.instructions,
                 tools=[{"type": "file_search"}],
-                model="gpt-4-1106-preview",
-                file_ids=list(keep_file_ids)
+                tool_resources={
+                    "file_search": {
+                        "vector_store_ids": [store['vector_store_id']]
+                    }
+                },
+                model=self.assistant.model
             )
-            
-            # Delete the old assistant
-            self.client.beta.assistants.delete(self.assistant_id)
+            version = registry.deploy(DEFAULT_DEPLOYMENT, new_assistant.id, store['vector_store_id'],
+                                      store['fingerprint'], file_ids=keep_file_ids, source='cleanup_lab_intake')
             
             print(f"✅ Created new assistant: {new_assistant.id}")
-            print(f"✅ Deleted old assistant: {self.assistant_id}")
+            print(f"✅ Activated {DEFAULT_DEPLOYMENT} {version}")
+            
+            # Keep the old assistant only if the registry can roll back to it
+            standby = registry.standby(DEFAULT_DEPLOYMENT)
+            if standby and standby['assistant_id'] == self.assistant_id:
+                print(f"ℹ️ Old assistant {self.assistant_id} kept as {standby['version']} for rollback "
+                      f"(python deployment_registry.py rollback {DEFAULT_DEPLOYMENT})")
+            elif not registry.references(self.assistant_id):
+                self.client.beta.assistants.delete(self.assistant_id)
+                print(f"✅ Deleted old assistant: {self.assistant_id}")
+            for resource_id in registry.release(self.client.beta.assistants.delete, self.client.beta.vector_stores.delete):
+                print(f"🧹 Deleted retired {resource_id}")
             
             return new_assistant.id
             
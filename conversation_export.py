@@ -0,0 +1,80 @@
+import json
+import tempfile
+from datetime import datetime
+from typing import List, Dict, Any, Iterator, BinaryIO, Optional
+
+try:
+    from docx import Document
+except ImportError:  # python-docx is optional; DOCX export is unavailable without it
+    Document = None
+
+TITLE = "Lab Intake Assistant"
+
+def iter_txt(messages: List[Dict[str, Any]], exported_at: str) -> Iterator[str]:
+    """Yield a plain text transcript piece by piece"""
+    yield f"{TITLE}\n"
+    yield f"Conversation Export ({exported_at})\n\n"
+    for msg in messages:
+        label = "Question" if msg["role"] == "user" else "Answer"
+        yield f"{label}:\n{msg['content']}\n\n"
+
+def iter_markdown(messages: List[Dict[str, Any]], exported_at: str) -> Iterator[str]:
+    """Yield a Markdown transcript piece by piece"""
+    yield f"# {TITLE}\n\n"
+    yield f"_Conversation export ({exported_at})_\n\n"
+    for msg in messages:
+        label = "Question" if msg["role"] == "user" else "Answer"
+        yield f"### {label}\n\n{msg['content']}\n\n"
+
+def iter_jsonl(messages: List[Dict[str, Any]], exported_at: str) -> Iterator[str]:
+    """Yield one JSON object per message"""
+    for i, msg in enumerate(messages):
+        yield json.dumps({
+            "index": i,
+            "role": msg["role"],
+            "content": msg["content"],
+            "exported_at": exported_at
+        }, ensure_ascii=False) + "\n"
+
+def write_docx(messages: List[Dict[str, Any]], exported_at: str, out: BinaryIO) -> None:
+    """Write a Word document; python-docx builds the document before saving"""
+    document = Document()
+    document.add_heading(TITLE, level=1)
+    document.add_paragraph(f"Conversation Export ({exported_at})")
+    for msg in messages:
+        label = "Question" if msg["role"] == "user" else "Answer"
+        document.add_heading(label, level=3)
+        document.add_paragraph(msg["content"])
+    document.save(out)
+
+EXPORT_FORMATS = {
+    "TXT": {"extension": "txt", "mime": "text/plain", "writer": iter_txt},
+    "Markdown": {"extension": "md", "mime": "text/markdown", "writer": iter_markdown},
+    "JSONL": {"extension": "jsonl", "mime": "application/x-ndjson", "writer": iter_jsonl},
+}
+# Shown in the UI in place of the DOCX option when python-docx is missing
+DOCX_UNAVAILABLE = None if Document is not None else "DOCX export needs python-docx (pip install python-docx)."
+if Document is not None:
+    EXPORT_FORMATS["DOCX"] = {
+        "extension": "docx",
+        "mime": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        "writer": write_docx
+    }
+
+def export_conversation(messages: List[Dict[str, Any]], fmt: str, out: BinaryIO,
+                        exported_at: Optional[str] = None) -> None:
+    """Stream a transcript in the given format into a binary file object"""
+    exported_at = exported_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    writer = EXPORT_FORMATS[fmt]["writer"]
+    if writer is write_docx:
+        write_docx(messages, exported_at, out)
+        return
+    for piece in writer(messages, exported_at):
+        out.write(piece.encode("utf-8"))
+
+def export_to_tempfile(messages: List[Dict[str, Any]], fmt: str) -> str:
+    """Write the export to a temporary file and return its path"""
+    extension = EXPORT_FORMATS[fmt]["extension"]
+    with tempfile.NamedTemporaryFile(prefix="conversation_export_", suffix=f".{extension}", delete=False) as out:
+        export_conversation(messages, fmt, out)
+        return out.name
@@ -1,11 +1,27 @@
 import os
-import json
-import requests
+import time
 from dotenv import load_dotenv
+from rest_transport import RestTransport, TransportError, TimingRecorder
+from deployment_registry import load_registry, fingerprint_file_ids, DEFAULT_DEPLOYMENT
 
 # Load environment variables
 load_dotenv()
 
+VECTOR_STORE_TIMEOUT = 600
+
+def wait_for_vector_store(transport, vector_store_id, timeout=VECTOR_STORE_TIMEOUT):
+    """Poll the vector store until indexing finishes; returns its final state."""
+    deadline = time.monotonic() + timeout
+    delay = 0.5
+    while True:
+        vector_store = transport.get(f"vector_stores/{vector_store_id}")
+        if vector_store.get("status") != "in_progress":
+            return vector_store
+        if time.monotonic() + delay > deadline:
+            return vector_store
+        time.sleep(delay)
+        delay = min(delay * 1.6, 5.0)
+
 def create_assistant_with_files():
     """Create a new assistant with the specified files."""
     api_key = os.getenv('OPENAI_API_KEY')
@@ -34,32 +50,53 @@ def create_assistant_with_files():
     Provide detailed, accurate information based on the documentation.
     """
     
-    # Create the assistant
-    url = "https://api.openai.com/v1/assistants"
-    
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}",
-        "OpenAI-Beta": "assistants=v2"  # Use the latest API version
-    }
-    
-    # First create a vector store with the files
-    print("Creating vector store...")
-    vector_store = requests.post(
-        "https://api.openai.com/v1/vector_stores",
-        headers=headers,
-        json={
-            "name": "Lab Intake Documents",
-            "file_ids": file_ids
-        }
-    ).json()
-    
-    if "error" in vector_store:
-        print(f"Error creating vector store: {vector_store['error']['message']}")
-        return
+    # One pooled, retrying session for every call; OPENAI_BASE_URL can point it at a mock server
+    timings = TimingRecorder()
+    with RestTransport(api_key, hooks=[timings]) as transport:
+        try:
+            create_with_transport(transport, file_ids, instructions)
+        except TransportError as e:
+            print(f"❌ {e}")
+    print(f"\nHTTP timings: {timings.summary()}")
+
+def create_with_transport(transport, file_ids, instructions):
+    """Reuse or build the vector store, create the assistant and activate it."""
+    # Reuse the vector store already built from this file set, if it is still there
+    registry = load_registry()
+    fingerprint = fingerprint_file_ids(file_ids)
+    vector_store_id = registry.recorded_vector_store(fingerprint)
+    if vector_store_id:
+        try:
+            vector_store = transport.get(f"vector_stores/{vector_store_id}")
+        except TransportError:
+            vector_store = {}
+        if vector_store.get("status") == "completed" and not vector_store["file_counts"]["failed"]:
+            print(f"Reusing vector store: {vector_store_id}")
+        else:
+            registry.forget_vector_store(fingerprint)
+            vector_store_id = None
     
-    vector_store_id = vector_store["id"]
-    print(f"Created vector store: {vector_store_id}")
+    if not vector_store_id:
+        # First create a vector store with the files
+        print("Creating vector store...")
+        vector_store = transport.post(
+            "vector_stores",
+            json={
+                "name": "Lab Intake Documents",
+                "file_ids": file_ids
+            }
+        )
+        
+        vector_store_id = vector_store["id"]
+        print(f"Created vector store: {vector_store_id}, waiting for indexing...")
+        
+        # Only point an assistant at the store once every file is searchable
+        vector_store = wait_for_vector_store(transport, vector_store_id)
+        if vector_store["status"] != "completed" or vector_store["file_counts"]["failed"]:
+            print(f"Error: vector store {vector_store_id} is not ready: {vector_store['file_counts']}")
+            transport.delete(f"vector_stores/{vector_store_id}")
+            return
+        registry.record_vector_store(fingerprint, vector_store_id, file_ids, "Lab Intake Documents")
     
     # Now create the assistant with the vector store
     print("Creating assistant...")
@@ -75,29 +112,22 @@ def create_assistant_with_files():
         "model": "gpt-4-turbo-preview"
     }
     
-    response = requests.post(
-        url,
-        headers=headers,
-        json=assistant_data
-    )
+    assistant = transport.post("assistants", json=assistant_data)
+    print(f"✅ Assistant created successfully!")
+    print(f"Assistant ID: {assistant['id']}")
+    print(f"Vector Store ID: {vector_store_id}")
     
-    if response.status_code == 200:
-        assistant = response.json()
-        print(f"✅ Assistant created successfully!")
-        print(f"Assistant ID: {assistant['id']}")
-        print(f"Vector Store ID: {vector_store_id}")
-        
-        # Save the IDs to a file
-        with open('assistant_info.json', 'w') as f:
-            json.dump({
-                'assistant_id': assistant['id'],
-                'vector_store_id': vector_store_id,
-                'file_ids': file_ids
-            }, f, indent=2)
-        
-        print("\n✅ Assistant information saved to 'assistant_info.json'")
-    else:
-        print(f"❌ Error creating assistant: {response.text}")
+    # Make it the active version; the previous one stays available for rollback
+    version = registry.deploy(DEFAULT_DEPLOYMENT, assistant['id'], vector_store_id, fingerprint,
+                              file_ids=file_ids, source='create_new_assistant')
+    
+    print(f"\n✅ Activated {DEFAULT_DEPLOYMENT} {version} in '{registry.path}'")
+    
+    # Versions that fell out of the registry take their assistants and stores with them
+    released = registry.release(lambda assistant_id: transport.delete(f"assistants/{assistant_id}"),
+                                lambda vs_id: transport.delete(f"vector_stores/{vs_id}"))
+    for resource_id in released:
+        print(f"🧹 Deleted retired {resource_id}")
 
 if __name__ == "__main__":
     print("=== Create New Lab Intake Assistant ===")
@@ -105,4 +135,4 @@ if __name__ == "__main__":
     
     print("\n=== NEXT STEPS ===")
     print("1. Test the new assistant in the OpenAI Playground")
-    print("2. Update any code that references the old assistant ID")
+    print("2. Roll back with 'python deployment_registry.py rollback lab_intake' if needed")
@@ -0,0 +1,279 @@
+import os
+import json
+import hashlib
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable
+from vector_store_builder import VectorStoreBuilder
+
+REGISTRY_FILE = Path("deployments.json")
+# Files written by the update scripts before the registry existed
+LEGACY_ASSISTANT_FILE = Path("assistant_info.json")
+LEGACY_IDS_FILE = Path("vector_store_ids.json")
+
+DEFAULT_DEPLOYMENT = "lab_intake"
+# Versions kept per deployment: the active one, the standby for rollback, and one older
+MAX_VERSIONS = 3
+
+def fingerprint_file_ids(file_ids: List[str]) -> str:
+    """OpenAI file contents never change under an id, so the id set identifies the content."""
+    return hashlib.sha256("\n".join(sorted(file_ids)).encode("utf-8")).hexdigest()
+
+def fingerprint_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class DeploymentRegistry:
+    """Named assistant / vector store versions with blue/green switching.
+
+    Each deployment keeps a few versions. ``stage`` records a new one without
+    serving it and ``activate`` flips the active pointer, with the previous
+    version kept as standby for ``rollback``. Vector stores are indexed by
+    content fingerprint so an unchanged file set reuses its existing store.
+    Every change rewrites the registry file with an atomic rename, so readers
+    such as app.py always see either the old or the new version.
+    """
+
+    def __init__(self, path: Path = REGISTRY_FILE):
+        self.path = Path(path)
+        self.data = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                return json.load(f)
+        return {"deployments": {}, "vector_stores": {}, "retired": []}
+
+    def save(self) -> None:
+        directory = self.path.parent if str(self.path.parent) else Path(".")
+        fd, tmp_path = tempfile.mkstemp(prefix=".deployments-", suffix=".json", dir=directory)
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    # Vector stores
+
+    def recorded_vector_store(self, fingerprint: str) -> Optional[str]:
+        record = self.data["vector_stores"].get(fingerprint)
+        return record["vector_store_id"] if record else None
+
+    def recorded_file_ids(self, fingerprint: str) -> List[str]:
+        record = self.data["vector_stores"].get(fingerprint)
+        return record["file_ids"] if record else []
+
+    def record_vector_store(self, fingerprint: str, vector_store_id: str, file_ids: List[str], name: str) -> None:
+        self.data["vector_stores"][fingerprint] = {
+            "vector_store_id": vector_store_id,
+            "file_ids": list(file_ids),
+            "name": name,
+            "created_at": datetime.utcnow().isoformat()
+        }
+        self.save()
+
+    def forget_vector_store(self, fingerprint: str) -> None:
+        if self.data["vector_stores"].pop(fingerprint, None):
+            self.save()
+
+    def find_vector_store(self, client, fingerprint: str) -> Optional[str]:
+        """A recorded, fully indexed store for this content, or None."""
+        vector_store_id = self.recorded_vector_store(fingerprint)
+        if not vector_store_id:
+            return None
+        try:
+            store = client.beta.vector_stores.retrieve(vector_store_id)
+        except Exception:
+            # Deleted or inaccessible
+            self.forget_vector_store(fingerprint)
+            return None
+        counts = store.file_counts
+        if store.status != "completed" or counts.in_progress or counts.failed:
+            return None
+        return store.id
+
+    def ensure_vector_store(self, client, file_ids: List[str], name: str,
+                            fingerprint: Optional[str] = None,
+                            builder: Optional[VectorStoreBuilder] = None) -> Dict[str, Any]:
+        """Reuse the store for this file set, or build one and wait until it is ready.
+
+        Returns {'vector_store_id', 'fingerprint', 'reused', 'build'}.
+        """
+        fingerprint = fingerprint or fingerprint_file_ids(file_ids)
+        existing = self.find_vector_store(client, fingerprint)
+        if existing:
+            return {"vector_store_id": existing, "fingerprint": fingerprint, "reused": True, "build": None}
+
+        builder = builder or VectorStoreBuilder(client)
+        result = builder.build(file_ids, name)
+        if not result.ready:
+            builder.discard(result.vector_store_id)
+            raise RuntimeError(f"Vector store build {result.status}: {result.failed_files or result.file_counts}")
+        self.record_vector_store(fingerprint, result.vector_store_id, file_ids, name)
+        return {"vector_store_id": result.vector_store_id, "fingerprint": fingerprint,
+                "reused": False, "build": result.as_dict()}
+
+    # Deployments
+
+    def _deployment(self, name: str) -> Dict[str, Any]:
+        return self.data["deployments"].setdefault(name, {"active": None, "previous": None, "versions": {}})
+
+    def stage(self, name: str, assistant_id: str, vector_store_id: str,
+              fingerprint: Optional[str] = None, **metadata: Any) -> str:
+        """Record a new version without serving it; returns its version key."""
+        deployment = self._deployment(name)
+        numbers = [int(v[1:]) for v in deployment["versions"]]
+        version = f"v{max(numbers, default=0) + 1}"
+        deployment["versions"][version] = {
+            "assistant_id": assistant_id,
+            "vector_store_id": vector_store_id,
+            "fingerprint": fingerprint,
+            "created_at": datetime.utcnow().isoformat(),
+            **metadata
+        }
+        self.data.setdefault("retired", []).extend(self._prune(deployment))
+        self.save()
+        return version
+
+    def activate(self, name: str, version: str) -> Dict[str, Any]:
+        deployment = self._deployment(name)
+        if version not in deployment["versions"]:
+            raise KeyError(f"Unknown version {version} for deployment {name}")
+        if deployment["active"] != version:
+            deployment["previous"], deployment["active"] = deployment["active"], version
+        self.save()
+        return deployment["versions"][version]
+
+    def deploy(self, name: str, assistant_id: str, vector_store_id: str,
+               fingerprint: Optional[str] = None, **metadata: Any) -> str:
+        """Stage and activate in one step."""
+        version = self.stage(name, assistant_id, vector_store_id, fingerprint, **metadata)
+        self.activate(name, version)
+        return version
+
+    def rollback(self, name: str) -> Dict[str, Any]:
+        deployment = self._deployment(name)
+        if not deployment["previous"]:
+            raise ValueError(f"Deployment {name} has no previous version to roll back to")
+        return self.activate(name, deployment["previous"])
+
+    def _version(self, name: str, key: str) -> Optional[Dict[str, Any]]:
+        deployment = self.data["deployments"].get(name)
+        if not deployment or not deployment[key]:
+            return None
+        return {"version": deployment[key], **deployment["versions"][deployment[key]]}
+
+    def active(self, name: str = DEFAULT_DEPLOYMENT) -> Optional[Dict[str, Any]]:
+        return self._version(name, "active")
+
+    def standby(self, name: str = DEFAULT_DEPLOYMENT) -> Optional[Dict[str, Any]]:
+        """The version ``rollback`` would activate, if any."""
+        return self._version(name, "previous")
+
+    def _prune(self, deployment: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Drop the oldest versions that are neither active nor standby; returns the dropped records."""
+        protected = {deployment["active"], deployment["previous"]}
+        ordered = sorted(deployment["versions"], key=lambda v: int(v[1:]))
+        return [deployment["versions"].pop(version) for version in ordered[:-MAX_VERSIONS] if version not in protected]
+
+    def _referenced(self) -> Dict[str, set]:
+        ids: Dict[str, set] = {"assistant_id": set(), "vector_store_id": set(), "file_id": set()}
+        for deployment in self.data["deployments"].values():
+            for record in deployment["versions"].values():
+                for key in ids:
+                    ids[key].add(record.get(key))
+        return ids
+
+    def references(self, resource_id: str) -> bool:
+        """Whether any kept version uses this assistant or vector store."""
+        return any(resource_id in ids for ids in self._referenced().values())
+
+    def release(self, delete_assistant: Callable[[str], Any], delete_vector_store: Callable[[str], Any],
+                delete_file: Optional[Callable[[str], Any]] = None) -> List[str]:
+        """Delete the assistants and vector stores of pruned versions that no kept version uses.
+
+        Pass ``client.beta.assistants.delete`` / ``client.beta.vector_stores.delete``
+        or equivalent REST calls, and ``delete_file`` for deployments whose
+        versions own an uploaded ``file_id``. Returns the deleted ids; resources
+        whose deletion fails stay listed for the next call.
+        """
+        referenced = self._referenced()
+        deleted, remaining = [], []
+        for record in self.data.get("retired", []):
+            failed = False
+            for key, delete in (("assistant_id", delete_assistant), ("vector_store_id", delete_vector_store),
+                                ("file_id", delete_file)):
+                resource_id = record.get(key)
+                if not resource_id or delete is None or resource_id in referenced[key] or resource_id in deleted:
+                    continue
+                try:
+                    delete(resource_id)
+                    deleted.append(resource_id)
+                except Exception as e:
+                    # Already gone counts as released; anything else is retried next time
+                    if getattr(e, "status_code", None) == 404 or getattr(e, "status", None) == 404:
+                        deleted.append(resource_id)
+                    else:
+                        print(f"⚠️  Could not delete {resource_id}: {str(e)}")
+                        failed = True
+            if failed:
+                remaining.append(record)
+        self.data["retired"] = remaining
+        self.data["vector_stores"] = {fp: record for fp, record in self.data["vector_stores"].items()
+                                      if record["vector_store_id"] not in deleted}
+        self.save()
+        return deleted
+
+    def migrate_legacy(self) -> bool:
+        """Import assistant_info.json / vector_store_ids.json into an empty registry."""
+        if self.data["deployments"]:
+            return False
+        migrated = False
+        if LEGACY_ASSISTANT_FILE.exists():
+            with open(LEGACY_ASSISTANT_FILE, "r") as f:
+                info = json.load(f)
+            file_ids = info.get("file_ids") or []
+            fingerprint = fingerprint_file_ids(file_ids) if file_ids else None
+            if fingerprint:
+                self.record_vector_store(fingerprint, info["vector_store_id"], file_ids, "Lab Intake Documents")
+            self.deploy(DEFAULT_DEPLOYMENT, info["assistant_id"], info["vector_store_id"], fingerprint,
+                        file_ids=file_ids, source=str(LEGACY_ASSISTANT_FILE))
+            migrated = True
+        if LEGACY_IDS_FILE.exists():
+            with open(LEGACY_IDS_FILE, "r") as f:
+                ids = json.load(f)
+            for name, record in ids.items():
+                if record.get("assistant_id") and record.get("vector_store_id"):
+                    self.deploy(name, record["assistant_id"], record["vector_store_id"], record.get("content_hash"),
+                                file_id=record.get("file_id"), source=str(LEGACY_IDS_FILE))
+                    migrated = True
+        return migrated
+
+def load_registry() -> DeploymentRegistry:
+    registry = DeploymentRegistry()
+    registry.migrate_legacy()
+    return registry
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect and switch assistant deployments")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list")
+    activate = sub.add_parser("activate")
+    activate.add_argument("name")
+    activate.add_argument("version")
+    rollback = sub.add_parser("rollback")
+    rollback.add_argument("name")
+    args = parser.parse_args()
+
+    registry = load_registry()
+    if args.command == "activate":
+        registry.activate(args.name, args.version)
+    elif args.command == "rollback":
+        registry.rollback(args.name)
+    for name, deployment in registry.data["deployments"].items():
+        print(f"{name}:")
+        for version, record in sorted(deployment["versions"].items(), key=lambda item: int(item[0][1:])):
+            marker = "active" if version == deployment["active"] else "standby" if version == deployment["previous"] else ""
+            print(f"  {version:<5} {record['assistant_id']}  {record['vector_store_id']}  {record['created_at'][:19]}  {marker}")
+
+if __name__ == "__main__":
+    main()
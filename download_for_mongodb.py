@@ -1,6 +1,10 @@
 import os
 import json
-from openai import OpenAI
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from openai import OpenAI, APIConnectionError, RateLimitError, InternalServerError
 from dotenv import load_dotenv
 from pathlib import Path
 from typing import List, Dict, Any, Optional
@@ -15,33 +19,118 @@ client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 MONGO_DB_FILES = Path("MONGO_DB_FILES")
 MONGO_DB_FILES.mkdir(exist_ok=True)
 
-def download_file(file_id: str, file_name: str) -> Optional[Path]:
-    """Download a file from OpenAI and save it to the MONGO_DB_FILES directory"""
+# Parallel download settings
+MAX_WORKERS = int(os.getenv("DOWNLOAD_WORKERS", "8"))
+CHUNK_SIZE = 1024 * 1024
+MAX_RETRIES = 4
+MANIFEST_PATH = MONGO_DB_FILES / ".download_manifest.json"
+
+# Errors worth retrying: network hiccups, rate limits and 5xx responses
+TRANSIENT_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+# Guards the manifest and the set of local filenames claimed by in-flight downloads
+_manifest_lock = threading.Lock()
+_reserved_paths: set = set()
+
+def load_manifest() -> Dict[str, Dict[str, Any]]:
+    """Load the file_id -> local copy manifest written by previous runs"""
     try:
-        # Get the file content
-        file_content = client.files.content(file_id)
-        
-        # Ensure the file has a proper extension
-        if not any(file_name.lower().endswith(ext) for ext in ['.txt', '.md', '.json', '.pdf', '.docx']):
-            file_name += '.txt'
-            
-        # Save the file
-        file_path = MONGO_DB_FILES / file_name
-        
-        # Ensure unique filename
-        counter = 1
-        original_name = file_path.stem
-        while file_path.exists():
+        return json.loads(MANIFEST_PATH.read_text(encoding='utf-8'))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_manifest(manifest: Dict[str, Dict[str, Any]]) -> None:
+    """Atomically write the download manifest"""
+    tmp_path = MANIFEST_PATH.with_suffix('.tmp')
+    tmp_path.write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+    os.replace(tmp_path, MANIFEST_PATH)
+
+def find_local_copy(manifest: Dict[str, Dict[str, Any]], file_id: str, expected_bytes: Optional[int]) -> Optional[Path]:
+    """Return the local path if this file id was already downloaded with the expected size"""
+    entry = manifest.get(file_id)
+    if not entry or expected_bytes is None:
+        return None
+    file_path = MONGO_DB_FILES / entry["path"]
+    if file_path.exists() and file_path.stat().st_size == expected_bytes == entry.get("bytes"):
+        return file_path
+    return None
+
+def reserve_path(file_name: str) -> Path:
+    """Pick a unique filename in MONGO_DB_FILES, safe to call from several threads"""
+    # Ensure the file has a proper extension
+    if not any(file_name.lower().endswith(ext) for ext in ['.txt', '.md', '.json', '.pdf', '.docx']):
+        file_name += '.txt'
+
+    file_path = MONGO_DB_FILES / file_name
+    counter = 1
+    original_name = file_path.stem
+    with _manifest_lock:
+        while file_path.exists() or file_path in _reserved_paths:
             file_path = MONGO_DB_FILES / f"{original_name}_{counter}{file_path.suffix}"
             counter += 1
-            
-        file_path.write_bytes(file_content.content)
+        _reserved_paths.add(file_path)
+    return file_path
+
+def stream_to_disk(file_id: str, file_path: Path) -> int:
+    """Stream a file body to disk in chunks, retrying transient failures with backoff"""
+    tmp_path = file_path.with_name(file_path.name + '.part')
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            written = 0
+            with client.with_streaming_response.files.content(file_id) as response:
+                with open(tmp_path, 'wb') as f:
+                    for chunk in response.iter_bytes(CHUNK_SIZE):
+                        f.write(chunk)
+                        written += len(chunk)
+            os.replace(tmp_path, file_path)
+            return written
+        except TRANSIENT_ERRORS as e:
+            tmp_path.unlink(missing_ok=True)
+            if attempt == MAX_RETRIES:
+                raise
+            delay = min(2 ** attempt, 30) * (0.5 + random.random() / 2)
+            print(f"Retrying {file_id} in {delay:.1f}s (attempt {attempt}/{MAX_RETRIES}): {str(e)}")
+            time.sleep(delay)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+def download_file(file_id: str, file_name: str, manifest: Optional[Dict[str, Dict[str, Any]]] = None,
+                  expected_bytes: Optional[int] = None) -> Optional[Path]:
+    """Download a file from OpenAI and save it to the MONGO_DB_FILES directory.
+
+    Files already mirrored with a matching id and size are skipped.
+    """
+    if manifest is None:
+        manifest = {}
+    try:
+        existing = find_local_copy(manifest, file_id, expected_bytes)
+        if existing:
+            print(f"Skipped (up to date): {file_name} -> {existing}")
+            return existing
+
+        file_path = reserve_path(file_name)
+        try:
+            size = stream_to_disk(file_id, file_path)
+        finally:
+            with _manifest_lock:
+                _reserved_paths.discard(file_path)
+
+        with _manifest_lock:
+            manifest[file_id] = {"path": file_path.name, "bytes": size}
         print(f"Downloaded: {file_name} -> {file_path}")
         return file_path
     except Exception as e:
         print(f"Error downloading file {file_id}: {str(e)}")
         return None
 
+def process_file(file_info: Any, manifest: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Download one assistant file and build its MongoDB document"""
+    saved_path = download_file(file_info.id, file_info.filename, manifest, getattr(file_info, 'bytes', None))
+    if not saved_path:
+        return {}
+    return create_mongodb_document(Path(saved_path), file_info)
+
 def create_mongodb_document(file_path: Path, file_info: Any) -> Dict[str, Any]:
     """Create a MongoDB document for the file"""
     try:
@@ -83,23 +172,27 @@ def main():
         assistant_files = [f for f in files.data if f.purpose in ['assistants', 'assistants_output']]
         print(f"Found {len(assistant_files)} files associated with the assistant")
         
-        # Download and process each file
+        # Download and process the files in parallel
+        manifest = load_manifest()
         documents = []
-        for file_info in assistant_files:
-            try:
-                print(f"\nProcessing: {file_info.filename} ({file_info.id})")
-                
-                # Download the file
-                saved_path = download_file(file_info.id, file_info.filename)
-                if saved_path:
-                    # Create MongoDB document
-                    doc = create_mongodb_document(Path(saved_path), file_info)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = {executor.submit(process_file, file_info, manifest): file_info for file_info in assistant_files}
+            for future in as_completed(futures):
+                file_info = futures[future]
+                try:
+                    doc = future.result()
                     if doc:  # Only add if document was created successfully
                         documents.append(doc)
-                        print(f"Added to MongoDB documents")
-            except Exception as e:
-                print(f"Error processing file {file_info.id}: {str(e)}")
-        
+                except Exception as e:
+                    print(f"Error processing file {file_info.id}: {str(e)}")
+        save_manifest(manifest)
+        print(f"\nMirrored {len(documents)} files in {time.perf_counter() - started:.1f}s using {MAX_WORKERS} workers")
+
+        # Keep document order stable regardless of completion order
+        order = {f.id: i for i, f in enumerate(assistant_files)}
+        documents.sort(key=lambda doc: order.get(doc["_id"], 0))
+
         if documents:
             # Create a timestamp for the output file
             from datetime import datetime
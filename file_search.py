@@ -0,0 +1,117 @@
+from typing import List, Dict, Any, Optional
+from run_waiter import create_and_wait, DEFAULT_TIMEOUT
+
+SEARCH_MODEL = "gpt-4-turbo-preview"
+SEARCH_INSTRUCTIONS = """Return ALL relevant search results from the documents. For each result:
+            1. Include the full text of the matching content
+            2. Separate each result with two newlines
+            3. Do not summarize or combine results
+            4. Include as many results as match the query
+            """
+
+NO_RESULTS = {
+    'id': 'no_results',
+    'filename': 'No Results',
+    'content': 'No relevant information found in the documents.',
+    'score': 0
+}
+
+def create_search_assistant(client, vector_store_id: str) -> str:
+    """Create an assistant with file search over the vector store and return its id"""
+    assistant = client.beta.assistants.create(
+        name="Comprehensive Document Searcher",
+        instructions=SEARCH_INSTRUCTIONS,
+        model=SEARCH_MODEL,
+        tools=[{"type": "file_search"}],
+        tool_resources={
+            "file_search": {
+                "vector_store_ids": [vector_store_id]
+            }
+        }
+    )
+    return assistant.id
+
+def parse_results(messages: Any, limit: int) -> List[Dict[str, Any]]:
+    """Split assistant replies into individual, de-duplicated results"""
+    results = []
+    for msg in messages.data:
+        if msg.role == "assistant":
+            for content in msg.content:
+                if content.type == "text":
+                    if hasattr(content, 'text') and hasattr(content.text, 'value'):
+                        # Split the response into individual results
+                        result_texts = content.text.value.split('\n\n')
+                        for i, text in enumerate(result_texts):
+                            if text.strip():
+                                results.append({
+                                    'id': f"{msg.id}_{i}",
+                                    'filename': f"Result {len(results) + 1}",
+                                    'content': text.strip(),
+                                    'score': 1.0 - (i * 0.01)  # Slight score variation for sorting
+                                })
+
+    # Return unique results by content to avoid duplicates
+    seen = set()
+    unique_results = []
+    for result in results:
+        if result['content'] not in seen:
+            seen.add(result['content'])
+            unique_results.append(result)
+
+    # Sort by score in descending order and limit results
+    unique_results.sort(key=lambda x: x['score'], reverse=True)
+    return unique_results[:limit] if unique_results else [dict(NO_RESULTS)]
+
+def search_documents(client, vector_store_id: str, query: str, limit: int = 5,
+                     assistant_id: Optional[str] = None,
+                     timeout: float = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+    """Run one file-search query against a vector store.
+
+    Pass ``assistant_id`` to reuse a search assistant across queries; otherwise a
+    temporary one is created and deleted. Returns the results together with the
+    run's token usage and polling statistics. Raises on failed runs.
+    """
+    owns_assistant = assistant_id is None
+    if owns_assistant:
+        assistant_id = create_search_assistant(client, vector_store_id)
+    thread = None
+    try:
+        # Create a thread with the vector store and the user's message
+        thread = client.beta.threads.create(
+            tool_resources={
+                "file_search": {
+                    "vector_store_ids": [vector_store_id]
+                }
+            },
+            messages=[{"role": "user", "content": query}]
+        )
+
+        # Create the run and wait for it with adaptive backoff and a deadline
+        run_result = create_and_wait(
+            client,
+            thread.id,
+            assistant_id,
+            timeout=timeout,
+            max_completion_tokens=4000,
+            tool_choice={"type": "file_search"}
+        )
+        if not run_result.ok:
+            raise RuntimeError(f"Search run {run_result.status}: {run_result.error}")
+
+        # Get the messages in chronological order
+        messages = client.beta.threads.messages.list(thread_id=thread.id, order="asc")
+        usage = getattr(run_result.run, 'usage', None)
+        return {
+            'results': parse_results(messages, limit),
+            'usage': usage.model_dump() if usage is not None else None,
+            'run': run_result.as_dict()
+        }
+    finally:
+        # Clean up
+        try:
+            if owns_assistant:
+                client.beta.assistants.delete(assistant_id)
+            if thread is not None:
+                client.beta.threads.delete(thread.id)
+        except Exception:
+            pass
@@ -2,6 +2,7 @@ import pymongo
 from dotenv import load_dotenv
 import os
 from typing import List, Dict, Any
+from questionnaire_sync import sync_questions, print_sync_summary
 
 # Load environment variables
 load_dotenv()
@@ -426,12 +427,9 @@ def import_to_mongodb() -> bool:
         client = pymongo.MongoClient(connection_string)
         db = client.get_database("Product_Intake")
         
-        # Clear existing questions
-        db.aci_questionnaire.delete_many({})
-        
-        # Insert new questions
-        result = db.aci_questionnaire.insert_many(QUESTIONNAIRE)
-        print(f"✅ Successfully imported {len(result.inserted_ids)} questions")
+        # Apply only the changed questions
+        changes = sync_questions(db, "aci_questionnaire", QUESTIONNAIRE)
+        print_sync_summary(changes)
         
         # Verify
         count = db.aci_questionnaire.count_documents({})
@@ -4,6 +4,7 @@ from dotenv import load_dotenv
 import os
 from typing import List, Dict, Any
 from striprtf.striprtf import rtf_to_text
+from questionnaire_sync import sync_questions, print_sync_summary
 
 # Load environment variables
 load_dotenv()
@@ -85,9 +86,6 @@ def import_to_mongodb(questions: List[Dict[str, Any]]) -> bool:
         client = pymongo.MongoClient(connection_string)
         db = client.get_database("Product_Intake")
         
-        # Clear existing questions
-        db.aci_questionnaire.delete_many({})
-        
         # Insert new questions with options
         question_docs = []
         for q in questions:
@@ -105,10 +103,10 @@ def import_to_mongodb(questions: List[Dict[str, Any]]) -> bool:
         # Sort by question number before inserting
         question_docs.sort(key=lambda x: x['order'])
         
-        # Insert all questions
+        # Apply only the changed questions
         if question_docs:
-            result = db.aci_questionnaire.insert_many(question_docs)
-            print(f"✅ Successfully imported {len(result.inserted_ids)} questions")
+            changes = sync_questions(db, "aci_questionnaire", question_docs)
+            print_sync_summary(changes)
             
             # Verify
             count = db.aci_questionnaire.count_documents({})
@@ -0,0 +1,263 @@
+import os
+import re
+import sys
+import json
+import time
+import heapq
+import hashlib
+from collections import defaultdict
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from openai import OpenAI
+from dotenv import load_dotenv
+from bm25 import BM25Index
+
+# Load environment variables
+load_dotenv()
+
+# Constants
+DOCS_DIR = Path("Courses/INTAKE-DOCS")
+INDEX_DIR = Path(".cache/intake_index")
+EMBEDDING_MODEL = "text-embedding-3-small"
+MAX_CHUNK_CHARS = 1200
+EMBED_BATCH_SIZE = 100
+RRF_K = 60  # Reciprocal rank fusion constant
+
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*)$')
+def split_long_section(text: str, max_chars: int = MAX_CHUNK_CHARS) -> List[str]:
+    """Split a section on paragraph, then line boundaries so chunks stay under max_chars."""
+    if len(text) <= max_chars:
+        return [text]
+    pieces, current = [], ""
+    for block in re.split(r'\n\s*\n', text):
+        lines = [block] if len(block) <= max_chars else block.split('\n')
+        for line in lines:
+            if current and len(current) + len(line) + 2 > max_chars:
+                pieces.append(current)
+                current = ""
+            current = f"{current}\n\n{line}" if current else line
+    if current:
+        pieces.append(current)
+    return pieces
+
+def chunk_markdown(text: str, filename: str) -> List[Dict[str, Any]]:
+    """Split markdown into chunks that carry the heading path they sit under."""
+    chunks = []
+    headings: List[str] = []
+    body: List[str] = []
+
+    def flush():
+        section = "\n".join(body).strip()
+        if not section:
+            return
+        heading = " > ".join(headings)
+        for piece in split_long_section(section):
+            content = piece.strip()
+            chunks.append({
+                "id": f"{filename}#{len(chunks)}",
+                "filename": filename,
+                "heading": heading,
+                "content": content,
+                "hash": hashlib.sha256(f"{heading}\n{content}".encode("utf-8")).hexdigest()
+            })
+
+    for line in text.split('\n'):
+        match = HEADING_RE.match(line)
+        if match:
+            flush()
+            body = []
+            level = len(match.group(1))
+            headings = headings[:level - 1] + [match.group(2).strip('# ').strip()]
+        else:
+            body.append(line)
+    flush()
+    return chunks
+
+class IntakeRetriever:
+    """Hybrid BM25 + embedding retriever over the INTAKE-DOCS markdown.
+
+    The index lives in INDEX_DIR: chunk metadata in index.json and chunk
+    embeddings in embeddings.npy (memory-mapped on load). ``update()`` re-chunks
+    only files whose content hash changed and embeds only new chunks.
+    """
+
+    def __init__(self, docs_dir: Path = DOCS_DIR, index_dir: Path = INDEX_DIR,
+                 use_embeddings: Optional[bool] = None):
+        self.docs_dir = Path(docs_dir)
+        self.index_dir = Path(index_dir)
+        if use_embeddings is None:
+            use_embeddings = bool(os.getenv("OPENAI_API_KEY"))
+        self.use_embeddings = use_embeddings
+        self.client = OpenAI() if use_embeddings else None
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.chunks: List[Dict[str, Any]] = []
+        self.embeddings: Optional[np.ndarray] = None
+        self.embedding_keys: List[str] = []
+        self._load()
+        self._build_bm25()
+
+    # Persistence
+
+    def _load(self) -> None:
+        index_file = self.index_dir / "index.json"
+        if index_file.exists():
+            data = json.loads(index_file.read_text(encoding="utf-8"))
+            self.files = data.get("files", {})
+            self.chunks = [c for f in self.files.values() for c in f["chunks"]]
+        keys_file = self.index_dir / "embedding_keys.json"
+        matrix_file = self.index_dir / "embeddings.npy"
+        if self.use_embeddings and keys_file.exists() and matrix_file.exists():
+            self.embedding_keys = json.loads(keys_file.read_text(encoding="utf-8"))
+            self.embeddings = np.load(matrix_file, mmap_mode="r")
+
+    def _save(self) -> None:
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        index_file = self.index_dir / "index.json"
+        tmp_file = index_file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps({"files": self.files}), encoding="utf-8")
+        os.replace(tmp_file, index_file)
+
+    # Index maintenance
+
+    def update(self) -> Dict[str, int]:
+        """Bring the index in line with the docs directory; returns counts of what changed."""
+        stats = {"files_changed": 0, "files_removed": 0, "chunks_embedded": 0}
+        current = {p.name: p for p in sorted(self.docs_dir.glob("*.md"))}
+
+        for name in list(self.files):
+            if name not in current:
+                del self.files[name]
+                stats["files_removed"] += 1
+
+        for name, path in current.items():
+            stat = path.stat()
+            entry = self.files.get(name)
+            # Cheap mtime/size check first, content hash only when those differ
+            if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                continue
+            text = path.read_text(encoding="utf-8", errors="ignore")
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            if entry and entry["sha256"] == digest:
+                entry["mtime"], entry["size"] = stat.st_mtime, stat.st_size
+                continue
+            self.files[name] = {
+                "sha256": digest,
+                "mtime": stat.st_mtime,
+                "size": stat.st_size,
+                "chunks": chunk_markdown(text, name)
+            }
+            stats["files_changed"] += 1
+
+        self.chunks = [c for f in self.files.values() for c in f["chunks"]]
+        if self.use_embeddings:
+            stats["chunks_embedded"] = self._update_embeddings()
+        self._save()
+        self._build_bm25()
+        return stats
+
+    def _update_embeddings(self) -> int:
+        """Embed chunks whose hash has no stored vector, and drop vectors no chunk uses."""
+        existing = {}
+        if self.embeddings is not None:
+            existing = {key: i for i, key in enumerate(self.embedding_keys)}
+        wanted = list(dict.fromkeys(c["hash"] for c in self.chunks))
+        missing = [h for h in wanted if h not in existing]
+        if not missing and len(wanted) == len(existing):
+            return 0
+
+        text_by_hash = {c["hash"]: f"{c['heading']}\n{c['content']}" for c in self.chunks}
+        new_vectors = {}
+        for start in range(0, len(missing), EMBED_BATCH_SIZE):
+            batch = missing[start:start + EMBED_BATCH_SIZE]
+            response = self.client.embeddings.create(model=EMBEDDING_MODEL, input=[text_by_hash[h] for h in batch])
+            for key, item in zip(batch, response.data):
+                new_vectors[key] = item.embedding
+
+        rows = []
+        for key in wanted:
+            vector = np.asarray(new_vectors[key] if key in new_vectors else self.embeddings[existing[key]], dtype=np.float32)
+            rows.append(vector / (np.linalg.norm(vector) or 1.0))
+        matrix = np.vstack(rows) if rows else np.zeros((0, 0), dtype=np.float32)
+
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_dir / "embeddings.tmp.npy"
+        np.save(tmp_file, matrix)
+        self.embeddings = None  # release the old memory map before replacing the file
+        os.replace(tmp_file, self.index_dir / "embeddings.npy")
+        (self.index_dir / "embedding_keys.json").write_text(json.dumps(wanted), encoding="utf-8")
+        self.embedding_keys = wanted
+        self.embeddings = np.load(self.index_dir / "embeddings.npy", mmap_mode="r")
+        return len(missing)
+
+    def _build_bm25(self) -> None:
+        self.bm25 = BM25Index([f"{c['heading']} {c['content']}" for c in self.chunks])
+        # Maps embedding rows back to chunk positions
+        self.chunk_by_hash: Dict[str, int] = {}
+        for i, chunk in enumerate(self.chunks):
+            self.chunk_by_hash.setdefault(chunk["hash"], i)
+
+    # Retrieval
+
+    def bm25_rank(self, query: str, top_n: int) -> List[Tuple[int, float]]:
+        return self.bm25.rank(query, top_n)
+
+    def dense_rank(self, query: str, top_n: int) -> List[Tuple[int, float]]:
+        if self.embeddings is None or not len(self.embedding_keys):
+            return []
+        response = self.client.embeddings.create(model=EMBEDDING_MODEL, input=query)
+        q = np.asarray(response.data[0].embedding, dtype=np.float32)
+        q /= np.linalg.norm(q) or 1.0
+        sims = np.asarray(self.embeddings @ q)
+        top = np.argsort(-sims)[:top_n]
+        return [(self.chunk_by_hash[self.embedding_keys[r]], float(sims[r]))
+                for r in top if self.embedding_keys[r] in self.chunk_by_hash]
+
+    def search(self, query: str, limit: int = 5, candidates: int = 50) -> List[Dict[str, Any]]:
+        """Return the top chunks, fusing BM25 and dense rankings with reciprocal rank fusion.
+
+        Results have the same shape as vector_search.search_vector_store.
+        """
+        fused: Dict[int, float] = defaultdict(float)
+        for ranking in (self.bm25_rank(query, candidates), self.dense_rank(query, candidates)):
+            for rank, (i, _) in enumerate(ranking):
+                fused[i] += 1.0 / (RRF_K + rank + 1)
+
+        results = []
+        for i, score in heapq.nlargest(limit, fused.items(), key=lambda item: item[1]):
+            chunk = self.chunks[i]
+            results.append({
+                'id': chunk['id'],
+                'filename': f"{chunk['filename']} — {chunk['heading']}" if chunk['heading'] else chunk['filename'],
+                'content': chunk['content'],
+                'score': round(score, 6)
+            })
+        return results or [{
+            'id': 'no_results',
+            'filename': 'No Results',
+            'content': 'No relevant information found in the documents.',
+            'score': 0
+        }]
+
+def main():
+    query = " ".join(sys.argv[1:])
+    started = time.perf_counter()
+    retriever = IntakeRetriever()
+    stats = retriever.update()
+    print(f"📚 Index ready: {len(retriever.chunks)} chunks from {len(retriever.files)} files "
+          f"({stats['files_changed']} changed, {stats['chunks_embedded']} embedded) "
+          f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+    if not query:
+        print("Usage: python intake_retriever.py <query>")
+        return
+
+    started = time.perf_counter()
+    results = retriever.search(query)
+    print(f"🔍 {len(results)} results in {(time.perf_counter() - started) * 1000:.1f} ms\n")
+    for result in results:
+        print(f"[{result['score']:.4f}] {result['filename']}")
+        print(result['content'][:300])
+        print("-" * 50)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import re
+import json
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+import pandas as pd
+from pymongo import UpdateOne
+from analyze_lab_keywords import KEYWORD_CATEGORIES, STOP_WORDS, count_keywords
+
+try:
+    import pyarrow  # noqa: F401
+except ImportError:  # pyarrow is optional; only the Parquet snapshot needs it
+    pyarrow = None
+
+SNAPSHOT_DIR = Path(".cache/lab_analytics")
+SUMMARY_COLLECTION = "lab_analytics"
+SUMMARY_ID = "labs_summary"
+
+def row_key(item: Dict[str, Any]) -> str:
+    """Stable identity for one export row."""
+    return hashlib.sha1(json.dumps(item, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def file_fingerprint(path: Path) -> str:
+    stat = Path(path).stat()
+    return f"{Path(path).resolve()}|{stat.st_size}|{stat.st_mtime}"
+
+def assign_categories(titles: pd.Series) -> pd.Series:
+    """First matching keyword category per title, like categorize_labs_by_keywords."""
+    lowered = titles.str.lower()
+    categories = pd.Series('other', index=titles.index)
+    unassigned = pd.Series(True, index=titles.index)
+    for category, keywords in KEYWORD_CATEGORIES.items():
+        pattern = "|".join(re.escape(k.lower()) for k in keywords)
+        hit = unassigned & lowered.str.contains(pattern, regex=True)
+        categories[hit] = category
+        unassigned &= ~hit
+    return categories
+
+class LabAnalyticsSnapshot:
+    """Content-type counts, keyword categories and keyword frequencies for a content
+    export, materialized as Parquet files and refreshed incrementally.
+
+    Rows already in the snapshot are recognised by a hash of their contents, so a
+    refresh only aggregates the new rows and adds them to the stored totals. If
+    rows disappear from the export the snapshot is rebuilt from scratch.
+    """
+
+    def __init__(self, snapshot_dir: Path = SNAPSHOT_DIR):
+        if pyarrow is None:
+            raise ImportError("pyarrow is required for LabAnalyticsSnapshot")
+        self.snapshot_dir = Path(snapshot_dir)
+        self.meta_path = self.snapshot_dir / "meta.json"
+        self.meta: Dict[str, Any] = json.loads(self.meta_path.read_text()) if self.meta_path.exists() else {}
+        self._tables: Dict[str, pd.DataFrame] = {}
+
+    def _path(self, name: str) -> Path:
+        return self.snapshot_dir / f"{name}.parquet"
+
+    def table(self, name: str) -> pd.DataFrame:
+        if name not in self._tables:
+            path = self._path(name)
+            self._tables[name] = pd.read_parquet(path) if path.exists() else pd.DataFrame()
+        return self._tables[name]
+
+    def _write(self, name: str, df: pd.DataFrame) -> None:
+        df.to_parquet(self._path(name), index=False)
+        self._tables[name] = df
+
+    def refresh_from_export(self, export_path: str) -> Dict[str, Any]:
+        """Refresh from a JSON export; an unchanged file is not even read."""
+        fingerprint = file_fingerprint(Path(export_path))
+        if self.meta.get("export_fingerprint") == fingerprint:
+            return {"new_rows": 0, "rebuilt": False, "unchanged": True}
+        with open(export_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        stats = self.refresh(data)
+        self.meta["export_fingerprint"] = fingerprint
+        self._save_meta()
+        return stats
+
+    def refresh(self, data: List[dict]) -> Dict[str, Any]:
+        """Add rows not yet in the snapshot to the stored aggregates."""
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        # Identical rows stay distinct through an occurrence suffix
+        seen: Dict[str, int] = {}
+        keys = []
+        for item in data:
+            key = row_key(item)
+            seen[key] = seen.get(key, 0) + 1
+            keys.append(f"{key}#{seen[key]}")
+        incoming = pd.DataFrame({
+            'row_key': keys,
+            'title': [str(item.get('Title') or '') for item in data],
+            'content_type': [item.get('Content type', 'N/A') for item in data],
+        })
+        existing = self.table('rows')
+        rebuilt = existing.empty or not existing['row_key'].isin(incoming['row_key']).all()
+        if rebuilt:
+            existing = pd.DataFrame(columns=['row_key', 'title', 'content_type', 'category'])
+            for name in ('type_counts', 'category_counts', 'keyword_counts'):
+                self._tables[name] = pd.DataFrame()
+
+        new_rows = incoming[~incoming['row_key'].isin(existing['row_key'])].copy()
+        new_rows['category'] = assign_categories(new_rows['title'])
+        new_keys = set(new_rows['row_key'])
+        new_items = [item for item, key in zip(data, keys) if key in new_keys]
+
+        type_counts = new_rows['content_type'].value_counts().rename_axis('content_type').reset_index(name='count')
+        category_counts = new_rows['category'].value_counts().rename_axis('category').reset_index(name='count')
+        keyword_counts = count_keywords(new_items).reset_index(name='count')
+
+        self._write('rows', pd.concat([existing, new_rows], ignore_index=True) if len(existing) else new_rows.reset_index(drop=True))
+        self._write('type_counts', self._add_counts('type_counts', type_counts, ['content_type']))
+        self._write('category_counts', self._add_counts('category_counts', category_counts, ['category']))
+        self._write('keyword_counts', self._add_counts('keyword_counts', keyword_counts, ['content_type', 'keyword']))
+
+        self.meta.update({"rows": len(existing) + len(new_rows), "updated_at": datetime.utcnow().isoformat()})
+        self._save_meta()
+        return {"new_rows": len(new_rows), "rebuilt": rebuilt, "unchanged": False}
+
+    def _add_counts(self, name: str, delta: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+        current = self.table(name)
+        if current.empty:
+            combined = delta
+        else:
+            combined = pd.concat([current, delta]).groupby(keys, as_index=False)['count'].sum()
+        return combined.sort_values('count', ascending=False, kind='stable').reset_index(drop=True)
+
+    def _save_meta(self) -> None:
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        self.meta_path.write_text(json.dumps(self.meta, indent=2))
+
+    # Read side: precomputed results
+
+    def type_counts(self) -> List[tuple]:
+        df = self.table('type_counts')
+        return list(zip(df['content_type'], df['count'].astype(int))) if not df.empty else []
+
+    def category_counts(self) -> Dict[str, int]:
+        df = self.table('category_counts')
+        return dict(zip(df['category'], df['count'].astype(int))) if not df.empty else {}
+
+    def keyword_counts(self) -> pd.Series:
+        """Counts indexed by (content type, keyword), as returned by count_keywords."""
+        df = self.table('keyword_counts')
+        if df.empty:
+            return pd.Series(dtype='int64')
+        return df.set_index(['content_type', 'keyword'])['count']
+
+    def labs_in_category(self, category: str) -> pd.DataFrame:
+        rows = self.table('rows')
+        return rows[rows['category'] == category] if not rows.empty else rows
+
+def materialize_lab_summary(db, full: bool = False) -> Dict[str, Any]:
+    """Aggregate db.labs into one summary document with a MongoDB pipeline.
+
+    Only labs imported after the stored high-water mark are aggregated and their
+    counts are added with $inc; ``full=True`` recomputes everything.
+    """
+    summary = db[SUMMARY_COLLECTION]
+    current = summary.find_one({"_id": SUMMARY_ID}) or {}
+    match: Dict[str, Any] = {}
+    if not full and current.get("high_water_mark"):
+        match = {"imported_at": {"$gt": current["high_water_mark"]}}
+    else:
+        summary.delete_one({"_id": SUMMARY_ID})
+
+    pipeline = [
+        {"$match": match},
+        {"$facet": {
+            "total": [{"$count": "n"}],
+            "high_water_mark": [{"$group": {"_id": None, "max": {"$max": "$imported_at"}}}],
+            "types": [{"$group": {"_id": "$content_type", "count": {"$sum": 1}}}],
+            "categories": [
+                {"$unwind": "$categories"},
+                {"$group": {"_id": "$categories", "count": {"$sum": 1}}}
+            ],
+            "keywords": [
+                {"$project": {"content_type": 1, "words": {"$regexFindAll": {"input": {"$toLower": "$title"}, "regex": r"[\w-]+"}}}},
+                {"$unwind": "$words"},
+                {"$project": {"content_type": 1, "word": "$words.match"}},
+                {"$match": {"word": {"$nin": sorted(STOP_WORDS)}, "$expr": {"$gte": [{"$strLenCP": "$word"}, 4]}}},
+                {"$group": {"_id": {"type": "$content_type", "word": "$word"}, "count": {"$sum": 1}}}
+            ]
+        }}
+    ]
+    result = next(db.labs.aggregate(pipeline, allowDiskUse=True))
+    new_labs = result["total"][0]["n"] if result["total"] else 0
+    if not new_labs:
+        return {"new_labs": 0}
+
+    increments: Dict[str, int] = {"labs_count": new_labs}
+    for row in result["types"]:
+        increments[f"type_counts.{encode_key(row['_id'])}"] = row["count"]
+    for row in result["categories"]:
+        increments[f"category_counts.{encode_key(row['_id'])}"] = row["count"]
+    for row in result["keywords"]:
+        increments[f"keyword_counts.{encode_key(row['_id'].get('type'))}.{encode_key(row['_id']['word'])}"] = row["count"]
+
+    summary.bulk_write([UpdateOne(
+        {"_id": SUMMARY_ID},
+        {
+            "$inc": increments,
+            "$set": {"updated_at": datetime.utcnow()},
+            "$max": {"high_water_mark": result["high_water_mark"][0]["max"]}
+        },
+        upsert=True
+    )])
+    return {"new_labs": new_labs}
+
+def encode_key(value: Any) -> str:
+    """Field names cannot contain '.' or start with '$'."""
+    return str(value if value is not None else "unknown").replace(".", "．").replace("$", "＄")
+
+def decode_key(value: str) -> str:
+    return value.replace("．", ".").replace("＄", "$")
+
+def load_lab_summary(db) -> Optional[Dict[str, Any]]:
+    """Read the materialized summary (a single _id lookup), or None if never built."""
+    doc = db[SUMMARY_COLLECTION].find_one({"_id": SUMMARY_ID})
+    if not doc:
+        return None
+    for field in ("type_counts", "category_counts"):
+        doc[field] = {decode_key(k): v for k, v in doc.get(field, {}).items()}
+    # keyword_counts is nested: content type, then word
+    doc["keyword_counts"] = {
+        decode_key(content_type): {decode_key(word): n for word, n in words.items()}
+        for content_type, words in doc.get("keyword_counts", {}).items()
+    }
+    return doc
+
+def main():
+    import os
+    import sys
+    from pymongo import MongoClient
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    if len(sys.argv) > 1:
+        snapshot = LabAnalyticsSnapshot()
+        stats = snapshot.refresh_from_export(sys.argv[1])
+        print(f"✅ Snapshot refreshed: {stats}")
+        for content_type, count in snapshot.type_counts()[:10]:
+            print(f"- {content_type}: {count}")
+        return
+
+    db = MongoClient(os.getenv("MONGODB_URI")).get_database("Product_Intake")
+    stats = materialize_lab_summary(db, full="--full" in sys.argv)
+    print(f"✅ Lab summary materialized: {stats}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import os
+import json
+import math
+import hashlib
+import argparse
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Tuple
+import numpy as np
+from pymongo import MongoClient, UpdateOne
+from dotenv import load_dotenv
+from bm25 import tokenize
+
+# Load environment variables
+load_dotenv()
+
+INDEX_DIR = Path(".cache/lab_recommender")
+TOP_K = 5
+BATCH_SIZE = 500
+
+def catalog_text(lab: Dict[str, Any]) -> str:
+    categories = " ".join(lab.get("categories") or [])
+    return f"{lab.get('title', '')} {categories} {lab.get('content_type', '')}"
+
+def lab_query_text(lab: Dict[str, Any]) -> str:
+    """What a survey lab is about: its name, OSes, VM roles and network type."""
+    parts = [lab.get("lab_name", ""), lab.get("network_type", "")]
+    for vm in lab.get("vms", []):
+        parts.extend([vm.get("os", ""), vm.get("role", "")])
+    return " ".join(p for p in parts if p)
+
+def tfidf_weights(tokens: List[str], vocab: Dict[str, int], idf: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """L2-normalized sublinear TF-IDF weights for the tokens found in the vocabulary."""
+    counts = Counter(t for t in tokens if t in vocab)
+    if not counts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    cols = np.fromiter((vocab[t] for t in counts), dtype=np.int64, count=len(counts))
+    tf = np.fromiter((1.0 + math.log(c) for c in counts.values()), dtype=np.float32, count=len(counts))
+    weights = tf * idf[cols]
+    return cols, weights / (np.linalg.norm(weights) or 1.0)
+
+class LabCatalogIndex:
+    """Sparse TF-IDF index over the labs catalog.
+
+    The document-term matrix is stored column-wise (one posting list per term
+    as indptr/indices/data arrays), so scoring a batch only gathers the columns
+    for terms that occur in the queries and does a single dense product.
+    """
+
+    def __init__(self, labs: List[Dict[str, Any]], vocab: Dict[str, int], idf: np.ndarray,
+                 indptr: np.ndarray, indices: np.ndarray, data: np.ndarray):
+        self.labs = labs
+        self.vocab = vocab
+        self.idf = idf
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    @classmethod
+    def build(cls, labs: List[Dict[str, Any]]) -> "LabCatalogIndex":
+        docs = [tokenize(catalog_text(lab)) for lab in labs]
+        df = Counter(term for tokens in docs for term in set(tokens))
+        vocab = {term: i for i, term in enumerate(sorted(df))}
+        idf = np.array([math.log((1 + len(docs)) / (1 + df[term])) + 1.0 for term in sorted(df)], dtype=np.float32)
+
+        rows, cols, vals = [], [], []
+        for row, tokens in enumerate(docs):
+            doc_cols, weights = tfidf_weights(tokens, vocab, idf)
+            rows.append(np.full(len(doc_cols), row, dtype=np.int64))
+            cols.append(doc_cols)
+            vals.append(weights)
+        rows_arr = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        cols_arr = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64)
+        vals_arr = np.concatenate(vals) if vals else np.zeros(0, dtype=np.float32)
+        order = np.argsort(cols_arr, kind="stable")
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(cols_arr, minlength=len(vocab)))])
+        return cls(labs, vocab, idf, indptr, rows_arr[order], vals_arr[order])
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path.with_suffix(".npz"), idf=self.idf, indptr=self.indptr, indices=self.indices, data=self.data)
+        path.with_suffix(".json").write_text(json.dumps({"labs": self.labs, "vocab": self.vocab}), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "LabCatalogIndex":
+        meta = json.loads(path.with_suffix(".json").read_text(encoding="utf-8"))
+        arrays = np.load(path.with_suffix(".npz"))
+        return cls(meta["labs"], meta["vocab"], arrays["idf"], arrays["indptr"], arrays["indices"], arrays["data"])
+
+    def score(self, texts: List[str]) -> np.ndarray:
+        """Cosine similarity of every query text against every catalog lab."""
+        queries = [tfidf_weights(tokenize(text), self.vocab, self.idf) for text in texts]
+        terms = np.unique(np.concatenate([cols for cols, _ in queries])) if queries else np.zeros(0, dtype=np.int64)
+        if not len(terms) or not self.labs:
+            return np.zeros((len(texts), len(self.labs)), dtype=np.float32)
+        local = {term: i for i, term in enumerate(terms.tolist())}
+
+        q = np.zeros((len(texts), len(terms)), dtype=np.float32)
+        for row, (cols, weights) in enumerate(queries):
+            q[row, [local[c] for c in cols.tolist()]] = weights
+
+        # Gather only the posting lists of the query terms into a dense block
+        starts, ends = self.indptr[terms], self.indptr[terms + 1]
+        lengths = ends - starts
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        block = np.zeros((len(self.labs), len(terms)), dtype=np.float32)
+        block[self.indices[positions], np.repeat(np.arange(len(terms)), lengths)] = self.data[positions]
+        return q @ block.T
+
+    def top_matches(self, texts: List[str], k: int = TOP_K) -> List[List[Dict[str, Any]]]:
+        scores = self.score(texts)
+        k = min(k, scores.shape[1])
+        if not k:
+            return [[] for _ in texts]
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in enumerate(top):
+            ranked = candidates[np.argsort(-scores[row, candidates])]
+            results.append([
+                {**self.labs[i], "score": round(float(scores[row, i]), 4)}
+                for i in ranked if scores[row, i] > 0
+            ])
+        return results
+
+def catalog_fingerprint(db) -> str:
+    """Changes when labs are added or re-imported."""
+    newest = db.labs.find_one({}, {"imported_at": 1}, sort=[("imported_at", -1)]) or {}
+    key = f"{db.labs.estimated_document_count()}|{newest.get('imported_at')}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+def load_catalog_index(db, index_dir: Path = INDEX_DIR) -> LabCatalogIndex:
+    """Load the precomputed index for the current catalog, building it if needed."""
+    path = Path(index_dir) / catalog_fingerprint(db)
+    if path.with_suffix(".npz").exists() and path.with_suffix(".json").exists():
+        return LabCatalogIndex.load(path)
+    labs = [{
+        "lab_id": str(doc["_id"]),
+        "title": doc.get("title", "Untitled"),
+        "categories": doc.get("categories", []),
+        "content_type": doc.get("content_type", "")
+    } for doc in db.labs.find({}, {"title": 1, "categories": 1, "content_type": 1})]
+    index = LabCatalogIndex.build(labs)
+    index.save(path)
+    return index
+
+def recommend(index: LabCatalogIndex, submissions: List[Dict[str, Any]], k: int = TOP_K) -> List[Dict[str, Any]]:
+    """Top catalog matches for every lab of every submission, scored in one batch."""
+    texts, owners = [], []
+    for s, submission in enumerate(submissions):
+        for lab_index, lab in enumerate(submission.get("course_info", {}).get("labs", [])):
+            texts.append(lab_query_text(lab))
+            owners.append((s, lab_index, lab.get("lab_name", f"Lab {lab_index + 1}")))
+    matches = index.top_matches(texts, k)
+
+    docs = [{
+        "_id": submission["_id"],
+        "user_id": submission.get("contact_info", {}).get("email"),
+        "course_name": submission.get("course_info", {}).get("course_name"),
+        "labs": [],
+        "created_at": datetime.utcnow()
+    } for submission in submissions]
+    for (s, lab_index, lab_name), lab_matches in zip(owners, matches):
+        docs[s]["labs"].append({"lab_index": lab_index, "lab_name": lab_name, "matches": lab_matches})
+    return docs
+
+def store_recommendations(db, docs: List[Dict[str, Any]]) -> int:
+    if not docs:
+        return 0
+    result = db.recommendations.bulk_write(
+        [UpdateOne({"_id": doc["_id"]}, {"$set": doc}, upsert=True) for doc in docs], ordered=False
+    )
+    return result.upserted_count + result.modified_count
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the recommendations collection for survey submissions")
+    parser.add_argument('-k', '--top', type=int, default=TOP_K)
+    parser.add_argument('--all', action='store_true', help="Recompute submissions that already have recommendations")
+    args = parser.parse_args()
+
+    client = MongoClient(os.getenv("MONGODB_URI"))
+    catalog_db = client.get_database("Product_Intake")
+    survey_db = client["lab_survey"]
+    index = load_catalog_index(catalog_db)
+    print(f"✅ Catalog index ready: {len(index.labs)} labs, {len(index.vocab)} terms")
+
+    done = set() if args.all else set(catalog_db.recommendations.distinct("_id"))
+    batch, total = [], 0
+    for submission in survey_db.responses.find({}, {"contact_info.email": 1, "course_info.course_name": 1, "course_info.labs": 1}):
+        if submission["_id"] in done:
+            continue
+        batch.append(submission)
+        if len(batch) >= BATCH_SIZE:
+            total += store_recommendations(catalog_db, recommend(index, batch, args.top))
+            batch = []
+    total += store_recommendations(catalog_db, recommend(index, batch, args.top))
+    print(f"✅ Stored recommendations for {total} submissions")
+
+if __name__ == "__main__":
+    main()
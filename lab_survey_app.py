@@ -3,7 +3,13 @@ from pymongo import MongoClient
 from pymongo.server_api import ServerApi
 from datetime import datetime
 import os
+import copy
+import atexit
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from survey_drafts import DraftWriter, new_resume_token
+from survey_reporting import ensure_report_indexes
+from lab_recommender import catalog_fingerprint, load_catalog_index, recommend, store_recommendations
 
 # Set page config - must be the first Streamlit command
 st.set_page_config(
@@ -198,6 +204,10 @@ st.markdown("""
 # Load environment variables
 load_dotenv()
 
+# Draft autosave: session keys that make up a draft, and the minimum gap between writes
+DRAFT_FIELDS = ("page", "contact_info", "course_info", "current_lab", "num_vms", "from_review")
+DRAFT_FLUSH_SECONDS = float(os.getenv("DRAFT_FLUSH_SECONDS", "5"))
+
 # MongoDB connection
 def get_database():
     MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
@@ -231,6 +241,76 @@ def save_responses(responses):
         st.error(f"Error saving to database: {str(e)}")
         return False
 
+@st.cache_resource
+def init_report_indexes():
+    """Create the reporting indexes once per server process.
+
+    Errors propagate so a failed build is not cached and the next rerun retries it.
+    """
+    return ensure_report_indexes(get_database())
+
+@st.cache_resource
+def get_catalog_index(fingerprint, _catalog_db):
+    """Precomputed TF-IDF index over the Product_Intake labs catalog, one per catalog version."""
+    return load_catalog_index(_catalog_db)
+
+@st.cache_resource
+def get_recommendation_executor():
+    """One background worker shared by all sessions for recommendation scoring."""
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recommendations")
+    atexit.register(executor.shutdown, wait=False)
+    return executor
+
+def compute_recommendations(catalog_db, index, submission):
+    """Score a submission against the catalog index and store the closest labs; runs on the worker."""
+    try:
+        store_recommendations(catalog_db, recommend(index, [submission]))
+    except Exception as e:
+        print(f"Could not compute lab recommendations: {str(e)}")
+
+def save_recommendations(submission):
+    """Queue recommendation scoring for a submission; the submit does not wait for the scoring."""
+    try:
+        catalog_db = get_database().client.get_database("Product_Intake")
+        index = get_catalog_index(catalog_fingerprint(catalog_db), catalog_db)
+        get_recommendation_executor().submit(compute_recommendations, catalog_db, index, copy.deepcopy(submission))
+    except Exception as e:
+        print(f"Could not queue lab recommendations: {str(e)}")
+
+@st.cache_resource
+def get_draft_writer():
+    """Shared draft writer for all sessions, or None if the database is unavailable."""
+    try:
+        writer = DraftWriter(get_database().drafts, DRAFT_FLUSH_SECONDS)
+        writer.ensure_indexes()
+    except Exception:
+        return None
+    atexit.register(writer.close)
+    return writer
+
+def restore_or_start_draft():
+    """Pick up the draft named in the URL, or start a new one with a fresh resume token."""
+    if "draft_token" in st.session_state:
+        return
+    writer = get_draft_writer()
+    token = st.query_params.get("draft")
+    state = writer.load(token) if writer and token else None
+    if state:
+        for key in DRAFT_FIELDS:
+            if key in state:
+                st.session_state[key] = state[key]
+    else:
+        token = new_resume_token()
+    st.session_state.draft_token = token
+    st.query_params["draft"] = token
+
+def autosave_draft():
+    """Stage the current state; the writer coalesces and debounces the actual writes."""
+    writer = get_draft_writer()
+    if writer is None or st.session_state.get("page") == "confirmation":
+        return
+    writer.stage(st.session_state.draft_token, {key: st.session_state[key] for key in DRAFT_FIELDS if key in st.session_state})
+
 # Contact Page
 def contact_page():
     # Add back to review button if coming from review
@@ -682,6 +762,80 @@ def lab_details_page():
                 unsafe_allow_html=True
             )
 
+# Lab review helpers
+LABS_PER_PAGE = 10
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def build_lab_summary(labs):
+    """One row per lab with VM totals; recomputed only when the labs change"""
+    rows = []
+    for i, lab in enumerate(labs, 1):
+        vms = lab.get('vms', [])
+        rows.append({
+            "#": i,
+            "Lab": lab.get('lab_name', 'Unnamed Lab'),
+            "Type": lab.get('lab_type', 'N/A'),
+            "Persistence": lab.get('persistence', 'N/A').split(' (')[0],
+            "Complexity": lab.get('complexity', 'N/A'),
+            "Completion": lab.get('completion_date', 'Not specified'),
+            "VMs": len(vms),
+            "vCPUs": sum(vm.get('cpus', 0) for vm in vms),
+            "RAM (GB)": sum(vm.get('ram', 0) for vm in vms),
+            "Storage (GB)": sum(sum(vm.get('drives', [])) for vm in vms)
+        })
+    return rows
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def build_vm_table(vms):
+    return [{
+        "VM": j,
+        "Role": vm.get('role') or 'Unspecified Role',
+        "OS": vm.get('os', 'N/A'),
+        "CPUs": vm.get('cpus', 'N/A'),
+        "RAM (GB)": vm.get('ram', 'N/A'),
+        "Storage": ', '.join([f"{d}GB" for d in vm.get('drives', [])]) or 'N/A',
+        "Network": vm.get('network_type', 'N/A')
+    } for j, vm in enumerate(vms, 1)]
+
+def render_lab_review(labs):
+    """Summary table for one page of labs, with details for a single selected lab.
+    
+    The number of widgets is the same whatever the course size.
+    """
+    summary = build_lab_summary(labs)
+    num_pages = max(1, -(-len(summary) // LABS_PER_PAGE))
+    page = 1
+    if num_pages > 1:
+        page = st.number_input(f"Page (of {num_pages})", min_value=1, max_value=num_pages, value=1, step=1, key="review_lab_page")
+    first = (page - 1) * LABS_PER_PAGE
+    page_rows = summary[first:first + LABS_PER_PAGE]
+    
+    st.dataframe(page_rows, hide_index=True, use_container_width=True)
+    
+    # Lab detail is rendered only when asked for
+    selected = st.selectbox(
+        "🔍 Show lab details",
+        [None] + [row["#"] for row in page_rows],
+        format_func=lambda i: "Select a lab..." if i is None else f"Lab {i}: {summary[i - 1]['Lab']}",
+        key=f"review_lab_detail_{page}"
+    )
+    if selected is None:
+        return
+    
+    lab = labs[selected - 1]
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.markdown(f"**Network:** {lab.get('network_type', 'N/A')}")
+    with col2:
+        st.markdown(f"**Subnets:** {lab.get('num_subnets', 'N/A')}")
+    with col3:
+        st.markdown(f"**Internet Access:** {'✅' if lab.get('internet_access') else '❌'}")
+    if lab.get('special_requirements'):
+        st.markdown(f"**Special Requirements:** {lab['special_requirements']}")
+    
+    st.markdown("**Virtual Machines:**")
+    st.dataframe(build_vm_table(lab.get('vms', [])), hide_index=True, use_container_width=True)
+
 # Review Page
 def review_page():
     st.title("Review Your Submission")
@@ -758,41 +912,7 @@ def review_page():
             st.session_state.from_review = True
             st.rerun()
     
-    for i, lab in enumerate(course["labs"], 1):
-        with st.expander(f"🔍 Lab {i}: {lab.get('lab_name', 'Unnamed Lab')}", expanded=False):
-            # Lab Info
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.markdown("**Type**")
-                st.write(lab.get('lab_type', 'N/A'))
-            with col2:
-                st.markdown("**Persistence**")
-                st.write(lab.get('persistence', 'N/A'))
-            with col3:
-                st.markdown("**Complexity**")
-                st.write(lab.get('complexity', 'N/A'))
-            
-            st.markdown("**Requested Completion:**")
-            st.write(lab.get('completion_date', 'Not specified'))
-            
-            # VMs Section
-            st.markdown("**Virtual Machines:**")
-            for j, vm in enumerate(lab.get('vms', []), 1):
-                with st.container():
-                    st.markdown(f"**VM {j}:** {vm.get('role', 'Unspecified Role')}")
-                    
-                    col1, col2 = st.columns([1, 2])
-                    with col1:
-                        st.markdown(f"- **OS:** {vm.get('os', 'N/A')}")
-                        st.markdown(f"- **CPUs:** {vm.get('cpus', 'N/A')}")
-                        st.markdown(f"- **RAM:** {vm.get('ram', 'N/A')} GB")
-                    with col2:
-                        drives = ', '.join([f"{d}GB" for d in vm.get('drives', [])]) or 'N/A'
-                        st.markdown(f"- **Storage:** {drives}")
-                        st.markdown(f"- **Network:** {vm.get('network_type', 'N/A')}")
-                
-                if j < len(lab.get('vms', [])):
-                    st.markdown("---")
+    render_lab_review(course["labs"])
     
     # Submit Form
     st.markdown("---")
@@ -806,6 +926,10 @@ def review_page():
         
         # Save to database
         if save_responses(submission):
+            save_recommendations(submission)
+            writer = get_draft_writer()
+            if writer:
+                writer.discard(st.session_state.draft_token)
             st.session_state.page = "confirmation"
             st.rerun()
         else:
@@ -826,6 +950,8 @@ def confirmation_page():
 
 # Initialize Session State
 def initialize_session_state():
+    restore_or_start_draft()
+    
     if "page" not in st.session_state:
         st.session_state.page = "contact"
     
@@ -838,8 +964,14 @@ def initialize_session_state():
 
 # Main App
 def main():
+    try:
+        init_report_indexes()
+    except Exception as e:
+        st.warning(f"Could not create reporting indexes: {str(e)}")
+    
     # Initialize session state
     initialize_session_state()
+    autosave_draft()
     
     # Hide Streamlit menu and footer
     hide_streamlit_style = """
@@ -858,6 +990,9 @@ def main():
     </div>
     """, unsafe_allow_html=True)
     
+    if st.session_state.page != "confirmation":
+        st.sidebar.caption(f"Your progress is saved automatically. Bookmark this page to resume later (draft {st.session_state.draft_token[:8]}…).")
+    
     # Page routing
     if st.session_state.page == "contact":
         contact_page()
@@ -0,0 +1,885 @@
+import re
+import json
+import time
+import base64
+import random
+import hashlib
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl
+
+DEFAULT_PORT = 8089
+EMBEDDING_DIMENSIONS = {"text-embedding-3-large": 3072}
+DEFAULT_EMBEDDING_DIMENSION = 1536
+# Headers forwarded to the upstream API in record mode
+FORWARDED_HEADERS = ("Authorization", "Content-Type", "OpenAI-Beta", "OpenAI-Organization", "OpenAI-Project")
+
+class MockConfig:
+    """Latency, rate limit and failure settings for the mock server.
+
+    ``latency_ms`` and ``failure_rate`` apply to every route; the
+    ``endpoint_*`` dicts override them per route name (e.g. ``embeddings``,
+    ``chat.completions``, ``runs.retrieve``). All randomness comes from one
+    seeded generator, so a run with the same seed and request order injects
+    the same delays and failures.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 endpoint_latency_ms: Optional[Dict[str, float]] = None,
+                 rate_limit_rpm: Optional[float] = None, burst: Optional[int] = None,
+                 failure_rate: float = 0.0, endpoint_failure_rate: Optional[Dict[str, float]] = None,
+                 failure_statuses: Tuple[int, ...] = (500, 503),
+                 indexing_seconds: float = 1.0, file_failure_rate: float = 0.0,
+                 run_seconds: float = 1.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.endpoint_latency_ms = dict(endpoint_latency_ms or {})
+        self.rate_limit_rpm = rate_limit_rpm
+        self.burst = burst
+        self.failure_rate = failure_rate
+        self.endpoint_failure_rate = dict(endpoint_failure_rate or {})
+        self.failure_statuses = tuple(failure_statuses)
+        self.indexing_seconds = indexing_seconds
+        self.file_failure_rate = file_failure_rate
+        self.run_seconds = run_seconds
+        self.seed = seed
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(vars(self), failure_statuses=list(self.failure_statuses))
+
+    def update(self, values: Dict[str, Any]) -> None:
+        for key, value in values.items():
+            if not hasattr(self, key):
+                raise KeyError(f"Unknown config key: {key}")
+            setattr(self, key, tuple(value) if key == "failure_statuses" else value)
+
+class ApiError(Exception):
+    """An OpenAI-style error response."""
+
+    def __init__(self, status: int, message: str, error_type: str = "invalid_request_error",
+                 headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.error_type = error_type
+        self.headers = headers or {}
+
+    def body(self) -> Dict[str, Any]:
+        return {"error": {"message": self.message, "type": self.error_type, "param": None, "code": None}}
+
+class TokenBucket:
+    """Requests-per-minute limiter; ``take`` returns seconds to wait, 0 when allowed."""
+
+    def __init__(self, rpm: float, burst: Optional[int] = None):
+        self.rate = rpm / 60.0
+        self.capacity = float(burst or max(1, int(self.rate)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+def count_tokens(text: str) -> int:
+    """Rough token count: about four characters per token."""
+    return max(1, len(text) // 4) if text else 0
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+def embedding_vector(text: str, dimension: int) -> List[float]:
+    """Deterministic unit vector for a text, so identical inputs embed identically."""
+    rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+    values = [rng.gauss(0.0, 1.0) for _ in range(dimension)]
+    norm = sum(v * v for v in values) ** 0.5 or 1.0
+    return [round(v / norm, 6) for v in values]
+
+def message_text(content: Any) -> str:
+    """Plain text of a message content given as a string or a list of parts."""
+    if isinstance(content, str):
+        return content
+    parts = []
+    for part in content or []:
+        if isinstance(part, dict):
+            text = part.get("text")
+            parts.append(text.get("value", "") if isinstance(text, dict) else text or "")
+    return " ".join(parts)
+
+def paginate(items: List[Dict[str, Any]], query: Dict[str, str], default_order: str = "desc") -> Dict[str, Any]:
+    """OpenAI cursor page over objects sorted by created_at."""
+    order = query.get("order", default_order)
+    items = sorted(items, key=lambda item: (item.get("created_at", 0), item["id"]), reverse=order == "desc")
+    ids = [item["id"] for item in items]
+    if query.get("after") in ids:
+        items = items[ids.index(query["after"]) + 1:]
+    elif query.get("before") in ids:
+        items = items[:ids.index(query["before"])]
+    limit = min(int(query.get("limit", 20)), 100)
+    page = items[:limit]
+    return {
+        "object": "list",
+        "data": page,
+        "first_id": page[0]["id"] if page else None,
+        "last_id": page[-1]["id"] if page else None,
+        "has_more": len(items) > limit,
+    }
+
+def parse_multipart(content_type: str, body: bytes) -> Dict[str, Any]:
+    """Form fields of a multipart upload; file parts map to {'filename', 'content'}."""
+    message = BytesParser(policy=default_policy).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body
+    )
+    fields: Dict[str, Any] = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        payload = part.get_payload(decode=True) or b""
+        filename = part.get_filename()
+        fields[name] = {"filename": filename, "content": payload} if filename else payload.decode("utf-8")
+    return fields
+
+class MockState:
+    """In-memory objects behind the simulated endpoints.
+
+    Vector store files finish indexing ``indexing_seconds`` after they are
+    attached and runs complete ``run_seconds`` after they are created, so
+    callers exercise the same polling paths as against the real API. Status
+    changes are applied lazily whenever an object is read.
+    """
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.lock = threading.RLock()
+        self.rng = random.Random(config.seed)
+        self.counter = 0
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.file_contents: Dict[str, bytes] = {}
+        self.vector_stores: Dict[str, Dict[str, Any]] = {}
+        self.vector_store_files: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+        self.file_batches: Dict[str, Dict[str, Any]] = {}
+        self.assistants: Dict[str, Dict[str, Any]] = {}
+        self.threads: Dict[str, Dict[str, Any]] = {}
+        self.messages: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.runs: Dict[str, Dict[str, Any]] = {}
+
+    def new_id(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}_mock{self.counter:08d}"
+
+    @staticmethod
+    def now() -> int:
+        return int(time.time())
+
+    # Files
+
+    def create_file(self, filename: str, content: bytes, purpose: str) -> Dict[str, Any]:
+        file_id = self.new_id("file")
+        self.files[file_id] = {
+            "id": file_id, "object": "file", "bytes": len(content), "created_at": self.now(),
+            "filename": filename, "purpose": purpose, "status": "processed", "status_details": None,
+        }
+        self.file_contents[file_id] = content
+        return self.files[file_id]
+
+    def get_file(self, file_id: str) -> Dict[str, Any]:
+        if file_id not in self.files:
+            raise ApiError(404, f"No such File object: {file_id}")
+        return self.files[file_id]
+
+    # Vector stores
+
+    def attach_file(self, vector_store_id: str, file_id: str, batch_id: Optional[str] = None) -> Dict[str, Any]:
+        self.get_file(file_id)
+        failed = self.rng.random() < self.config.file_failure_rate
+        record = {
+            "id": file_id, "object": "vector_store.file", "created_at": self.now(),
+            "vector_store_id": vector_store_id, "status": "in_progress", "last_error": None,
+            "usage_bytes": self.files[file_id]["bytes"],
+            "_ready_at": time.time() + self.config.indexing_seconds, "_fails": failed, "_batch_id": batch_id,
+        }
+        self.vector_store_files[vector_store_id][file_id] = record
+        return record
+
+    def refresh_vector_store_file(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        if record["status"] == "in_progress" and time.time() >= record["_ready_at"]:
+            if record["_fails"]:
+                record["status"] = "failed"
+                record["last_error"] = {"code": "server_error", "message": "Injected indexing failure"}
+            else:
+                record["status"] = "completed"
+        return record
+
+    def file_counts(self, records: List[Dict[str, Any]]) -> Dict[str, int]:
+        counts = Counter(self.refresh_vector_store_file(r)["status"] for r in records)
+        return {status: counts.get(status, 0) for status in ("in_progress", "completed", "failed", "cancelled")} | {
+            "total": len(records)}
+
+    def get_vector_store(self, vector_store_id: str) -> Dict[str, Any]:
+        store = self.vector_stores.get(vector_store_id)
+        if store is None:
+            raise ApiError(404, f"No vector store found with id '{vector_store_id}'.")
+        records = list(self.vector_store_files[vector_store_id].values())
+        store["file_counts"] = self.file_counts(records)
+        store["status"] = "in_progress" if store["file_counts"]["in_progress"] else "completed"
+        store["usage_bytes"] = sum(r["usage_bytes"] for r in records if r["status"] == "completed")
+        return store
+
+    def get_vector_store_file(self, vector_store_id: str, file_id: str) -> Dict[str, Any]:
+        self.get_vector_store(vector_store_id)
+        record = self.vector_store_files[vector_store_id].get(file_id)
+        if record is None:
+            raise ApiError(404, f"No file found with id '{file_id}' in vector store '{vector_store_id}'.")
+        return self.refresh_vector_store_file(record)
+
+    def get_file_batch(self, vector_store_id: str, batch_id: str) -> Dict[str, Any]:
+        batch = self.file_batches.get(batch_id)
+        if batch is None or batch["vector_store_id"] != vector_store_id:
+            raise ApiError(404, f"No file batch found with id '{batch_id}'.")
+        records = [r for r in self.vector_store_files[vector_store_id].values() if r["_batch_id"] == batch_id]
+        batch["file_counts"] = self.file_counts(records)
+        if batch["status"] == "in_progress" and not batch["file_counts"]["in_progress"]:
+            batch["status"] = "completed"
+        return batch
+
+    def search_files(self, vector_store_ids: List[str], query: str, limit: int = 3) -> List[str]:
+        """Paragraphs of indexed files ranked by term overlap with the query."""
+        terms = set(tokenize(query))
+        scored = []
+        for vector_store_id in vector_store_ids:
+            for record in self.vector_store_files.get(vector_store_id, {}).values():
+                if self.refresh_vector_store_file(record)["status"] != "completed":
+                    continue
+                text = self.file_contents.get(record["id"], b"").decode("utf-8", errors="replace")
+                for paragraph in re.split(r"\n\s*\n", text):
+                    overlap = len(terms & set(tokenize(paragraph)))
+                    if overlap:
+                        scored.append((overlap, paragraph.strip()))
+        scored.sort(key=lambda item: -item[0])
+        return [paragraph for _, paragraph in scored[:limit]]
+
+    # Assistants, threads and runs
+
+    def get_assistant(self, assistant_id: str) -> Dict[str, Any]:
+        if assistant_id not in self.assistants:
+            raise ApiError(404, f"No assistant found with id '{assistant_id}'.")
+        return self.assistants[assistant_id]
+
+    def get_thread(self, thread_id: str) -> Dict[str, Any]:
+        if thread_id not in self.threads:
+            raise ApiError(404, f"No thread found with id '{thread_id}'.")
+        return self.threads[thread_id]
+
+    def add_message(self, thread_id: str, role: str, content: Any, run_id: Optional[str] = None,
+                    assistant_id: Optional[str] = None) -> Dict[str, Any]:
+        message = {
+            "id": self.new_id("msg"), "object": "thread.message", "created_at": self.now(),
+            "thread_id": thread_id, "role": role, "status": "completed",
+            "content": [{"type": "text", "text": {"value": message_text(content), "annotations": []}}],
+            "assistant_id": assistant_id, "run_id": run_id, "attachments": [], "metadata": {},
+        }
+        self.messages[thread_id].append(message)
+        return message
+
+    def get_run(self, thread_id: str, run_id: str) -> Dict[str, Any]:
+        run = self.runs.get(run_id)
+        if run is None or run["thread_id"] != thread_id:
+            raise ApiError(404, f"No run found with id '{run_id}'.")
+        if run["status"] in ("queued", "in_progress") and time.time() >= run["_done_at"]:
+            self.complete_run(run)
+        elif run["status"] == "queued":
+            run["status"] = "in_progress"
+            run["started_at"] = self.now()
+        elif run["status"] == "cancelling":
+            run["status"] = "cancelled"
+            run["cancelled_at"] = self.now()
+        return run
+
+    def complete_run(self, run: Dict[str, Any]) -> None:
+        """Answer the latest user message, quoting matching file paragraphs when file search is on."""
+        thread_id = run["thread_id"]
+        user_messages = [m for m in self.messages[thread_id] if m["role"] == "user"]
+        question = message_text(user_messages[-1]["content"]) if user_messages else ""
+        vector_store_ids = []
+        for owner in (self.threads[thread_id], self.assistants.get(run["assistant_id"], {})):
+            vector_store_ids.extend(((owner.get("tool_resources") or {}).get("file_search") or {}).get("vector_store_ids") or [])
+        passages = self.search_files(vector_store_ids, question)
+        answer = "\n\n".join(passages) or f"Mock response to: {question}"
+
+        self.add_message(thread_id, "assistant", answer, run_id=run["id"], assistant_id=run["assistant_id"])
+        prompt_tokens = sum(count_tokens(message_text(m["content"])) for m in self.messages[thread_id][:-1])
+        completion_tokens = count_tokens(answer)
+        run.update({
+            "status": "completed", "completed_at": self.now(), "started_at": run["started_at"] or self.now(),
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        })
+
+def public(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop the mock's bookkeeping fields before returning an object."""
+    return {k: v for k, v in record.items() if not k.startswith("_")}
+
+Route = Tuple[str, "re.Pattern[str]", str, Callable[..., Any]]
+
+class MockOpenAI:
+    """Request dispatcher for the simulated API, independent of the HTTP server."""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.state = MockState(config)
+        self.routes: List[Route] = []
+        for method, pattern, name, handler in [
+            ("POST", r"/files", "files.create", self.create_file),
+            ("GET", r"/files", "files.list", self.list_files),
+            ("GET", r"/files/(?P<file_id>[^/]+)", "files.retrieve", self.retrieve_file),
+            ("GET", r"/files/(?P<file_id>[^/]+)/content", "files.content", self.file_content),
+            ("DELETE", r"/files/(?P<file_id>[^/]+)", "files.delete", self.delete_file),
+            ("POST", r"/vector_stores", "vector_stores.create", self.create_vector_store),
+            ("GET", r"/vector_stores", "vector_stores.list", self.list_vector_stores),
+            ("GET", r"/vector_stores/(?P<vs_id>[^/]+)", "vector_stores.retrieve", self.retrieve_vector_store),
+            ("DELETE", r"/vector_stores/(?P<vs_id>[^/]+)", "vector_stores.delete", self.delete_vector_store),
+            ("POST", r"/vector_stores/(?P<vs_id>[^/]+)/files", "vector_stores.files.create", self.create_vector_store_file),
+            ("GET", r"/vector_stores/(?P<vs_id>[^/]+)/files", "vector_stores.files.list", self.list_vector_store_files),
+            ("GET", r"/vector_stores/(?P<vs_id>[^/]+)/files/(?P<file_id>[^/]+)", "vector_stores.files.retrieve", self.retrieve_vector_store_file),
+            ("DELETE", r"/vector_stores/(?P<vs_id>[^/]+)/files/(?P<file_id>[^/]+)", "vector_stores.files.delete", self.delete_vector_store_file),
+            ("POST", r"/vector_stores/(?P<vs_id>[^/]+)/file_batches", "file_batches.create", self.create_file_batch),
+            ("GET", r"/vector_stores/(?P<vs_id>[^/]+)/file_batches/(?P<batch_id>[^/]+)", "file_batches.retrieve", self.retrieve_file_batch),
+            ("GET", r"/vector_stores/(?P<vs_id>[^/]+)/file_batches/(?P<batch_id>[^/]+)/files", "file_batches.list_files", self.list_batch_files),
+            ("POST", r"/assistants", "assistants.create", self.create_assistant),
+            ("GET", r"/assistants", "assistants.list", self.list_assistants),
+            ("GET", r"/assistants/(?P<assistant_id>[^/]+)", "assistants.retrieve", self.retrieve_assistant),
+            ("POST", r"/assistants/(?P<assistant_id>[^/]+)", "assistants.update", self.update_assistant),
+            ("DELETE", r"/assistants/(?P<assistant_id>[^/]+)", "assistants.delete", self.delete_assistant),
+            ("POST", r"/threads", "threads.create", self.create_thread),
+            ("GET", r"/threads/(?P<thread_id>[^/]+)", "threads.retrieve", self.retrieve_thread),
+            ("DELETE", r"/threads/(?P<thread_id>[^/]+)", "threads.delete", self.delete_thread),
+            ("POST", r"/threads/(?P<thread_id>[^/]+)/messages", "messages.create", self.create_message),
+            ("GET", r"/threads/(?P<thread_id>[^/]+)/messages", "messages.list", self.list_messages),
+            ("POST", r"/threads/(?P<thread_id>[^/]+)/runs", "runs.create", self.create_run),
+            ("GET", r"/threads/(?P<thread_id>[^/]+)/runs/(?P<run_id>[^/]+)", "runs.retrieve", self.retrieve_run),
+            ("POST", r"/threads/(?P<thread_id>[^/]+)/runs/(?P<run_id>[^/]+)/cancel", "runs.cancel", self.cancel_run),
+            ("POST", r"/threads/(?P<thread_id>[^/]+)/runs/(?P<run_id>[^/]+)/submit_tool_outputs", "runs.submit_tool_outputs", self.submit_tool_outputs),
+            ("POST", r"/chat/completions", "chat.completions", self.chat_completion),
+            ("POST", r"/embeddings", "embeddings", self.create_embeddings),
+        ]:
+            self.routes.append((method, re.compile(f"{pattern}/?"), name, handler))
+
+    def route(self, method: str, path: str) -> Tuple[str, Callable[..., Any], Dict[str, str]]:
+        for route_method, pattern, name, handler in self.routes:
+            match = pattern.fullmatch(path)
+            if match and route_method == method:
+                return name, handler, match.groupdict()
+        raise ApiError(404, f"Invalid URL ({method} /v1{path})")
+
+    def handle(self, method: str, path: str, query: Dict[str, str], body: Any) -> Any:
+        name, handler, params = self.route(method, path)
+        with self.state.lock:
+            return handler(query=query, body=body, **params)
+
+    # Files
+
+    def create_file(self, query, body):
+        upload = body.get("file") if isinstance(body, dict) else None
+        if not isinstance(upload, dict):
+            raise ApiError(400, "Missing file upload")
+        return self.state.create_file(upload["filename"], upload["content"], body.get("purpose", "assistants"))
+
+    def list_files(self, query, body):
+        files = [f for f in self.state.files.values() if "purpose" not in query or f["purpose"] == query["purpose"]]
+        return paginate(files, {"limit": 10000, **query})
+
+    def retrieve_file(self, query, body, file_id):
+        return self.state.get_file(file_id)
+
+    def file_content(self, query, body, file_id):
+        self.state.get_file(file_id)
+        return self.state.file_contents[file_id]
+
+    def delete_file(self, query, body, file_id):
+        self.state.get_file(file_id)
+        del self.state.files[file_id]
+        self.state.file_contents.pop(file_id, None)
+        return {"id": file_id, "object": "file", "deleted": True}
+
+    # Vector stores
+
+    def create_vector_store(self, query, body):
+        state = self.state
+        vector_store_id = state.new_id("vs")
+        state.vector_stores[vector_store_id] = {
+            "id": vector_store_id, "object": "vector_store", "created_at": state.now(),
+            "name": body.get("name"), "metadata": body.get("metadata") or {}, "expires_after": body.get("expires_after"),
+            "last_active_at": state.now(), "status": "completed", "usage_bytes": 0,
+        }
+        for file_id in body.get("file_ids") or []:
+            state.attach_file(vector_store_id, file_id)
+        return state.get_vector_store(vector_store_id)
+
+    def list_vector_stores(self, query, body):
+        return paginate([self.state.get_vector_store(i) for i in list(self.state.vector_stores)], query)
+
+    def retrieve_vector_store(self, query, body, vs_id):
+        return self.state.get_vector_store(vs_id)
+
+    def delete_vector_store(self, query, body, vs_id):
+        self.state.get_vector_store(vs_id)
+        del self.state.vector_stores[vs_id]
+        self.state.vector_store_files.pop(vs_id, None)
+        return {"id": vs_id, "object": "vector_store.deleted", "deleted": True}
+
+    def create_vector_store_file(self, query, body, vs_id):
+        self.state.get_vector_store(vs_id)
+        return public(self.state.attach_file(vs_id, body["file_id"]))
+
+    def list_vector_store_files(self, query, body, vs_id):
+        self.state.get_vector_store(vs_id)
+        records = [public(r) for r in self.state.vector_store_files[vs_id].values()
+                   if "filter" not in query or r["status"] == query["filter"]]
+        return paginate(records, query)
+
+    def retrieve_vector_store_file(self, query, body, vs_id, file_id):
+        return public(self.state.get_vector_store_file(vs_id, file_id))
+
+    def delete_vector_store_file(self, query, body, vs_id, file_id):
+        self.state.get_vector_store_file(vs_id, file_id)
+        del self.state.vector_store_files[vs_id][file_id]
+        return {"id": file_id, "object": "vector_store.file.deleted", "deleted": True}
+
+    def create_file_batch(self, query, body, vs_id):
+        state = self.state
+        state.get_vector_store(vs_id)
+        batch_id = state.new_id("vsfb")
+        state.file_batches[batch_id] = {
+            "id": batch_id, "object": "vector_store.file_batch", "created_at": state.now(),
+            "vector_store_id": vs_id, "status": "in_progress",
+        }
+        for file_id in body.get("file_ids") or []:
+            state.attach_file(vs_id, file_id, batch_id)
+        return state.get_file_batch(vs_id, batch_id)
+
+    def retrieve_file_batch(self, query, body, vs_id, batch_id):
+        return self.state.get_file_batch(vs_id, batch_id)
+
+    def list_batch_files(self, query, body, vs_id, batch_id):
+        self.state.get_file_batch(vs_id, batch_id)
+        records = [public(r) for r in self.state.vector_store_files[vs_id].values()
+                   if r["_batch_id"] == batch_id and ("filter" not in query or r["status"] == query["filter"])]
+        return paginate(records, query)
+
+    # Assistants
+
+    def create_assistant(self, query, body):
+        assistant_id = self.state.new_id("asst")
+        self.state.assistants[assistant_id] = {
+            "id": assistant_id, "object": "assistant", "created_at": self.state.now(),
+            "name": body.get("name"), "description": body.get("description"), "model": body.get("model"),
+            "instructions": body.get("instructions"), "tools": body.get("tools") or [],
+            "tool_resources": body.get("tool_resources") or {}, "metadata": body.get("metadata") or {},
+            "temperature": body.get("temperature"), "top_p": body.get("top_p"), "response_format": "auto",
+        }
+        return self.state.assistants[assistant_id]
+
+    def list_assistants(self, query, body):
+        return paginate(list(self.state.assistants.values()), query)
+
+    def retrieve_assistant(self, query, body, assistant_id):
+        return self.state.get_assistant(assistant_id)
+
+    def update_assistant(self, query, body, assistant_id):
+        assistant = self.state.get_assistant(assistant_id)
+        assistant.update({k: v for k, v in body.items() if k in assistant and k not in ("id", "object", "created_at")})
+        return assistant
+
+    def delete_assistant(self, query, body, assistant_id):
+        self.state.get_assistant(assistant_id)
+        del self.state.assistants[assistant_id]
+        return {"id": assistant_id, "object": "assistant.deleted", "deleted": True}
+
+    # Threads and runs
+
+    def create_thread(self, query, body):
+        state = self.state
+        thread_id = state.new_id("thread")
+        state.threads[thread_id] = {
+            "id": thread_id, "object": "thread", "created_at": state.now(),
+            "tool_resources": body.get("tool_resources") or {}, "metadata": body.get("metadata") or {},
+        }
+        for message in body.get("messages") or []:
+            state.add_message(thread_id, message.get("role", "user"), message.get("content"))
+        return state.threads[thread_id]
+
+    def retrieve_thread(self, query, body, thread_id):
+        return self.state.get_thread(thread_id)
+
+    def delete_thread(self, query, body, thread_id):
+        self.state.get_thread(thread_id)
+        del self.state.threads[thread_id]
+        self.state.messages.pop(thread_id, None)
+        return {"id": thread_id, "object": "thread.deleted", "deleted": True}
+
+    def create_message(self, query, body, thread_id):
+        self.state.get_thread(thread_id)
+        return self.state.add_message(thread_id, body.get("role", "user"), body.get("content"))
+
+    def list_messages(self, query, body, thread_id):
+        self.state.get_thread(thread_id)
+        messages = [m for m in self.state.messages[thread_id] if "run_id" not in query or m["run_id"] == query["run_id"]]
+        return paginate(messages, query)
+
+    def create_run(self, query, body, thread_id):
+        state = self.state
+        state.get_thread(thread_id)
+        assistant = state.get_assistant(body.get("assistant_id", ""))
+        run_id = state.new_id("run")
+        state.runs[run_id] = {
+            "id": run_id, "object": "thread.run", "created_at": state.now(), "thread_id": thread_id,
+            "assistant_id": assistant["id"], "status": "queued", "model": body.get("model") or assistant["model"],
+            "instructions": body.get("instructions") or assistant["instructions"], "tools": body.get("tools") or assistant["tools"],
+            "started_at": None, "completed_at": None, "cancelled_at": None, "failed_at": None, "expires_at": None,
+            "last_error": None, "required_action": None, "incomplete_details": None, "usage": None,
+            "truncation_strategy": body.get("truncation_strategy"), "tool_choice": body.get("tool_choice"),
+            "max_completion_tokens": body.get("max_completion_tokens"), "metadata": body.get("metadata") or {},
+            "_done_at": time.time() + self.config.run_seconds,
+        }
+        return public(state.runs[run_id])
+
+    def retrieve_run(self, query, body, thread_id, run_id):
+        return public(self.state.get_run(thread_id, run_id))
+
+    def cancel_run(self, query, body, thread_id, run_id):
+        run = self.state.get_run(thread_id, run_id)
+        if run["status"] in ("queued", "in_progress", "requires_action"):
+            run["status"] = "cancelling"
+        return public(run)
+
+    def submit_tool_outputs(self, query, body, thread_id, run_id):
+        run = self.state.get_run(thread_id, run_id)
+        if run["status"] != "requires_action":
+            raise ApiError(400, f"Runs in status \"{run['status']}\" do not accept tool outputs.")
+        run.update(status="in_progress", required_action=None)
+        return public(run)
+
+    # Completions and embeddings
+
+    def chat_completion(self, query, body):
+        if body.get("stream"):
+            raise ApiError(400, "Streaming is not supported by the mock server")
+        messages = body.get("messages") or []
+        question = message_text(messages[-1].get("content")) if messages else ""
+        answer = f"Mock response to: {question[:200]}"
+        prompt_tokens = sum(count_tokens(message_text(m.get("content"))) for m in messages)
+        completion_tokens = count_tokens(answer)
+        return {
+            "id": self.state.new_id("chatcmpl"), "object": "chat.completion", "created": self.state.now(),
+            "model": body.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop", "logprobs": None,
+                         "message": {"role": "assistant", "content": answer}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    def create_embeddings(self, query, body):
+        inputs = body.get("input")
+        inputs = [inputs] if isinstance(inputs, str) else list(inputs or [])
+        if not inputs:
+            raise ApiError(400, "'input' must not be empty")
+        model = body.get("model")
+        dimension = body.get("dimensions") or EMBEDDING_DIMENSIONS.get(model, DEFAULT_EMBEDDING_DIMENSION)
+        texts = [text if isinstance(text, str) else " ".join(map(str, text)) for text in inputs]
+        tokens = sum(count_tokens(text) for text in texts)
+        return {
+            "object": "list", "model": model,
+            "data": [{"object": "embedding", "index": i, "embedding": embedding_vector(text, dimension)}
+                     for i, text in enumerate(texts)],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+def request_key(method: str, path: str, query: Dict[str, str], body: Any) -> str:
+    """Match key for record/replay: method, path, query and a canonical body digest."""
+    if isinstance(body, dict):
+        canonical = {k: ({"filename": v["filename"], "sha256": hashlib.sha256(v["content"]).hexdigest()}
+                         if isinstance(v, dict) and "content" in v else v) for k, v in body.items()}
+        digest = hashlib.sha256(json.dumps(canonical, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    else:
+        digest = hashlib.sha256(body or b"").hexdigest()
+    return f"{method} {path}?{'&'.join(f'{k}={v}' for k, v in sorted(query.items()))} {digest[:16]}"
+
+class Cassette:
+    """Recorded upstream responses in a JSONL file, one exchange per line.
+
+    Identical requests are replayed in recording order; once a key's
+    recordings are used up its last response keeps being returned, so
+    polling loops that issue the same GET many times stay deterministic.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.entries: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.positions: Counter = Counter()
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["key"]].append(entry)
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        with self.lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            self.entries[entry["key"]].append(entry)
+
+    def next(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            recordings = self.entries.get(key)
+            if not recordings:
+                return None
+            position = min(self.positions[key], len(recordings) - 1)
+            self.positions[key] += 1
+            return recordings[position]
+
+class MockOpenAIServer:
+    """HTTP front end: simulate, record from an upstream API, or replay a cassette.
+
+    Latency, rate limiting and failure injection are applied before every
+    simulated or replayed request; record mode passes requests through
+    untouched and stores the upstream responses with their elapsed time.
+    """
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                 record_upstream: Optional[str] = None, cassette: Optional[Path] = None,
+                 replay_fallback: bool = False, replay_latency: bool = False):
+        self.config = config or MockConfig()
+        self.api = MockOpenAI(self.config)
+        self.record_upstream = record_upstream.rstrip("/") if record_upstream else None
+        self.cassette = Cassette(cassette) if cassette else None
+        self.replay_fallback = replay_fallback
+        self.replay_latency = replay_latency
+        self.stats_lock = threading.Lock()
+        self.stats: Dict[str, Counter] = defaultdict(Counter)
+        self.bucket = TokenBucket(self.config.rate_limit_rpm, self.config.burst) if self.config.rate_limit_rpm else None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockOpenAIServer":
+        """Serve on a background thread; use ``base_url`` as OPENAI_BASE_URL."""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def reset(self) -> None:
+        self.api = MockOpenAI(self.config)
+        with self.stats_lock:
+            self.stats.clear()
+        self.bucket = TokenBucket(self.config.rate_limit_rpm, self.config.burst) if self.config.rate_limit_rpm else None
+
+    def count(self, route: str, status: int) -> None:
+        with self.stats_lock:
+            self.stats[route][str(status)] += 1
+
+    def inject(self, route: str) -> None:
+        """Apply the configured rate limit, latency and failures for one request."""
+        config, rng = self.config, self.api.state.rng
+        if self.bucket is not None:
+            with self.stats_lock:
+                wait = self.bucket.take()
+            if wait:
+                raise ApiError(429, "Rate limit reached for requests (mock)", "requests",
+                               {"Retry-After": f"{wait:.3f}", "retry-after-ms": str(int(wait * 1000)),
+                                "x-ratelimit-remaining-requests": "0"})
+        with self.api.state.lock:
+            latency = config.endpoint_latency_ms.get(route, config.latency_ms)
+            latency += rng.uniform(-config.jitter_ms, config.jitter_ms) if config.jitter_ms else 0.0
+            failure_rate = config.endpoint_failure_rate.get(route, config.failure_rate)
+            failed = rng.random() < failure_rate
+            status = rng.choice(config.failure_statuses) if failed else None
+        if latency > 0:
+            time.sleep(latency / 1000)
+        if failed:
+            raise ApiError(status, "Injected failure (mock)", "server_error")
+
+    def forward(self, method: str, path: str, raw_query: str, headers: Dict[str, str], raw_body: bytes,
+                key: str) -> Tuple[int, Dict[str, str], bytes]:
+        """Send the request upstream and append the exchange to the cassette."""
+        url = f"{self.record_upstream}{path}" + (f"?{raw_query}" if raw_query else "")
+        request = urllib.request.Request(url, data=raw_body or None, method=method,
+                                         headers={k: v for k, v in headers.items() if k in FORWARDED_HEADERS})
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=300) as response:
+                status, content_type, body = response.status, response.headers.get("Content-Type", ""), response.read()
+        except urllib.error.HTTPError as e:
+            status, content_type, body = e.code, e.headers.get("Content-Type", ""), e.read()
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+        self.cassette.append({
+            "key": key, "method": method, "path": path, "status": status, "content_type": content_type,
+            "body": base64.b64encode(body).decode("ascii"), "elapsed_ms": elapsed_ms,
+        })
+        return status, {"Content-Type": content_type}, body
+
+    def dispatch(self, method: str, target: str, headers: Dict[str, str], raw_body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        url = urlsplit(target)
+        path = url.path[3:] if url.path.startswith("/v1/") or url.path == "/v1" else url.path
+        query = dict(parse_qsl(url.query))
+        if path.startswith("/_mock/"):
+            return self.control(method, path, raw_body)
+
+        content_type = headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            body: Any = parse_multipart(content_type, raw_body)
+        else:
+            body = json.loads(raw_body) if raw_body else {}
+        key = request_key(method, path, query, body)
+        route = next((name for m, pattern, name, _ in self.api.routes if m == method and pattern.fullmatch(path)), path)
+
+        try:
+            if self.record_upstream:
+                status, response_headers, payload = self.forward(method, path, url.query, headers, raw_body, key)
+                self.count(route, status)
+                return status, response_headers, payload
+
+            recorded = self.cassette.next(key) if self.cassette else None
+            if self.cassette and recorded is None and not self.replay_fallback:
+                raise ApiError(404, f"No recorded response for {key}", "mock_replay_miss")
+            if recorded is not None and self.replay_latency:
+                time.sleep(recorded["elapsed_ms"] / 1000)
+            else:
+                self.inject(route)
+            if recorded is not None:
+                self.count(route, recorded["status"])
+                return recorded["status"], {"Content-Type": recorded["content_type"]}, base64.b64decode(recorded["body"])
+
+            result = self.api.handle(method, path, query, body)
+        except ApiError as e:
+            self.count(route, e.status)
+            return e.status, {"Content-Type": "application/json", **e.headers}, json.dumps(e.body()).encode("utf-8")
+        self.count(route, 200)
+        if isinstance(result, bytes):
+            return 200, {"Content-Type": "application/octet-stream"}, result
+        return 200, {"Content-Type": "application/json"}, json.dumps(result).encode("utf-8")
+
+    def control(self, method: str, path: str, raw_body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        """/_mock/stats, /_mock/config (GET or POST a partial update) and /_mock/reset."""
+        if path == "/_mock/stats":
+            with self.stats_lock:
+                result: Any = {route: dict(counts) for route, counts in self.stats.items()}
+        elif path == "/_mock/config":
+            if method == "POST":
+                self.config.update(json.loads(raw_body or b"{}"))
+                self.bucket = TokenBucket(self.config.rate_limit_rpm, self.config.burst) if self.config.rate_limit_rpm else None
+            result = self.config.as_dict()
+        elif path == "/_mock/reset" and method == "POST":
+            self.reset()
+            result = {"reset": True}
+        else:
+            return 404, {"Content-Type": "application/json"}, json.dumps(ApiError(404, f"Unknown control path {path}").body()).encode("utf-8")
+        return 200, {"Content-Type": "application/json"}, json.dumps(result).encode("utf-8")
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Send headers and body in one segment; split writes stall on delayed ACKs
+            wbufsize = 1 << 16
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw_body = self.rfile.read(length) if length else b""
+                status, headers, payload = server.dispatch(self.command, self.path, dict(self.headers.items()), raw_body)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_DELETE = _serve
+
+        return Handler
+
+def parse_overrides(values: List[str]) -> Dict[str, float]:
+    """route=value pairs from repeated CLI options."""
+    overrides = {}
+    for value in values or []:
+        route, _, number = value.partition("=")
+        overrides[route] = float(number)
+    return overrides
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local stand-in for the OpenAI API. Point clients at it with OPENAI_BASE_URL=http://HOST:PORT/v1")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--endpoint-latency', action='append', metavar="ROUTE=MS",
+                        help="Per-route latency, e.g. chat.completions=800 (repeatable)")
+    parser.add_argument('--rpm', type=float, help="Requests per minute before answering 429")
+    parser.add_argument('--burst', type=int, help="Requests allowed at once under --rpm")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Fraction of requests answered with 500/503")
+    parser.add_argument('--endpoint-failure-rate', action='append', metavar="ROUTE=RATE")
+    parser.add_argument('--indexing-seconds', type=float, default=1.0, help="Time until vector store files are indexed")
+    parser.add_argument('--file-failure-rate', type=float, default=0.0, help="Fraction of vector store files that fail indexing")
+    parser.add_argument('--run-seconds', type=float, default=1.0, help="Time until assistant runs complete")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--record', metavar="UPSTREAM_URL", help="Proxy to this API (e.g. https://api.openai.com/v1) and record to --cassette")
+    parser.add_argument('--cassette', type=Path, help="JSONL file to record to, or to replay from without --record")
+    parser.add_argument('--replay-fallback', action='store_true', help="Simulate requests missing from the cassette")
+    parser.add_argument('--replay-latency', action='store_true', help="Replay with the recorded upstream latency")
+    args = parser.parse_args()
+    if args.record and not args.cassette:
+        parser.error("--record requires --cassette")
+
+    config = MockConfig(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, endpoint_latency_ms=parse_overrides(args.endpoint_latency),
+        rate_limit_rpm=args.rpm, burst=args.burst, failure_rate=args.failure_rate,
+        endpoint_failure_rate=parse_overrides(args.endpoint_failure_rate),
+        indexing_seconds=args.indexing_seconds, file_failure_rate=args.file_failure_rate,
+        run_seconds=args.run_seconds, seed=args.seed
+    )
+    server = MockOpenAIServer(config, args.host, args.port, record_upstream=args.record, cassette=args.cassette,
+                              replay_fallback=args.replay_fallback, replay_latency=args.replay_latency)
+    mode = "recording" if args.record else "replaying" if args.cassette else "simulating"
+    print(f"✅ Mock OpenAI API {mode} at {server.base_url}")
+    print(f"   export OPENAI_BASE_URL={server.base_url} OPENAI_API_KEY=mock")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
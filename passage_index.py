@@ -0,0 +1,152 @@
+import re
+import csv
+import json
+import mmap
+import hashlib
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+from bm25 import BM25Index
+
+INDEX_DIR = Path(".cache/passage_index")
+
+# "Genesis 1:1", "1 John 4:8", "Ps 23:1-3"
+REFERENCE_RE = re.compile(r'\b((?:[1-3]\s?)?[A-Za-z][A-Za-z.]*(?:\s(?:of\s)?[A-Z][a-z]+)?)\s+(\d+):(\d+)(?:\s*-\s*(\d+))?')
+# A plain text line: "<Book> <chapter>:<verse> <text>"
+LINE_RE = re.compile(r'^\s*((?:[1-3]\s?)?[A-Za-z][A-Za-z .]*?)\s+(\d+):(\d+)\s+(.+)$')
+
+def normalize_book(book: str) -> str:
+    return re.sub(r'[\s.]', '', book).lower()
+
+def is_subsequence(short: str, long: str) -> bool:
+    chars = iter(long)
+    return all(c in chars for c in short)
+
+def read_passages(path: Path) -> List[Dict[str, Any]]:
+    """Read verses from JSON/JSONL (book, chapter, verse, text), CSV with those columns,
+    or plain text lines like "Genesis 1:1 In the beginning..."."""
+    translation = path.stem.upper()
+    rows: List[Dict[str, Any]] = []
+    suffix = path.suffix.lower()
+    if suffix == '.json':
+        rows = json.loads(path.read_text(encoding='utf-8'))
+    elif suffix == '.jsonl':
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    elif suffix == '.csv':
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                match = LINE_RE.match(line)
+                if match:
+                    rows.append({"book": match.group(1).strip(), "chapter": match.group(2),
+                                 "verse": match.group(3), "text": match.group(4).strip()})
+    return [{
+        "book": str(row["book"]).strip(),
+        "chapter": int(row["chapter"]),
+        "verse": int(row["verse"]),
+        "text": str(row["text"]).strip(),
+        "translation": row.get("translation") or translation
+    } for row in rows if row.get("text")]
+
+class PassageIndex:
+    """Verse index over a set of files, compiled once to disk and memory-mapped.
+
+    Passage text lives in one UTF-8 blob that is memory-mapped; the metadata file
+    holds (offset, length) per passage plus the verse lookup table. Exact
+    references are dictionary hits; free text goes through BM25.
+    """
+
+    def __init__(self, files: List[str], index_dir: Path = INDEX_DIR):
+        self.files = [Path(f) for f in files]
+        self.index_dir = Path(index_dir)
+        self.fingerprint = self._fingerprint()
+        meta_path = self.index_dir / f"{self.fingerprint}.json"
+        blob_path = self.index_dir / f"{self.fingerprint}.passages"
+        if not (meta_path.exists() and blob_path.exists()):
+            self._compile(meta_path, blob_path)
+        meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        self.passages: List[Dict[str, Any]] = meta["passages"]
+        self.by_reference: Dict[str, List[int]] = meta["by_reference"]
+        self.books: Dict[str, str] = meta["books"]
+        self._blob_file = open(blob_path, 'rb')
+        self.blob = mmap.mmap(self._blob_file.fileno(), 0, access=mmap.ACCESS_READ) if blob_path.stat().st_size else b""
+        self.bm25: Optional[BM25Index] = None
+
+    def _fingerprint(self) -> str:
+        """Changes whenever any source file's path, size or mtime changes."""
+        digest = hashlib.sha256()
+        for path in sorted(self.files):
+            stat = path.stat()
+            digest.update(f"{path.resolve()}|{stat.st_size}|{stat.st_mtime}".encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    def _compile(self, meta_path: Path, blob_path: Path) -> None:
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        passages, by_reference, books = [], {}, {}
+        offset = 0
+        with open(blob_path, 'wb') as blob:
+            for path in self.files:
+                for row in read_passages(path):
+                    data = row["text"].encode('utf-8')
+                    blob.write(data)
+                    book_key = normalize_book(row["book"])
+                    books.setdefault(book_key, row["book"])
+                    ref = f"{book_key}|{row['chapter']}|{row['verse']}"
+                    by_reference.setdefault(ref, []).append(len(passages))
+                    passages.append({
+                        "book": row["book"], "chapter": row["chapter"], "verse": row["verse"],
+                        "translation": row["translation"], "offset": offset, "length": len(data)
+                    })
+                    offset += len(data)
+        meta_path.write_text(json.dumps({"passages": passages, "by_reference": by_reference, "books": books}), encoding='utf-8')
+
+    def text(self, i: int) -> str:
+        passage = self.passages[i]
+        return bytes(self.blob[passage["offset"]:passage["offset"] + passage["length"]]).decode('utf-8')
+
+    def resolve_book(self, book: str) -> Optional[str]:
+        """Match a book name or abbreviation ("Gen", "1 Jn") to an indexed book key."""
+        key = normalize_book(book)
+        if key in self.books:
+            return key
+        if not key:
+            return None
+        candidates = [b for b in self.books if b.startswith(key)]
+        if not candidates:
+            # Abbreviations keep the leading character and letter order: "1jn" -> "1john"
+            candidates = [b for b in self.books if b[0] == key[0] and is_subsequence(key, b)]
+        return candidates[0] if len(candidates) == 1 else None
+
+    def lookup_references(self, query: str) -> List[int]:
+        """Exact hits for every verse reference (or verse range) in the query."""
+        hits: List[int] = []
+        for match in REFERENCE_RE.finditer(query):
+            # The pattern may swallow a preceding word ("verse John 3:16"), so try suffixes
+            words = match.group(1).split()
+            book = next((b for b in (self.resolve_book(" ".join(words[k:])) for k in range(len(words))) if b), None)
+            if book is None:
+                continue
+            chapter, first = int(match.group(2)), int(match.group(3))
+            last = int(match.group(4)) if match.group(4) else first
+            for verse in range(first, min(last, first + 50) + 1):
+                hits.extend(self.by_reference.get(f"{book}|{chapter}|{verse}", []))
+        return hits
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[int, float]]:
+        """Exact reference hits first, then BM25 matches, as (passage position, score)."""
+        exact = self.lookup_references(query)
+        results = [(i, float('inf')) for i in exact]
+        if len(results) >= limit:
+            return results[:limit]
+        if self.bm25 is None:
+            # Built lazily: reference lookups never need the text index
+            self.bm25 = BM25Index([self.text(i) for i in range(len(self.passages))])
+        seen = set(exact)
+        for i, score in self.bm25.rank(query, limit + len(seen)):
+            if i not in seen:
+                results.append((i, score))
+            if len(results) >= limit:
+                break
+        return results
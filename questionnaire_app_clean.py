@@ -8,10 +8,23 @@ from dotenv import load_dotenv
 import pandas as pd
 from bson import ObjectId
 import json
+from questionnaire_sync import get_questionnaire_version as fetch_questionnaire_version
+import logging
+import threading
+import time
+import atexit
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
+# Write-behind buffering for submissions: 0 writes each response immediately
+RESPONSE_BUFFER_SIZE = int(os.getenv("RESPONSE_BUFFER_SIZE", "0"))
+RESPONSE_FLUSH_SECONDS = float(os.getenv("RESPONSE_FLUSH_SECONDS", "5"))
+
 # MongoDB setup
 MONGODB_URI = os.getenv("MONGODB_URI")
 client = MongoClient(MONGODB_URI)
@@ -37,24 +50,121 @@ if 'responses' not in st.session_state:
 if 'respondent_id' not in st.session_state:
     st.session_state.respondent_id = f"user_{datetime.now().strftime('%Y%m%d%H%M%S')}"
 
-def get_questions() -> List[Dict[str, Any]]:
-    """Fetch all questions from the database."""
+def get_questionnaire_version() -> Optional[str]:
+    """Return a cheap fingerprint that changes whenever the questionnaire is re-imported.
+
+    Uses the version document bumped by questionnaire_sync, falling back to the
+    newest question _id for collections that were loaded before versioning.
+    """
+    version = fetch_questionnaire_version(db, question_collection.name)
+    if version is not None:
+        return f"v{version}"
+    latest = question_collection.find_one({}, projection={"_id": 1}, sort=[("_id", -1)])
+    return str(latest["_id"]) if latest else None
+
+@st.cache_data(show_spinner=False)
+def load_questions(version: Optional[str]) -> List[Dict[str, Any]]:
+    """Load the ordered question set; cached per questionnaire version."""
     return list(question_collection.find().sort("order", 1))
 
+def get_questions() -> List[Dict[str, Any]]:
+    """Fetch all questions, reusing the cached set until the questionnaire changes."""
+    return load_questions(get_questionnaire_version())
+
+def clear_question_cache() -> None:
+    """Drop cached questions, e.g. after re-importing the questionnaire in-process."""
+    load_questions.clear()
+
+class ResponseBuffer:
+    """Collects validated response documents and writes them with insert_many.
+
+    A batch is written as soon as it reaches ``max_size``; a background thread
+    writes whatever is pending every ``flush_seconds`` so a quiet period never
+    leaves responses sitting in memory.
+    """
+
+    def __init__(self, collection, max_size: int, flush_seconds: float):
+        self.collection = collection
+        self.max_size = max_size
+        self.flush_seconds = flush_seconds
+        self.pending: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="response-buffer", daemon=True)
+        self._thread.start()
+
+    def add(self, doc: Dict[str, Any]) -> None:
+        with self.lock:
+            self.pending.append(doc)
+            due = len(self.pending) >= self.max_size
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        with self.lock:
+            batch, self.pending = self.pending, []
+        if not batch:
+            return 0
+        # Stamp at write time: exports page by (submitted_at, _id) and must never
+        # see a response appear behind a mark they have already passed
+        now = datetime.utcnow()
+        for doc in batch:
+            doc["submitted_at"] = now
+        started = time.perf_counter()
+        try:
+            self.collection.insert_many(batch, ordered=False)
+        except Exception:
+            # Put the batch back so the next flush retries it
+            with self.lock:
+                self.pending = batch + self.pending
+            raise
+        logger.info("Flushed %d responses in %.1f ms", len(batch), (time.perf_counter() - started) * 1000)
+        return len(batch)
+
+    def close(self) -> None:
+        self._stop.set()
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning("Buffered response flush failed: %s", e)
+
+@st.cache_resource
+def get_response_buffer() -> Optional[ResponseBuffer]:
+    """Shared write-behind buffer, or None when buffering is disabled."""
+    if RESPONSE_BUFFER_SIZE <= 0:
+        return None
+    buffer = ResponseBuffer(response_collection, RESPONSE_BUFFER_SIZE, RESPONSE_FLUSH_SECONDS)
+    atexit.register(buffer.close)
+    return buffer
+
 def save_response(respondent_id: str, responses: Dict[str, Any]) -> str:
-    """Save responses to the database."""
-    response_doc = {
-        "respondent_id": respondent_id,
-        "responses": [{"question_id": qid, "response": resp} for qid, resp in responses.items()],
-        "metadata": {
-            "user_agent": st.experimental_get_query_params().get("user_agent", [""])[0],
-            "ip": st.experimental_get_query_params().get("ip", [""])[0]
-        },
-        "submitted_at": datetime.utcnow()
-    }
-    
-    result = response_collection.insert_one(response_doc)
-    return str(result.inserted_id)
+    """Validate responses once and save them to the database."""
+    started = time.perf_counter()
+    response = QuestionnaireResponse(
+        respondent_id=respondent_id,
+        responses=[QuestionResponse(question_id=qid, response=resp) for qid, resp in responses.items()],
+        metadata={
+            "user_agent": st.query_params.get("user_agent", ""),
+            "ip": st.query_params.get("ip", "")
+        }
+    )
+    response_doc = response.model_dump()
+    # Assign the id client-side so buffered writes can report it immediately
+    response_doc["_id"] = ObjectId()
+
+    buffer = get_response_buffer()
+    if buffer:
+        buffer.add(response_doc)
+    else:
+        response_doc["submitted_at"] = datetime.utcnow()
+        response_collection.insert_one(response_doc)
+    logger.info("Saved response %s in %.1f ms (buffered=%s)",
+                response_doc["_id"], (time.perf_counter() - started) * 1000, buffer is not None)
+    return str(response_doc["_id"])
 
 def render_question(question: Dict[str, Any]) -> Any:
     """Render the appropriate input field based on question type."""
@@ -159,6 +269,7 @@ def render_question(question: Dict[str, Any]) -> Any:
     )
 
 def main():
+    rerun_started = time.perf_counter()
     st.set_page_config(
         page_title="Lab Intake Questionnaire",
         page_icon="📋",
@@ -261,5 +372,7 @@ def main():
         st.write("Current responses:", st.session_state.responses)
         st.write("Current question index:", st.session_state.current_question)
 
+    logger.info("Rerun rendered in %.1f ms", (time.perf_counter() - rerun_started) * 1000)
+
 if __name__ == "__main__":
     main()
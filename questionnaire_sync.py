@@ -0,0 +1,90 @@
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from pymongo import InsertOne, UpdateOne, DeleteMany, ReturnDocument
+
+# Collection holding one version document per questionnaire collection
+VERSION_COLLECTION = "questionnaire_versions"
+
+def get_questionnaire_version(db, collection_name: str) -> Optional[int]:
+    """Return the current version number of a questionnaire collection, or None if never synced"""
+    doc = db[VERSION_COLLECTION].find_one({"_id": collection_name}, projection={"version": 1})
+    return doc["version"] if doc else None
+
+def bump_questionnaire_version(db, collection_name: str, changes: Dict[str, int]) -> int:
+    """Increment the version document so readers know to revalidate their caches"""
+    doc = db[VERSION_COLLECTION].find_one_and_update(
+        {"_id": collection_name},
+        {
+            "$inc": {"version": 1},
+            "$set": {"updated_at": datetime.utcnow(), "last_changes": changes}
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return doc["version"]
+
+def diff_questions(incoming: List[Dict[str, Any]], stored: List[Dict[str, Any]], key: str = "order") -> List[Any]:
+    """Build the insert/update/delete operations that turn the stored questions into the incoming ones"""
+    stored_by_key: Dict[Any, Dict[str, Any]] = {}
+    duplicate_ids = []
+    for doc in stored:
+        if doc.get(key) in stored_by_key:
+            # Leftovers from older full re-imports; keep the first, drop the rest
+            duplicate_ids.append(doc["_id"])
+        else:
+            stored_by_key[doc.get(key)] = doc
+
+    operations: List[Any] = []
+    seen_keys = set()
+    for question in incoming:
+        question = {k: v for k, v in question.items() if k != "_id"}
+        question_key = question[key]
+        seen_keys.add(question_key)
+        current = stored_by_key.get(question_key)
+        if current is None:
+            operations.append(InsertOne(question))
+            continue
+
+        to_set = {k: v for k, v in question.items() if current.get(k) != v}
+        to_unset = {k: "" for k in current if k != "_id" and k not in question}
+        if to_set or to_unset:
+            update: Dict[str, Any] = {}
+            if to_set:
+                update["$set"] = to_set
+            if to_unset:
+                update["$unset"] = to_unset
+            operations.append(UpdateOne({"_id": current["_id"]}, update))
+
+    stale_ids = [doc["_id"] for k, doc in stored_by_key.items() if k not in seen_keys] + duplicate_ids
+    if stale_ids:
+        operations.append(DeleteMany({"_id": {"$in": stale_ids}}))
+    return operations
+
+def sync_questions(db, collection_name: str, questions: List[Dict[str, Any]], key: str = "order") -> Dict[str, int]:
+    """Reconcile a questionnaire collection with the given questions using a single bulk_write.
+
+    Unchanged questions keep their _id and are not touched, and readers never see
+    an empty collection. The version document is bumped only when something changed.
+    """
+    collection = db[collection_name]
+    stored = list(collection.find())
+    operations = diff_questions(questions, stored, key)
+
+    changes = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0, "version": get_questionnaire_version(db, collection_name) or 0}
+    if operations:
+        result = collection.bulk_write(operations, ordered=False)
+        changes["inserted"] = result.inserted_count
+        changes["updated"] = result.modified_count
+        changes["deleted"] = result.deleted_count
+        changes["version"] = bump_questionnaire_version(
+            db, collection_name,
+            {k: changes[k] for k in ("inserted", "updated", "deleted")}
+        )
+    changes["unchanged"] = len(questions) - changes["inserted"] - changes["updated"]
+    return changes
+
+def print_sync_summary(changes: Dict[str, int]) -> None:
+    """Print a one-line summary of a sync_questions result"""
+    print(f"✅ Synced questionnaire (version {changes['version']}): "
+          f"{changes['inserted']} inserted, {changes['updated']} updated, "
+          f"{changes['deleted']} deleted, {changes['unchanged']} unchanged")
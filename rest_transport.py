@@ -0,0 +1,258 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# OPENAI_BASE_URL points scripts at a local mock server instead of the real API
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+DEFAULT_TIMEOUT = (5.0, 60.0)  # (connect, read) seconds
+MAX_RETRIES = 4
+POOL_SIZE = 10
+
+# Backoff defaults: full jitter over 0.5s growing by 2x, capped at 8s
+INITIAL_DELAY = 0.5
+MAX_DELAY = 8.0
+BACKOFF_FACTOR = 2.0
+# Same retryable set as the OpenAI SDK; 409 is a transient lock conflict there
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+# A POST may have created something even if its response was lost, so it is only
+# retried when the server is known to have rejected it before doing any work
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+POST_RETRY_STATUSES = {429, 503}
+
+class TransportError(Exception):
+    """A request that failed after all retries, or with a non-retryable status."""
+
+    def __init__(self, method: str, path: str, status: Optional[int], body: Any):
+        self.method = method
+        self.path = path
+        self.status = status
+        self.body = body
+        message = body.get("error", {}).get("message") if isinstance(body, dict) else body
+        super().__init__(f"{method} {path} failed ({status}): {message}")
+
+class RequestTiming:
+    """One HTTP attempt, passed to every timing hook."""
+
+    def __init__(self, method: str, path: str, attempt: int, status: Optional[int], elapsed: float,
+                 error: Optional[str] = None):
+        self.method = method
+        self.path = path
+        self.attempt = attempt
+        self.status = status
+        self.elapsed = elapsed
+        self.error = error
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "attempt": self.attempt,
+            "status": self.status,
+            "elapsed_ms": round(self.elapsed * 1000, 3),
+            "error": self.error,
+        }
+
+class TimingRecorder:
+    """Timing hook that keeps every attempt for later reporting."""
+
+    def __init__(self):
+        self.timings: List[RequestTiming] = []
+
+    def __call__(self, timing: RequestTiming) -> None:
+        self.timings.append(timing)
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = sorted(t.elapsed for t in self.timings)
+        if not elapsed:
+            return {"requests": 0}
+        return {
+            "requests": len(elapsed),
+            "retries": sum(1 for t in self.timings if t.attempt > 1),
+            "errors": sum(1 for t in self.timings if t.error or (t.status or 0) >= 400),
+            "p50_ms": round(elapsed[len(elapsed) // 2] * 1000, 3),
+            "p95_ms": round(elapsed[min(len(elapsed) - 1, int(len(elapsed) * 0.95))] * 1000, 3),
+            "max_ms": round(elapsed[-1] * 1000, 3),
+        }
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None,
+                  initial_delay: float = INITIAL_DELAY, max_delay: float = MAX_DELAY) -> float:
+    """Full-jitter exponential backoff; a numeric Retry-After header takes precedence."""
+    if retry_after:
+        try:
+            return min(float(retry_after), max_delay)
+        except ValueError:
+            pass
+    return random.uniform(0, min(max_delay, initial_delay * BACKOFF_FACTOR ** (attempt - 1)))
+
+class RestTransport:
+    """Pooled, retrying JSON client for the OpenAI REST endpoints.
+
+    One keep-alive ``requests.Session`` is shared by every call, so a script
+    pays the TCP and TLS handshake once per pooled connection instead of once
+    per request. Connection errors and retryable statuses are retried with
+    jittered backoff, and every attempt is reported to the timing hooks.
+    Non-idempotent requests (POST) are only retried after connection errors
+    and 429/503 responses, never after a read timeout or a 5xx that may have
+    followed a successful create.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 timeout=DEFAULT_TIMEOUT, max_retries: int = MAX_RETRIES, pool_size: int = POOL_SIZE,
+                 hooks: Optional[List[Callable[[RequestTiming], None]]] = None,
+                 beta: str = "assistants=v2",
+                 initial_delay: float = INITIAL_DELAY, max_delay: float = MAX_DELAY):
+        self.base_url = (base_url or os.getenv("OPENAI_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.hooks = list(hooks or [])
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key or os.getenv('OPENAI_API_KEY')}",
+        })
+        if beta:
+            self.session.headers["OpenAI-Beta"] = beta
+
+    def __enter__(self) -> "RestTransport":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _notify(self, timing: RequestTiming) -> None:
+        for hook in self.hooks:
+            try:
+                hook(timing)
+            except Exception as e:
+                logger.warning("Timing hook failed: %s", e)
+
+    def _attempt(self, method: str, path: str, attempt: int, **kwargs: Any) -> Optional[requests.Response]:
+        """Send one attempt; returns None on a connection-level failure."""
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, f"{self.base_url}/{path.lstrip('/')}",
+                                            timeout=self.timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            self._notify(RequestTiming(method, path, attempt, None, time.perf_counter() - started, str(e)))
+            # A read timeout means the server got the request and may have acted on it
+            retryable = method in IDEMPOTENT_METHODS or not isinstance(e, requests.ReadTimeout)
+            if attempt > self.max_retries or not retryable:
+                raise TransportError(method, path, None, str(e)) from e
+            return None
+        self._notify(RequestTiming(method, path, attempt, response.status_code, time.perf_counter() - started))
+        return response
+
+    def _should_retry(self, method: str, response: Optional[requests.Response], attempt: int) -> bool:
+        if attempt > self.max_retries:
+            return False
+        if response is None:
+            return True
+        statuses = RETRY_STATUSES if method in IDEMPOTENT_METHODS else POST_RETRY_STATUSES
+        return response.status_code in statuses
+
+    def _delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        return backoff_delay(attempt, retry_after, self.initial_delay, self.max_delay)
+
+    @staticmethod
+    def _parse(method: str, path: str, response: requests.Response) -> Any:
+        try:
+            body = response.json()
+        except ValueError:
+            body = response.text
+        if response.status_code >= 400:
+            raise TransportError(method, path, response.status_code, body)
+        return body
+
+    def request(self, method: str, path: str, **kwargs: Any) -> Any:
+        """Send a request relative to the base URL and return the decoded JSON body."""
+        attempt = 1
+        while True:
+            response = self._attempt(method, path, attempt, **kwargs)
+            if not self._should_retry(method, response, attempt):
+                return self._parse(method, path, response)
+            delay = self._delay(attempt, response)
+            logger.info("Retrying %s %s in %.2fs (attempt %d)", method, path, delay, attempt)
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, path: str, **kwargs: Any) -> Any:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, json: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+        return self.request("POST", path, json=json, **kwargs)
+
+    def delete(self, path: str, **kwargs: Any) -> Any:
+        return self.request("DELETE", path, **kwargs)
+
+class AsyncRestTransport:
+    """asyncio front end over a RestTransport for issuing many calls concurrently.
+
+    Each attempt runs on one of ``max_concurrency`` worker threads against the
+    shared session pool, and backoff waits with ``asyncio.sleep`` so retries
+    do not hold a thread. ``max_concurrency`` bounds in-flight requests; keep
+    it at or below the transport's pool size so connections are reused rather
+    than discarded.
+    """
+
+    def __init__(self, transport: Optional[RestTransport] = None, max_concurrency: int = POOL_SIZE, **kwargs: Any):
+        self.transport = transport or RestTransport(pool_size=max_concurrency, **kwargs)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        # Own executor: the loop's default one may have fewer workers than max_concurrency
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    async def __aenter__(self) -> "AsyncRestTransport":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False)
+        self.transport.close()
+
+    async def request(self, method: str, path: str, **kwargs: Any) -> Any:
+        transport = self.transport
+        attempt = 1
+        while True:
+            async with self.semaphore:
+                response = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, partial(transport._attempt, method, path, attempt, **kwargs))
+            if not transport._should_retry(method, response, attempt):
+                return transport._parse(method, path, response)
+            await asyncio.sleep(transport._delay(attempt, response))
+            attempt += 1
+
+    async def get(self, path: str, **kwargs: Any) -> Any:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, json: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+        return await self.request("POST", path, json=json, **kwargs)
+
+    async def delete(self, path: str, **kwargs: Any) -> Any:
+        return await self.request("DELETE", path, **kwargs)
+
+    async def gather(self, calls: List[Dict[str, Any]], return_exceptions: bool = True) -> List[Any]:
+        """Run {'method', 'path', ...request kwargs} calls concurrently, results in order."""
+        return await asyncio.gather(
+            *(self.request(call["method"], call["path"], **{k: v for k, v in call.items() if k not in ("method", "path")})
+              for call in calls),
+            return_exceptions=return_exceptions
+        )
@@ -0,0 +1,121 @@
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Run states after which polling stops, and the ones worth polling again
+TERMINAL_STATES = {"completed", "failed", "cancelled", "expired", "incomplete"}
+PENDING_STATES = {"queued", "in_progress", "cancelling"}
+
+# Backoff defaults: first poll after 0.25s, growing by 1.6x up to 2s between polls
+INITIAL_DELAY = 0.25
+MAX_DELAY = 2.0
+BACKOFF_FACTOR = 1.6
+DEFAULT_TIMEOUT = 120.0
+
+class RunResult:
+    """Outcome of waiting for an Assistants run, with polling statistics."""
+
+    def __init__(self, run: Any, status: str, polls: int, wall_time: float, error: Optional[str] = None):
+        self.run = run
+        self.status = status
+        self.polls = polls
+        self.wall_time = wall_time
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "completed"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "run_id": getattr(self.run, "id", None),
+            "status": self.status,
+            "polls": self.polls,
+            "wall_time": round(self.wall_time, 3),
+            "error": self.error,
+        }
+
+def describe_error(run: Any) -> Optional[str]:
+    """Human-readable reason for a run that did not complete."""
+    last_error = getattr(run, "last_error", None)
+    if last_error:
+        return f"{last_error.code}: {last_error.message}"
+    details = getattr(run, "incomplete_details", None)
+    if details:
+        return f"incomplete: {details.reason}"
+    return None
+
+def wait_for_run(client, thread_id: str, run: Any,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 on_requires_action: Optional[Callable[[Any], List[Dict[str, str]]]] = None,
+                 initial_delay: float = INITIAL_DELAY,
+                 max_delay: float = MAX_DELAY) -> RunResult:
+    """Poll a run with adaptive backoff until it reaches a terminal state or the deadline.
+
+    ``on_requires_action`` receives the run and returns the tool outputs to submit;
+    without it a run that requires action is cancelled, since nobody can answer it.
+    On timeout the run is cancelled and the status is ``"timed_out"``.
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    delay = initial_delay
+    polls = 0
+
+    while True:
+        status = run.status
+        if status in TERMINAL_STATES:
+            break
+
+        if status == "requires_action":
+            if on_requires_action is None:
+                logger.warning("Run %s requires action but no handler was given; cancelling", run.id)
+                run = cancel_run(client, thread_id, run)
+                status = "requires_action"
+                break
+            tool_outputs = on_requires_action(run)
+            run = client.beta.threads.runs.submit_tool_outputs(
+                thread_id=thread_id, run_id=run.id, tool_outputs=tool_outputs
+            )
+            # Tool outputs restart the work, so poll quickly again
+            delay = initial_delay
+            continue
+
+        if status not in PENDING_STATES:
+            # A state this module does not know about; stop rather than poll until the deadline
+            logger.warning("Run %s has unexpected status %s; not polling further", run.id, status)
+            break
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            logger.warning("Run %s still %s after %.1fs; cancelling", run.id, status, timeout)
+            run = cancel_run(client, thread_id, run)
+            status = "timed_out"
+            break
+
+        time.sleep(min(delay, remaining))
+        delay = min(delay * BACKOFF_FACTOR, max_delay)
+        run = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
+        polls += 1
+
+    wall_time = time.monotonic() - started
+    error = None if status == "completed" else (describe_error(run) or status)
+    result = RunResult(run, status, polls, wall_time, error)
+    logger.info("Run %s finished: status=%s polls=%d wall_time=%.2fs", run.id, status, polls, wall_time)
+    return result
+
+def cancel_run(client, thread_id: str, run: Any) -> Any:
+    """Best-effort cancel; returns the latest known run object."""
+    try:
+        return client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run.id)
+    except Exception as e:
+        logger.warning("Could not cancel run %s: %s", run.id, e)
+        return run
+
+def create_and_wait(client, thread_id: str, assistant_id: str, timeout: float = DEFAULT_TIMEOUT,
+                    on_requires_action: Optional[Callable[[Any], List[Dict[str, str]]]] = None,
+                    **run_params: Any) -> RunResult:
+    """Create a run and wait for it with wait_for_run."""
+    run = client.beta.threads.runs.create(thread_id=thread_id, assistant_id=assistant_id, **run_params)
+    return wait_for_run(client, thread_id, run, timeout=timeout, on_requires_action=on_requires_action)
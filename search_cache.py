@@ -0,0 +1,254 @@
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+# Words that do not change what a search is about
+STOPWORDS = {
+    "a", "an", "the", "for", "of", "in", "on", "to", "and", "or", "is", "are",
+    "what", "which", "with", "me", "show", "list", "about", "do", "does", "i", "we"
+}
+
+def query_terms(query: str) -> List[str]:
+    """Lowercased terms in query order, without punctuation or stopwords."""
+    return [t for t in re.findall(r"[a-z0-9][a-z0-9.+#-]*", query.lower()) if t not in STOPWORDS]
+
+def normalize_query(query: str) -> str:
+    """Exact-match form of a query: its terms, in order, joined by single spaces.
+
+    Case, punctuation and stopwords do not matter, but word order does, so
+    "migrate from linux to windows" and "migrate from windows to linux" stay
+    distinct entries.
+    """
+    return " ".join(query_terms(query))
+
+def term_set(query: str) -> str:
+    """Order-insensitive form of a query, used only to pick similarity candidates.
+
+    "VM requirements for ACI lab" and "ACI lab VM requirements" share a term set,
+    so they are compared by embedding first; they never share an exact key.
+    """
+    return " ".join(sorted(set(query_terms(query))))
+
+def cache_key(query: str, vector_store_id: str, limit: int) -> str:
+    """Stable key for a (normalized query, vector store, limit) triple."""
+    raw = f"{vector_store_id}|{limit}|{normalize_query(query)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def cosine_similarity(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+class SearchCache:
+    """LRU + TTL cache for search results with an optional SQLite tier on disk.
+
+    Entries remember the vector store version (a fingerprint of its file ids) they
+    were computed against; a different version invalidates every entry for that
+    store. When ``embed`` is given, a miss falls back to the most similar cached
+    query for the same store and limit if it scores at least
+    ``similarity_threshold``.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600,
+                 db_path: Optional[Path] = None,
+                 embed: Optional[Callable[[str], List[float]]] = None,
+                 similarity_threshold: float = 0.92):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.store_versions: Dict[str, str] = {}
+        self._last_embedding = None
+        self.db = None
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS search_cache (
+                    key TEXT PRIMARY KEY,
+                    vector_store_id TEXT,
+                    result_limit INTEGER,
+                    store_version TEXT,
+                    created_at REAL,
+                    results TEXT,
+                    embedding TEXT
+                )
+            """)
+            self.db.commit()
+            self._warm_from_disk()
+
+    def _warm_from_disk(self) -> None:
+        """Load the most recent unexpired entries into memory."""
+        cutoff = time.time() - self.ttl_seconds
+        self.db.execute("DELETE FROM search_cache WHERE created_at < ?", (cutoff,))
+        self.db.commit()
+        rows = self.db.execute(
+            "SELECT key, vector_store_id, result_limit, store_version, created_at, results, embedding "
+            "FROM search_cache ORDER BY created_at DESC LIMIT ?", (self.max_entries,)
+        ).fetchall()
+        for row in reversed(rows):
+            self.entries[row[0]] = self._row_to_entry(row)
+
+    @staticmethod
+    def _row_to_entry(row) -> Dict[str, Any]:
+        return {
+            "vector_store_id": row[1],
+            "limit": row[2],
+            "store_version": row[3],
+            "created_at": row[4],
+            "results": json.loads(row[5]),
+            "embedding": json.loads(row[6]) if row[6] else None,
+            "terms": None,
+        }
+
+    def _is_fresh(self, entry: Dict[str, Any], store_version: str) -> bool:
+        return (entry["store_version"] == store_version
+                and time.time() - entry["created_at"] < self.ttl_seconds)
+
+    def get(self, query: str, vector_store_id: str, limit: int, store_version: str) -> Optional[List[Dict[str, Any]]]:
+        """Return cached results for the query, or None on a miss."""
+        key = cache_key(query, vector_store_id, limit)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None and self.db is not None:
+                row = self.db.execute(
+                    "SELECT key, vector_store_id, result_limit, store_version, created_at, results, embedding "
+                    "FROM search_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    entry = self._row_to_entry(row)
+                    self.entries[key] = entry
+            if entry is not None:
+                if self._is_fresh(entry, store_version):
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry["results"]
+                self._remove(key)
+
+        similar = self._find_similar(query, vector_store_id, limit, store_version)
+        with self.lock:
+            if similar is not None:
+                self.similar_hits += 1
+            else:
+                self.misses += 1
+        return similar
+
+    def _find_similar(self, query: str, vector_store_id: str, limit: int, store_version: str) -> Optional[List[Dict[str, Any]]]:
+        """Serve a near-duplicate query using embedding similarity, if enabled."""
+        if self.embed is None:
+            return None
+        with self.lock:
+            candidates = [
+                (key, entry) for key, entry in self.entries.items()
+                if entry["vector_store_id"] == vector_store_id and entry["limit"] == limit
+                and entry["embedding"] and self._is_fresh(entry, store_version)
+            ]
+        if not candidates:
+            return None
+        embedding = self._embed(query)
+        # Rephrasings with the same terms are the likeliest match, so they are checked first
+        terms = term_set(query)
+        same_terms = [(key, entry) for key, entry in candidates if entry.get("terms") == terms]
+        best_key, best_score = self._most_similar(embedding, same_terms)
+        if best_score < self.similarity_threshold:
+            best_key, best_score = self._most_similar(embedding, candidates)
+        if best_score < self.similarity_threshold:
+            return None
+        with self.lock:
+            entry = self.entries.get(best_key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(best_key)
+            return entry["results"]
+
+    @staticmethod
+    def _most_similar(embedding: List[float], candidates: List[Tuple[str, Dict[str, Any]]]) -> Tuple[Optional[str], float]:
+        best_key, best_score = None, 0.0
+        for key, entry in candidates:
+            score = cosine_similarity(embedding, entry["embedding"])
+            if score > best_score:
+                best_key, best_score = key, score
+        return best_key, best_score
+
+    def _embed(self, query: str) -> List[float]:
+        """Embed a query, reusing the last embedding so a miss followed by put embeds once."""
+        last = self._last_embedding
+        if last and last[0] == query:
+            return last[1]
+        embedding = self.embed(query)
+        self._last_embedding = (query, embedding)
+        return embedding
+
+    def put(self, query: str, vector_store_id: str, limit: int, store_version: str, results: List[Dict[str, Any]]) -> None:
+        """Store results for the query, evicting the least recently used entries."""
+        key = cache_key(query, vector_store_id, limit)
+        embedding = self._embed(query) if self.embed else None
+        entry = {
+            "vector_store_id": vector_store_id,
+            "limit": limit,
+            "store_version": store_version,
+            "created_at": time.time(),
+            "results": results,
+            "embedding": embedding,
+            "terms": term_set(query),
+        }
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                evicted, _ = self.entries.popitem(last=False)
+                if self.db is not None:
+                    self.db.execute("DELETE FROM search_cache WHERE key = ?", (evicted,))
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, vector_store_id, limit, store_version, entry["created_at"],
+                     json.dumps(results), json.dumps(embedding) if embedding else None)
+                )
+                self.db.commit()
+
+    def _remove(self, key: str) -> None:
+        self.entries.pop(key, None)
+        if self.db is not None:
+            self.db.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+            self.db.commit()
+
+    def invalidate(self, vector_store_id: Optional[str] = None) -> None:
+        """Drop every entry, or only those for one vector store."""
+        with self.lock:
+            for key in [k for k, e in self.entries.items()
+                        if vector_store_id is None or e["vector_store_id"] == vector_store_id]:
+                del self.entries[key]
+            if self.db is not None:
+                if vector_store_id is None:
+                    self.db.execute("DELETE FROM search_cache")
+                else:
+                    self.db.execute("DELETE FROM search_cache WHERE vector_store_id = ?", (vector_store_id,))
+                self.db.commit()
+
+    def observe_store_version(self, vector_store_id: str, store_version: str) -> None:
+        """Invalidate a store's entries as soon as its file set is seen to change."""
+        previous = self.store_versions.get(vector_store_id)
+        self.store_versions[vector_store_id] = store_version
+        if previous is not None and previous != store_version:
+            self.invalidate(vector_store_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+        }
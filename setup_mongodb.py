@@ -4,6 +4,7 @@ from pymongo import MongoClient, ASCENDING, DESCENDING
 from pymongo.errors import ConnectionFailure, OperationFailure
 from typing import List, Dict, Any
 from datetime import datetime
+from lab_analytics import materialize_lab_summary
 
 class MongoDBImporter:
     def __init__(self, db_name: str = "Product_Intake", connection_string: str = None):
@@ -89,6 +90,10 @@ class MongoDBImporter:
                 # Update categories collection
                 self._update_categories(processed_labs)
                 
+                # Fold the new labs into the precomputed summary
+                stats = materialize_lab_summary(self.db)
+                print(f"✅ Lab summary updated with {stats['new_labs']} labs")
+                
         except Exception as e:
             print(f"❌ Error importing labs: {str(e)}")
     
@@ -0,0 +1,173 @@
+import copy
+import time
+import logging
+import secrets
+import threading
+from datetime import datetime, date
+from typing import Dict, Any, List, Optional, Tuple
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+DRAFT_TTL_DAYS = 30
+# Tokens not staged for this long are dropped from the in-memory snapshot cache
+DRAFT_IDLE_SECONDS = 3600
+
+def new_resume_token() -> str:
+    return secrets.token_urlsafe(16)
+
+def to_document(value: Any) -> Any:
+    """Plain BSON-friendly copy; dates become datetimes."""
+    if isinstance(value, dict):
+        return {str(k): to_document(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_document(v) for v in value]
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    return copy.copy(value)
+
+def diff_state(old: Any, new: Any, path: str = "state") -> Tuple[Dict[str, Any], List[str]]:
+    """Minimal $set / $unset paths that turn ``old`` into ``new``.
+
+    Dicts and equal-length lists are compared element by element so a change to
+    one lab only rewrites that lab's changed fields.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        sets: Dict[str, Any] = {}
+        unsets: List[str] = []
+        for key, value in new.items():
+            if "." in key or key.startswith("$"):
+                # Not addressable as a path; rewrite the parent instead
+                return ({path: new}, []) if old != new else ({}, [])
+            if key not in old:
+                sets[f"{path}.{key}"] = value
+            else:
+                child_sets, child_unsets = diff_state(old[key], value, f"{path}.{key}")
+                sets.update(child_sets)
+                unsets.extend(child_unsets)
+        unsets.extend(f"{path}.{key}" for key in old if key not in new)
+        return sets, unsets
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        sets, unsets = {}, []
+        for i, (a, b) in enumerate(zip(old, new)):
+            child_sets, child_unsets = diff_state(a, b, f"{path}.{i}")
+            sets.update(child_sets)
+            unsets.extend(child_unsets)
+        if unsets:
+            # $unset on array elements leaves nulls behind
+            return {path: new}, []
+        return sets, unsets
+    return ({path: new}, []) if old != new else ({}, [])
+
+class DraftWriter:
+    """Coalescing write-behind store for in-progress survey drafts.
+
+    Sessions stage their latest state as often as they like; a background
+    thread writes at most once every ``flush_seconds``, keeping only the newest
+    state per draft and sending just the changed paths in one unordered
+    bulk_write across all drafts.
+    """
+
+    def __init__(self, collection, flush_seconds: float = 5.0):
+        self.collection = collection
+        self.flush_seconds = flush_seconds
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.persisted: Dict[str, Dict[str, Any]] = {}
+        self.last_seen: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        # Held for a whole flush and for discard's delete, so a flush that already
+        # took a draft's state cannot upsert it again after the draft was deleted
+        self.write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="draft-writer", daemon=True)
+        self._thread.start()
+
+    def ensure_indexes(self) -> None:
+        self.collection.create_index("updated_at", expireAfterSeconds=DRAFT_TTL_DAYS * 86400)
+
+    def stage(self, token: str, state: Dict[str, Any]) -> None:
+        """Remember the newest state for a draft; written on the next flush."""
+        document = to_document(state)
+        with self.lock:
+            self.pending[token] = document
+            self.last_seen[token] = time.monotonic()
+
+    def flush(self) -> int:
+        with self.write_lock:
+            return self._flush()
+
+    def _flush(self) -> int:
+        with self.lock:
+            batch, self.pending = self.pending, {}
+        operations, written = [], {}
+        now = datetime.utcnow()
+        for token, state in batch.items():
+            previous = self.persisted.get(token)
+            if previous is None:
+                sets, unsets = {"state": state}, []
+            else:
+                sets, unsets = diff_state(previous, state)
+            if not sets and not unsets:
+                continue
+            update: Dict[str, Any] = {
+                "$set": {**sets, "updated_at": now},
+                "$setOnInsert": {"created_at": now}
+            }
+            if unsets:
+                update["$unset"] = {path: "" for path in unsets}
+            operations.append(UpdateOne({"_id": token}, update, upsert=True))
+            written[token] = state
+        if operations:
+            started = time.perf_counter()
+            try:
+                self.collection.bulk_write(operations, ordered=False)
+            except Exception:
+                # Requeue unless the session has staged something newer meanwhile
+                with self.lock:
+                    for token, state in batch.items():
+                        self.pending.setdefault(token, state)
+                raise
+            logger.info("Saved %d drafts in %.1f ms", len(operations), (time.perf_counter() - started) * 1000)
+        with self.lock:
+            self.persisted.update(written)
+            self._evict_idle()
+        return len(operations)
+
+    def _evict_idle(self) -> None:
+        cutoff = time.monotonic() - DRAFT_IDLE_SECONDS
+        for token in [t for t, seen in self.last_seen.items() if seen < cutoff and t not in self.pending]:
+            self.last_seen.pop(token, None)
+            self.persisted.pop(token, None)
+
+    def load(self, token: str) -> Optional[Dict[str, Any]]:
+        """State saved under a resume token, or None if there is no such draft."""
+        with self.lock:
+            if token in self.pending:
+                return copy.deepcopy(self.pending[token])
+        doc = self.collection.find_one({"_id": token}, {"state": 1})
+        if not doc:
+            return None
+        with self.lock:
+            self.persisted[token] = doc["state"]
+            self.last_seen[token] = time.monotonic()
+        return copy.deepcopy(doc["state"])
+
+    def discard(self, token: str) -> None:
+        """Forget a draft, e.g. once its survey has been submitted."""
+        with self.write_lock:
+            with self.lock:
+                self.pending.pop(token, None)
+                self.persisted.pop(token, None)
+                self.last_seen.pop(token, None)
+            self.collection.delete_one({"_id": token})
+
+    def close(self) -> None:
+        self._stop.set()
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning("Draft autosave failed: %s", e)
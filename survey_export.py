@@ -0,0 +1,261 @@
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Tuple, Callable
+import pandas as pd
+from bson import ObjectId
+from pymongo import MongoClient, ASCENDING
+from dotenv import load_dotenv
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; only the Parquet export needs it
+    pyarrow = None
+
+# Load environment variables
+load_dotenv()
+
+EXPORT_DIR = Path("exports")
+STATE_FILE = "_export_state.json"
+CURSOR_BATCH_SIZE = 1000
+# Documents flattened per written part file
+CHUNK_DOCUMENTS = 5000
+
+# Column types of every exported table. Each part file is written with the
+# full schema, so a column that is empty or differently typed in one chunk
+# still matches the other parts of the partitioned dataset.
+TABLE_COLUMNS: Dict[str, Dict[str, str]] = {
+    "survey_submissions": {
+        "submission_id": "string", "submitted_at": "timestamp", "first_name": "string", "last_name": "string",
+        "email": "string", "organization": "string", "org_type": "string", "course_name": "string",
+        "course_duration": "string", "num_labs": "int64", "developer": "string", "description": "string",
+        "objective_certification": "bool", "objective_hands_on": "bool", "objective_assessment": "bool",
+        "objective_other": "string",
+    },
+    "survey_labs": {
+        "submission_id": "string", "submitted_at": "timestamp", "lab_index": "int64", "lab_name": "string",
+        "lab_type": "string", "persistence": "string", "complexity": "string", "completion_date": "string",
+        "network_type": "string", "num_subnets": "int64", "internet_access": "bool",
+        "special_requirements": "string", "num_vms": "int64",
+    },
+    "survey_vms": {
+        "submission_id": "string", "submitted_at": "timestamp", "lab_index": "int64", "vm_index": "int64",
+        "os": "string", "role": "string", "cpus": "int64", "ram_gb": "float64", "num_drives": "int64",
+        "storage_gb": "float64", "network_type": "string",
+    },
+    "questionnaire_responses": {
+        "response_id": "string", "respondent_id": "string", "submitted_at": "timestamp", "num_answers": "int64",
+        "user_agent": "string", "ip": "string",
+    },
+    "questionnaire_answers": {
+        "response_id": "string", "respondent_id": "string", "submitted_at": "timestamp", "question_id": "string",
+        "response": "string",
+    },
+}
+
+def table_schema(table: str) -> "pyarrow.Schema":
+    types = {
+        "string": pyarrow.string(), "int64": pyarrow.int64(), "float64": pyarrow.float64(),
+        "bool": pyarrow.bool_(), "timestamp": pyarrow.timestamp("ms"),
+    }
+    return pyarrow.schema([(column, types[kind]) for column, kind in TABLE_COLUMNS[table].items()])
+
+def flatten_survey(docs: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """lab_survey.responses -> submissions, labs and vms tables."""
+    submissions, labs, vms = [], [], []
+    for doc in docs:
+        submission_id = str(doc["_id"])
+        contact = doc.get("contact_info") or {}
+        course = doc.get("course_info") or {}
+        objectives = course.get("objectives") or {}
+        submissions.append({
+            "submission_id": submission_id,
+            "submitted_at": doc.get("submitted_at"),
+            "first_name": contact.get("first_name"),
+            "last_name": contact.get("last_name"),
+            "email": contact.get("email"),
+            "organization": contact.get("organization"),
+            "org_type": contact.get("org_type"),
+            "course_name": course.get("course_name"),
+            "course_duration": course.get("course_duration"),
+            "num_labs": course.get("num_labs"),
+            "developer": course.get("developer"),
+            "description": course.get("description"),
+            "objective_certification": objectives.get("certification"),
+            "objective_hands_on": objectives.get("hands_on"),
+            "objective_assessment": objectives.get("assessment"),
+            "objective_other": objectives.get("other"),
+        })
+        for lab_index, lab in enumerate(course.get("labs") or []):
+            labs.append({
+                "submission_id": submission_id,
+                "submitted_at": doc.get("submitted_at"),
+                "lab_index": lab_index,
+                "lab_name": lab.get("lab_name"),
+                "lab_type": lab.get("lab_type"),
+                "persistence": lab.get("persistence"),
+                "complexity": lab.get("complexity"),
+                "completion_date": lab.get("completion_date"),
+                "network_type": lab.get("network_type"),
+                "num_subnets": lab.get("num_subnets"),
+                "internet_access": lab.get("internet_access"),
+                "special_requirements": lab.get("special_requirements"),
+                "num_vms": len(lab.get("vms") or []),
+            })
+            for vm_index, vm in enumerate(lab.get("vms") or []):
+                drives = vm.get("drives") or []
+                vms.append({
+                    "submission_id": submission_id,
+                    "submitted_at": doc.get("submitted_at"),
+                    "lab_index": lab_index,
+                    "vm_index": vm_index,
+                    "os": vm.get("os"),
+                    "role": vm.get("role"),
+                    "cpus": vm.get("cpus"),
+                    "ram_gb": vm.get("ram"),
+                    "num_drives": len(drives),
+                    "storage_gb": sum(drives),
+                    "network_type": vm.get("network_type"),
+                })
+    return {"survey_submissions": submissions, "survey_labs": labs, "survey_vms": vms}
+
+def flatten_questionnaire(docs: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Product_Intake.questionnaire_responses -> responses and answers tables."""
+    responses, answers = [], []
+    for doc in docs:
+        response_id = str(doc["_id"])
+        metadata = doc.get("metadata") or {}
+        responses.append({
+            "response_id": response_id,
+            "respondent_id": doc.get("respondent_id"),
+            "submitted_at": doc.get("submitted_at"),
+            "num_answers": len(doc.get("responses") or []),
+            "user_agent": metadata.get("user_agent"),
+            "ip": metadata.get("ip"),
+        })
+        for answer in doc.get("responses") or []:
+            value = answer.get("response")
+            answers.append({
+                "response_id": response_id,
+                "respondent_id": doc.get("respondent_id"),
+                "submitted_at": doc.get("submitted_at"),
+                "question_id": str(answer.get("question_id")),
+                # Multi-select answers are lists; keep one string column for all types
+                "response": value if isinstance(value, str) else json.dumps(value, default=str),
+            })
+    return {"questionnaire_responses": responses, "questionnaire_answers": answers}
+
+class ParquetExporter:
+    """Incremental export of MongoDB collections to month-partitioned Parquet.
+
+    Each source keeps a (submitted_at, _id) high-water mark in the state file,
+    so a run only reads documents added since the previous one. Every chunk is
+    written as new part files under ``<table>/month=YYYY-MM/``, which readers
+    such as ``pd.read_parquet(path, columns=[...])`` treat as one dataset.
+    """
+
+    def __init__(self, export_dir: Path = EXPORT_DIR):
+        if pyarrow is None:
+            raise ImportError("pyarrow is required for ParquetExporter")
+        self.export_dir = Path(export_dir)
+        self.state_path = self.export_dir / STATE_FILE
+        self.state: Dict[str, Any] = json.loads(self.state_path.read_text()) if self.state_path.exists() else {}
+
+    def _save_state(self) -> None:
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.state, indent=2))
+        os.replace(tmp_path, self.state_path)
+
+    def _new_documents(self, collection, source: str) -> Iterator[Dict[str, Any]]:
+        mark = self.state.get(source)
+        query: Dict[str, Any] = {"submitted_at": {"$exists": True}}
+        if mark:
+            after = datetime.fromisoformat(mark["submitted_at"])
+            last_id = ObjectId(mark["_id"]) if ObjectId.is_valid(mark["_id"]) else mark["_id"]
+            query = {"$or": [
+                {"submitted_at": {"$gt": after}},
+                {"submitted_at": after, "_id": {"$gt": last_id}}
+            ]}
+        cursor = (collection.find(query)
+                  .sort([("submitted_at", ASCENDING), ("_id", ASCENDING)])
+                  .batch_size(CURSOR_BATCH_SIZE))
+        yield from cursor
+
+    def _write_tables(self, tables: Dict[str, List[Dict[str, Any]]], run_id: str) -> Dict[str, int]:
+        written = {}
+        for table, rows in tables.items():
+            if not rows:
+                continue
+            schema = table_schema(table)
+            df = pd.DataFrame(rows, columns=schema.names)
+            df["submitted_at"] = pd.to_datetime(df["submitted_at"])
+            for column in schema.names:
+                if TABLE_COLUMNS[table][column] == "string":
+                    # Free-text fields may hold numbers or other types in older documents
+                    df[column] = df[column].map(lambda v: None if v is None or v != v else str(v))
+            months = df["submitted_at"].dt.strftime("%Y-%m")
+            for month, part in df.groupby(months):
+                directory = self.export_dir / table / f"month={month}"
+                directory.mkdir(parents=True, exist_ok=True)
+                pq.write_table(pyarrow.Table.from_pandas(part, schema=schema, preserve_index=False),
+                               directory / f"part-{run_id}.parquet")
+            written[table] = len(df)
+        return written
+
+    def export(self, collection, source: str,
+               flatten: Callable[[List[Dict[str, Any]]], Dict[str, List[Dict[str, Any]]]]) -> Dict[str, int]:
+        """Export documents newer than the source's high-water mark; returns rows per table."""
+        totals: Dict[str, int] = {"documents": 0}
+        chunk: List[Dict[str, Any]] = []
+        chunk_number = 0
+        run = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+
+        def flush() -> None:
+            nonlocal chunk, chunk_number
+            if not chunk:
+                return
+            written = self._write_tables(flatten(chunk), f"{run}-{chunk_number:04d}")
+            for table, count in written.items():
+                totals[table] = totals.get(table, 0) + count
+            totals["documents"] += len(chunk)
+            # Advance the mark only after the chunk is on disk
+            last = chunk[-1]
+            self.state[source] = {"submitted_at": last["submitted_at"].isoformat(), "_id": str(last["_id"])}
+            self._save_state()
+            chunk, chunk_number = [], chunk_number + 1
+
+        for doc in self._new_documents(collection, source):
+            chunk.append(doc)
+            if len(chunk) >= CHUNK_DOCUMENTS:
+                flush()
+        flush()
+        return totals
+
+def read_table(table: str, columns: List[str] = None, export_dir: Path = EXPORT_DIR) -> pd.DataFrame:
+    """Load an exported table, reading only the requested columns."""
+    return pd.read_parquet(Path(export_dir) / table, columns=columns)
+
+def main():
+    parser = argparse.ArgumentParser(description="Export survey and questionnaire responses to Parquet")
+    parser.add_argument('-o', '--output', type=Path, default=EXPORT_DIR)
+    args = parser.parse_args()
+
+    exporter = ParquetExporter(args.output)
+    client = MongoClient(os.getenv("MONGODB_URI"))
+    sources: List[Tuple[str, Any, Callable]] = [
+        ("lab_survey.responses", client["lab_survey"].responses, flatten_survey),
+        ("Product_Intake.questionnaire_responses", client.get_database("Product_Intake").questionnaire_responses, flatten_questionnaire),
+    ]
+    for source, collection, flatten in sources:
+        started = time.perf_counter()
+        totals = exporter.export(collection, source, flatten)
+        tables = ", ".join(f"{t}: {n}" for t, n in totals.items() if t != "documents") or "nothing new"
+        print(f"✅ {source}: {totals['documents']} documents ({tables}) in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from bson import ObjectId
+from pymongo import IndexModel, ASCENDING, DESCENDING
+
+# Compound indexes for the reporting access patterns on lab_survey.responses.
+# Each filter field leads, with submitted_at (and _id as tie-breaker) after it so
+# the newest-first sort and keyset pagination are served by the same index.
+REPORT_INDEXES = [
+    IndexModel([("submitted_at", DESCENDING), ("_id", DESCENDING)], name="submitted_at"),
+    IndexModel([("contact_info.organization", ASCENDING), ("submitted_at", DESCENDING), ("_id", DESCENDING)],
+               name="organization_submitted_at"),
+    IndexModel([("contact_info.org_type", ASCENDING), ("submitted_at", DESCENDING), ("_id", DESCENDING)],
+               name="org_type_submitted_at"),
+    IndexModel([("course_info.developer", ASCENDING), ("submitted_at", DESCENDING), ("_id", DESCENDING)],
+               name="developer_submitted_at"),
+]
+
+# Only the fields a report row needs; the labs/VMs arrays never leave the server
+SUMMARY_PROJECTION = {
+    "submitted_at": 1,
+    "contact_info.first_name": 1,
+    "contact_info.last_name": 1,
+    "contact_info.email": 1,
+    "contact_info.organization": 1,
+    "contact_info.org_type": 1,
+    "course_info.course_name": 1,
+    "course_info.course_duration": 1,
+    "course_info.num_labs": 1,
+    "course_info.developer": 1,
+}
+
+MAX_PAGE_SIZE = 500
+
+def ensure_report_indexes(db) -> List[str]:
+    """Create the reporting indexes (a no-op for ones that already exist)."""
+    return db.responses.create_indexes(REPORT_INDEXES)
+
+def build_filter(organization: Optional[str] = None, org_type: Optional[str] = None,
+                 developer: Optional[str] = None, since: Optional[datetime] = None,
+                 until: Optional[datetime] = None) -> Dict[str, Any]:
+    query: Dict[str, Any] = {}
+    if organization:
+        query["contact_info.organization"] = organization
+    if org_type:
+        query["contact_info.org_type"] = org_type
+    if developer:
+        query["course_info.developer"] = developer
+    if since or until:
+        query["submitted_at"] = {}
+        if since:
+            query["submitted_at"]["$gte"] = since
+        if until:
+            query["submitted_at"]["$lt"] = until
+    return query
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    return f"{doc['submitted_at'].isoformat()}|{doc['_id']}"
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Keyset condition for everything after the row the cursor points at (newest first)."""
+    submitted_at, _id = cursor.split("|", 1)
+    submitted_at = datetime.fromisoformat(submitted_at)
+    _id = ObjectId(_id) if ObjectId.is_valid(_id) else _id
+    return {"$or": [
+        {"submitted_at": {"$lt": submitted_at}},
+        {"submitted_at": submitted_at, "_id": {"$lt": _id}}
+    ]}
+
+def to_summary(doc: Dict[str, Any]) -> Dict[str, Any]:
+    contact = doc.get("contact_info", {})
+    course = doc.get("course_info", {})
+    return {
+        "id": str(doc["_id"]),
+        "submitted_at": doc.get("submitted_at"),
+        "contact": f"{contact.get('first_name', '')} {contact.get('last_name', '')}".strip(),
+        "email": contact.get("email"),
+        "organization": contact.get("organization"),
+        "org_type": contact.get("org_type"),
+        "course_name": course.get("course_name"),
+        "course_duration": course.get("course_duration"),
+        "num_labs": course.get("num_labs"),
+        "developer": course.get("developer"),
+    }
+
+def query_submissions(db, organization: Optional[str] = None, org_type: Optional[str] = None,
+                      developer: Optional[str] = None, since: Optional[datetime] = None,
+                      until: Optional[datetime] = None, page_size: int = 50,
+                      cursor: Optional[str] = None) -> Dict[str, Any]:
+    """One page of submission summaries, newest first.
+
+    Pages are keyset-paginated on (submitted_at, _id): pass the returned
+    ``next_cursor`` to get the following page. Returns {'items', 'next_cursor'}.
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    query = build_filter(organization, org_type, developer, since, until)
+    if cursor:
+        query = {"$and": [query, decode_cursor(cursor)]} if query else decode_cursor(cursor)
+    docs = list(db.responses.find(query, SUMMARY_PROJECTION)
+                .sort([("submitted_at", DESCENDING), ("_id", DESCENDING)])
+                .limit(page_size + 1))
+    has_more = len(docs) > page_size
+    docs = docs[:page_size]
+    return {
+        "items": [to_summary(doc) for doc in docs],
+        "next_cursor": encode_cursor(docs[-1]) if has_more else None
+    }
+
+def count_submissions(db, **filters: Any) -> int:
+    return db.responses.count_documents(build_filter(**filters))
+
+def submissions_by(db, dimension: str, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Submission counts and latest submission per organization, org_type or developer."""
+    fields = {
+        "organization": "$contact_info.organization",
+        "org_type": "$contact_info.org_type",
+        "developer": "$course_info.developer",
+    }
+    pipeline = [
+        {"$match": build_filter(since=since)},
+        {"$group": {"_id": fields[dimension], "submissions": {"$sum": 1}, "latest": {"$max": "$submitted_at"}}},
+        {"$sort": {"submissions": -1}},
+        {"$project": {"_id": 0, dimension: "$_id", "submissions": 1, "latest": 1}}
+    ]
+    return list(db.responses.aggregate(pipeline))
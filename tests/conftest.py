@@ -0,0 +1,15 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The scripts live at the repository root rather than in a package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mock_openai_server import MockConfig, MockOpenAIServer
+
+@pytest.fixture
+def mock_server():
+    """A simulated API on a free port with no latency or failures until a test sets them."""
+    with MockOpenAIServer(MockConfig(seed=7), port=0) as server:
+        yield server
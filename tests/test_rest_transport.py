@@ -0,0 +1,143 @@
+import asyncio
+import time
+
+import pytest
+import requests
+
+from rest_transport import AsyncRestTransport, RestTransport, TimingRecorder, TransportError, backoff_delay
+
+def configure(server, **values):
+    requests.post(f"{server.base_url}/_mock/config", json=values).raise_for_status()
+
+def hits(server, route, status=200):
+    return server.stats[route][str(status)]
+
+def make_transport(server, **kwargs):
+    kwargs.setdefault("initial_delay", 0.01)
+    kwargs.setdefault("max_delay", 0.5)
+    return RestTransport(api_key="test", base_url=server.base_url, **kwargs)
+
+def test_backoff_delay_prefers_retry_after():
+    assert backoff_delay(3, "0.25") == 0.25
+    assert backoff_delay(1, "120", max_delay=2.0) == 2.0
+    assert 0 <= backoff_delay(3, "soon", initial_delay=0.1) <= 0.4
+
+def test_rate_limited_request_waits_for_retry_after(mock_server):
+    configure(mock_server, rate_limit_rpm=600, burst=1)
+    recorder = TimingRecorder()
+    with make_transport(mock_server, hooks=[recorder]) as transport:
+        transport.get("assistants")
+        started = time.perf_counter()
+        assert transport.get("assistants")["object"] == "list"
+        waited = time.perf_counter() - started
+
+    statuses = [t.status for t in recorder.timings]
+    assert statuses[0] == 200 and statuses[-1] == 200 and 429 in statuses
+    # Retry-After is 0.1s at 600 rpm, well above the 0.01s backoff base
+    assert waited >= 0.09
+    assert hits(mock_server, "assistants.list", 429) >= 1
+
+def test_get_retries_server_errors_then_gives_up(mock_server):
+    configure(mock_server, failure_rate=1.0, failure_statuses=[500])
+    with make_transport(mock_server, max_retries=2) as transport:
+        with pytest.raises(TransportError) as excinfo:
+            transport.get("assistants")
+    assert excinfo.value.status == 500
+    assert hits(mock_server, "assistants.list", 500) == 3
+
+def test_post_retries_503(mock_server):
+    configure(mock_server, endpoint_failure_rate={"assistants.create": 1.0}, failure_statuses=[503])
+    with make_transport(mock_server, max_retries=2) as transport:
+        with pytest.raises(TransportError):
+            transport.post("assistants", json={"model": "gpt-4o"})
+    assert hits(mock_server, "assistants.create", 503) == 3
+
+def test_post_does_not_retry_500(mock_server):
+    configure(mock_server, endpoint_failure_rate={"assistants.create": 1.0}, failure_statuses=[500])
+    with make_transport(mock_server, max_retries=2) as transport:
+        with pytest.raises(TransportError) as excinfo:
+            transport.post("assistants", json={"model": "gpt-4o"})
+    assert excinfo.value.status == 500
+    assert hits(mock_server, "assistants.create", 500) == 1
+
+def test_get_read_timeout_is_retried(mock_server):
+    configure(mock_server, endpoint_latency_ms={"assistants.list": 300})
+    recorder = TimingRecorder()
+    with make_transport(mock_server, timeout=(1.0, 0.1), max_retries=1, hooks=[recorder]) as transport:
+        with pytest.raises(TransportError) as excinfo:
+            transport.get("assistants")
+    assert excinfo.value.status is None
+    assert [t.attempt for t in recorder.timings] == [1, 2]
+    assert all(t.error for t in recorder.timings)
+
+def test_post_read_timeout_is_not_resent(mock_server):
+    configure(mock_server, endpoint_latency_ms={"assistants.create": 300})
+    recorder = TimingRecorder()
+    with make_transport(mock_server, timeout=(1.0, 0.1), max_retries=3, hooks=[recorder]) as transport:
+        with pytest.raises(TransportError):
+            transport.post("assistants", json={"model": "gpt-4o"})
+        assert len(recorder.timings) == 1
+        # The server still finishes the create after the client gave up on it
+        time.sleep(0.4)
+        assert len(transport.get("assistants")["data"]) == 1
+
+def test_post_retries_connection_errors(mock_server):
+    mock_server.stop()
+    recorder = TimingRecorder()
+    with make_transport(mock_server, timeout=(0.2, 0.2), max_retries=2, hooks=[recorder]) as transport:
+        with pytest.raises(TransportError):
+            transport.post("assistants", json={"model": "gpt-4o"})
+    assert [t.attempt for t in recorder.timings] == [1, 2, 3]
+
+def test_timing_hooks_see_every_attempt(mock_server):
+    configure(mock_server, latency_ms=20)
+    recorder = TimingRecorder()
+    calls = []
+
+    def broken_hook(timing):
+        raise RuntimeError("hook failure must not break the request")
+
+    with make_transport(mock_server, hooks=[broken_hook, recorder, calls.append]) as transport:
+        transport.post("assistants", json={"model": "gpt-4o"})
+        transport.get("assistants")
+
+    assert [(t.method, t.path, t.status) for t in calls] == [("POST", "assistants", 200), ("GET", "assistants", 200)]
+    assert all(t.elapsed >= 0.015 for t in calls)
+    summary = recorder.summary()
+    assert summary["requests"] == 2 and summary["retries"] == 0 and summary["errors"] == 0
+    assert summary["p50_ms"] >= 15
+    assert calls[0].as_dict()["elapsed_ms"] == round(calls[0].elapsed * 1000, 3)
+
+def test_async_gather_runs_calls_concurrently(mock_server):
+    configure(mock_server, latency_ms=100)
+    calls = [{"method": "POST", "path": "assistants", "json": {"model": "gpt-4o", "name": str(i)}} for i in range(8)]
+
+    async def run():
+        async with AsyncRestTransport(make_transport(mock_server), max_concurrency=8) as transport:
+            started = time.perf_counter()
+            results = await transport.gather(calls)
+            return results, time.perf_counter() - started
+
+    results, elapsed = asyncio.run(run())
+    assert [r["name"] for r in results] == [str(i) for i in range(8)]
+    # Eight sequential calls would take at least 0.8s
+    assert elapsed < 0.5
+
+def test_async_retries_and_reports_errors(mock_server):
+    configure(mock_server, rate_limit_rpm=600, burst=1, endpoint_failure_rate={"assistants.create": 1.0},
+              failure_statuses=[500])
+    recorder = TimingRecorder()
+
+    async def run():
+        async with AsyncRestTransport(make_transport(mock_server, hooks=[recorder]), max_concurrency=2) as transport:
+            return await transport.gather([
+                {"method": "GET", "path": "assistants"},
+                {"method": "GET", "path": "assistants"},
+                {"method": "POST", "path": "assistants", "json": {"model": "gpt-4o"}},
+            ])
+
+    listed, relisted, created = asyncio.run(run())
+    assert listed["object"] == "list" and relisted["object"] == "list"
+    assert isinstance(created, TransportError) and created.status == 500
+    assert any(t.status == 429 for t in recorder.timings)
+    assert hits(mock_server, "assistants.create", 500) == 1
@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import uuid
+import threading
+import traceback
+import contextvars
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Iterator
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # opentelemetry is optional; OpenTelemetryExporter needs it
+    otel_trace = None
+
+# Span currently open in this task/thread, so nested code can annotate it
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+class Span:
+    """One timed stage of a trace."""
+
+    def __init__(self, trace_id: str, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = dict(attributes)
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[Dict[str, str]] = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def record_error(self, exc: BaseException) -> None:
+        self.status = "error"
+        self.error = {
+            "type": type(exc).__name__,
+            "message": str(exc),
+            "traceback": "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+        }
+
+    def finish(self) -> None:
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def record_usage(usage: Any) -> None:
+    """Attach an OpenAI usage object to the current span, if any."""
+    span = current_span()
+    if span is None or usage is None:
+        return
+    span.set(
+        prompt_tokens=getattr(usage, "prompt_tokens", None),
+        completion_tokens=getattr(usage, "completion_tokens", None),
+        total_tokens=getattr(usage, "total_tokens", None)
+    )
+
+class JsonlExporter:
+    """Append finished traces to a local JSONL file, one span per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        with self.lock, open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+class OpenTelemetryExporter:
+    """Replay finished spans into an OpenTelemetry tracer so any OTel exporter can ship them."""
+
+    def __init__(self, tracer_name: str = "agents"):
+        if otel_trace is None:
+            raise ImportError("opentelemetry-api is required for OpenTelemetryExporter")
+        self.tracer = otel_trace.get_tracer(tracer_name)
+
+    def export(self, spans: List[Span]) -> None:
+        by_id = {span.span_id: span for span in spans}
+        contexts: Dict[str, Any] = {}
+        # Parents start before their children, so start-time order lets us link them
+        for span in sorted(spans, key=lambda s: s.start_time):
+            parent = contexts.get(span.parent_id) if span.parent_id in by_id else None
+            start_ns = int(span.start_time * 1e9)
+            otel_span = self.tracer.start_span(span.name, context=parent, start_time=start_ns)
+            for key, value in span.attributes.items():
+                if value is not None:
+                    otel_span.set_attribute(key, value if isinstance(value, (str, bool, int, float)) else str(value))
+            if span.error:
+                otel_span.set_attribute("error.type", span.error["type"])
+                otel_span.set_attribute("error.message", span.error["message"])
+                otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, span.error["message"]))
+            contexts[span.span_id] = otel_trace.set_span_in_context(otel_span)
+            otel_span.end(end_time=start_ns + int((span.duration_ms or 0) * 1e6))
+
+class Trace:
+    """Spans recorded for one request; exported when the root span closes."""
+
+    def __init__(self, tracer: "Tracer"):
+        self.tracer = tracer
+        self.trace_id = uuid.uuid4().hex
+        self.spans: List[Span] = []
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        parent = current_span()
+        span = Span(self.trace_id, name, parent.span_id if parent and parent.trace_id == self.trace_id else None, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_error(exc)
+            raise
+        finally:
+            span.finish()
+            _current_span.reset(token)
+            self.spans.append(span)
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact per-stage timings, token totals and cache status for AgentResult."""
+        root = next((s for s in self.spans if s.parent_id is None), None)
+        total_tokens = sum(s.attributes.get("total_tokens") or 0 for s in self.spans)
+        return {
+            "trace_id": self.trace_id,
+            "total_ms": root.duration_ms if root else None,
+            "stages": [
+                {
+                    "name": s.name,
+                    "duration_ms": s.duration_ms,
+                    "status": s.status,
+                    **{k: s.attributes[k] for k in ("cache", "total_tokens") if k in s.attributes}
+                }
+                for s in sorted(self.spans, key=lambda s: s.start_time)
+            ],
+            "total_tokens": total_tokens,
+            "errors": [{"span": s.name, **{k: s.error[k] for k in ("type", "message")}} for s in self.spans if s.error],
+        }
+
+    def export(self) -> None:
+        for exporter in self.tracer.exporters:
+            try:
+                exporter.export(self.spans)
+            except Exception as e:
+                # Tracing must never break the request it observes
+                print(f"Trace export failed ({type(exporter).__name__}): {str(e)}")
+
+class Tracer:
+    """Creates traces and hands finished ones to the configured exporters."""
+
+    def __init__(self, exporters: Optional[List[Any]] = None):
+        self.exporters = exporters or []
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """AGENT_TRACE_FILE enables JSONL export; AGENT_TRACE_OTEL=1 enables OpenTelemetry."""
+        exporters: List[Any] = []
+        if os.getenv("AGENT_TRACE_FILE"):
+            exporters.append(JsonlExporter(os.environ["AGENT_TRACE_FILE"]))
+        if os.getenv("AGENT_TRACE_OTEL") == "1" and otel_trace is not None:
+            exporters.append(OpenTelemetryExporter())
+        return cls(exporters)
+
+    def start_trace(self) -> Trace:
+        return Trace(self)
@@ -2,6 +2,8 @@ import os
 import json
 from openai import OpenAI
 from dotenv import load_dotenv
+from vector_store_builder import VectorStoreBuilder, fetch_file_metadata
+from deployment_registry import load_registry, DEFAULT_DEPLOYMENT
 
 # Load environment variables
 load_dotenv()
@@ -12,10 +14,16 @@ class AssistantUpdater:
         self.assistant_id = assistant_id
         self.assistant = None
         self.vector_store_id = None
+        self.builder = VectorStoreBuilder(self.client)
+        self.registry = load_registry()
+        self.fingerprint = None
         self.report = {
             'current_files': [],
             'new_assistant_id': None,
             'vector_store_id': None,
+            'vector_store_reused': False,
+            'vector_store_build': None,
+            'deployment_version': None,
             'errors': []
         }
     
@@ -32,18 +40,18 @@ class AssistantUpdater:
             current_file_ids = getattr(self.assistant, 'file_ids', [])
             if current_file_ids:
                 print("\nCurrent files in assistant:")
-                for file_id in current_file_ids:
-                    try:
-                        file_info = self.client.files.retrieve(file_id)
-                        print(f"- {getattr(file_info, 'filename', 'unknown')} ({file_id})")
-                        self.report['current_files'].append({
-                            'id': file_id,
-                            'filename': getattr(file_info, 'filename', 'unknown')
-                        })
-                    except Exception as e:
-                        error = f"Error retrieving file {file_id}: {str(e)}"
+                # Metadata lookups run concurrently; results keep the original order
+                for file_id, file_info in fetch_file_metadata(self.client, current_file_ids).items():
+                    if isinstance(file_info, Exception):
+                        error = f"Error retrieving file {file_id}: {str(file_info)}"
                         print(f"  ❌ {error}")
                         self.report['errors'].append(error)
+                        continue
+                    print(f"- {getattr(file_info, 'filename', 'unknown')} ({file_id})")
+                    self.report['current_files'].append({
+                        'id': file_id,
+                        'filename': getattr(file_info, 'filename', 'unknown')
+                    })
             else:
                 print("No files currently attached to the assistant.")
                 
@@ -56,21 +64,33 @@ class AssistantUpdater:
             return False
     
     def create_vector_store(self, file_ids, name="Lab Intake Documents"):
-        """Create a new vector store with the given files."""
+        """Get a fully indexed vector store for the given files.
+        
+        A store already built from the same file set is reused; otherwise a new
+        one is built and waited on. Returns None if indexing fails or times out,
+        so callers never point an assistant at a half-built store.
+        """
         try:
-            print(f"\nCreating vector store with {len(file_ids)} files...")
+            print(f"\nPreparing vector store with {len(file_ids)} files...")
             
-            # Create the vector store
-            vector_store = self.client.beta.vector_stores.create(
-                name=name,
-                file_ids=file_ids
-            )
+            store = self.registry.ensure_vector_store(self.client, file_ids, name, builder=self.builder)
+            self.fingerprint = store['fingerprint']
+            self.vector_store_id = store['vector_store_id']
+            self.report['vector_store_id'] = store['vector_store_id']
+            self.report['vector_store_reused'] = store['reused']
+            
+            if store['reused']:
+                print(f"✅ Reusing vector store {store['vector_store_id']} (file set unchanged)")
+                return store['vector_store_id']
             
-            self.vector_store_id = vector_store.id
-            self.report['vector_store_id'] = vector_store.id
-            print(f"✅ Vector store created: {vector_store.id}")
+            build = store['build']
+            self.report['vector_store_build'] = build
+            for file_id, seconds in sorted(build['file_times'].items(), key=lambda item: item[1]):
+                print(f"  - {file_id}: indexed in {seconds:.1f}s")
+            print(f"✅ Vector store ready: {store['vector_store_id']} "
+                  f"({build['file_counts']['completed']} files in {build['wall_time']:.1f}s)")
             
-            return vector_store.id
+            return store['vector_store_id']
             
         except Exception as e:
             error = f"Error creating vector store: {str(e)}"
@@ -78,28 +98,46 @@ class AssistantUpdater:
             self.report['errors'].append(error)
             return None
     
-    def update_assistant(self, vector_store_id):
-        """Update the assistant with the new vector store."""
+    def deploy(self, assistant_id, vector_store_id, file_ids):
+        """Make this assistant / vector store the active lab intake version."""
+        version = self.registry.deploy(DEFAULT_DEPLOYMENT, assistant_id, vector_store_id, self.fingerprint,
+                                       file_ids=file_ids, source='update_lab_intake_assistant')
+        self.report['deployment_version'] = version
+        print(f"✅ Activated {DEFAULT_DEPLOYMENT} {version}; the previous version is kept for rollback")
+        # Versions that fell out of the registry take their assistants and stores with them
+        for resource_id in self.registry.release(self.client.beta.assistants.delete, self.client.beta.vector_stores.delete):
+            print(f"🧹 Deleted retired {resource_id}")
+        return version
+    
+    def copy_assistant(self, vector_store_id):
+        """Create a copy of the current assistant that searches the given vector store.
+        
+        The current assistant is left untouched, so sessions already pinned to it
+        keep their store and it stays a valid rollback target.
+        """
         try:
-            print("\nUpdating assistant with new vector store...")
+            print("\nCreating a copy of the assistant on the new vector store...")
             
-            # Update the assistant with the new vector store
-            updated_assistant = self.client.beta.assistants.update(
-                self.assistant_id,
+            assistant = self.client.beta.assistants.create(
+                name=self.assistant.name,
+                instructions=self.assistant.instructions,
+                tools=[{"type": "file_search"}],
                 tool_resources={
                     "file_search": {
                         "vector_store_ids": [vector_store_id]
                     }
-                }
+                },
+                model=self.assistant.model
             )
             
-            print(f"✅ Assistant updated successfully!")
-            print(f"New tool_resources: {updated_assistant.tool_resources}")
+            self.report['new_assistant_id'] = assistant.id
+            print(f"✅ Assistant created: {assistant.id}")
+            print(f"New tool_resources: {assistant.tool_resources}")
             
-            return updated_assistant
+            return assistant
             
         except Exception as e:
-            error = f"Error updating assistant: {str(e)}"
+            error = f"Error creating assistant: {str(e)}"
             print(f"❌ {error}")
             self.report['errors'].append(error)
             return None
@@ -145,14 +183,14 @@ class AssistantUpdater:
         print(f"\nReport saved to 'assistant_update_report.json'")
 
 def main():
-    # Lab Intake Assistant ID
-    assistant_id = "asst_cqEaz3Mj84w9WuOPDVr9mbch"
-    
     print("=== Lab Intake Assistant Updater ===")
     print("This script will help you update your Lab Intake Assistant with the latest files.")
     
-    # Initialize the updater
-    updater = AssistantUpdater(assistant_id)
+    # Initialize the updater with the active Lab Intake Assistant
+    updater = AssistantUpdater()
+    active = updater.registry.active(DEFAULT_DEPLOYMENT)
+    assistant_id = active['assistant_id'] if active else "asst_cqEaz3Mj84w9WuOPDVr9mbch"
+    updater.assistant_id = assistant_id
     
     # Get current assistant info
     if not updater.get_assistant():
@@ -185,7 +223,7 @@ def main():
     # Ask user what to do
     print("\nOptions:")
     print("1. Create a new assistant with the cleaned files")
-    print("2. Update the existing assistant with a new vector store")
+    print("2. Copy the existing assistant onto a new vector store")
     print("3. Just show the current files (no changes)")
     
     choice = input("\nEnter your choice (1-3): ")
@@ -201,10 +239,14 @@ def main():
         if new_assistant:
             print(f"\n✅ New assistant created successfully!")
             print(f"Assistant ID: {new_assistant.id}")
+            updater.deploy(new_assistant.id, updater.vector_store_id, file_ids_to_keep)
             
-            # Option to delete the old assistant
-            delete_old = input("\nDelete the old assistant? (y/n): ")
-            if delete_old.lower() == 'y':
+            # An old assistant the registry holds is the rollback target; anything else may be deleted
+            standby = updater.registry.standby(DEFAULT_DEPLOYMENT)
+            if standby and standby['assistant_id'] == assistant_id:
+                print(f"ℹ️ Old assistant {assistant_id} kept as {standby['version']} for rollback "
+                      f"(python deployment_registry.py rollback {DEFAULT_DEPLOYMENT})")
+            elif not updater.registry.references(assistant_id) and input("\nDelete the old assistant? (y/n): ").lower() == 'y':
                 try:
                     updater.client.beta.assistants.delete(assistant_id)
                     print(f"✅ Deleted old assistant: {assistant_id}")
@@ -212,16 +254,22 @@ def main():
                     print(f"❌ Error deleting old assistant: {str(e)}")
     
     elif choice == "2":
-        # Update existing assistant with a new vector store
+        # Same model and instructions on a new vector store; the current assistant becomes the standby
         vector_store_id = updater.create_vector_store(
             file_ids=file_ids_to_keep,
             name="Lab Intake Documents"
         )
         
         if vector_store_id:
-            updated = updater.update_assistant(vector_store_id)
-            if updated:
+            new_assistant = updater.copy_assistant(vector_store_id)
+            if new_assistant:
+                updater.deploy(new_assistant.id, vector_store_id, file_ids_to_keep)
                 print(f"\n✅ Assistant updated successfully!")
+                print(f"Assistant ID: {new_assistant.id}")
+                standby = updater.registry.standby(DEFAULT_DEPLOYMENT)
+                if standby and standby['assistant_id'] == assistant_id:
+                    print(f"ℹ️ Old assistant {assistant_id} kept as {standby['version']} for rollback "
+                          f"(python deployment_registry.py rollback {DEFAULT_DEPLOYMENT})")
     
     elif choice == "3":
         print("\nCurrent files have been listed above. No changes were made.")
@@ -1,6 +1,7 @@
 from pymongo import MongoClient
 from dotenv import load_dotenv
 import os
+from questionnaire_sync import sync_questions, print_sync_summary
 
 # Load environment variables
 load_dotenv()
@@ -55,17 +56,15 @@ try:
     client = MongoClient(connection_string)
     db = client.get_database("Product_Intake")
     
-    # Clear existing questions
-    db.questionnaire_questions.delete_many({})
-    
-    # Insert all questions with order
+    # Build all questions with order
     question_docs = [
         {"order": i+1, "question": q, "type": "text"} 
         for i, q in enumerate(questions)
     ]
     
-    result = db.questionnaire_questions.insert_many(question_docs)
-    print(f"Successfully inserted {len(result.inserted_ids)} questions")
+    # Apply only the changed questions
+    changes = sync_questions(db, "questionnaire_questions", question_docs)
+    print_sync_summary(changes)
     
     # Verify count
     count = db.questionnaire_questions.count_documents({})
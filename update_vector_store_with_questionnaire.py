@@ -1,12 +1,13 @@
 import os
-import json
-import pandas as pd
+import sys
+import hashlib
 from openai import OpenAI
 from dotenv import load_dotenv
 from pymongo import MongoClient
 from pathlib import Path
 from typing import List, Dict, Any
 import tempfile
+from deployment_registry import load_registry
 
 # Load environment variables
 load_dotenv()
@@ -16,6 +17,8 @@ client = OpenAI()
 mongo_client = MongoClient(os.getenv("MONGODB_URI"))
 db = mongo_client.get_database("Product_Intake")
 
+DEPLOYMENT_NAME = "questionnaire"
+
 def get_questionnaire_data() -> List[Dict[str, Any]]:
     """Retrieve questionnaire data from MongoDB."""
     questions = list(db.aci_questionnaire.find().sort("order", 1))
@@ -32,76 +35,110 @@ def format_question_for_embedding(question: Dict[str, Any]) -> Dict[str, str]:
     }
     return formatted
 
-def create_temporary_file(questions: List[Dict[str, Any]]) -> Path:
-    """Create a temporary file with the questionnaire data."""
+def format_questionnaire_text(questions: List[Dict[str, Any]]) -> str:
+    """Render the questionnaire as the plain text that gets uploaded."""
     # Format questions for embedding
     formatted_questions = [format_question_for_embedding(q) for q in questions]
     
-    # Create a temporary file with .txt extension
-    temp_file = tempfile.NamedTemporaryFile(suffix='.txt', delete=False, mode='w', encoding='utf-8')
-    
     # Write formatted text (one question per line with options)
+    parts = []
     for q in formatted_questions:
-        temp_file.write(f"Question {q['order']}: {q['question']}\n")
+        parts.append(f"Question {q['order']}: {q['question']}\n")
         if q['options'] != "N/A":
-            temp_file.write(f"Options: {q['options']}\n")
-        temp_file.write("\n" + "-" * 50 + "\n\n")
-    
+            parts.append(f"Options: {q['options']}\n")
+        parts.append("\n" + "-" * 50 + "\n\n")
+    return "".join(parts)
+
+def fingerprint(text: str) -> str:
+    """Content hash used to decide whether the questionnaire needs re-uploading."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def create_temporary_file(text: str) -> Path:
+    """Create a temporary file with the formatted questionnaire text."""
+    # Create a temporary file with .txt extension
+    temp_file = tempfile.NamedTemporaryFile(suffix='.txt', delete=False, mode='w', encoding='utf-8')
+    temp_file.write(text)
     temp_file.close()
     return Path(temp_file.name)
 
-def upload_to_vector_store(file_path: Path) -> str:
-    """Upload the file to OpenAI's vector store."""
-    try:
-        # Upload the file
-        with open(file_path, "rb") as f:
-            file = client.files.create(file=f, purpose="assistants")
-        
-        print(f"✅ File uploaded with ID: {file.id}")
-        
-        # Create an assistant with file search capability
-        print("Creating assistant with file search capability...")
-        
-        assistant = client.beta.assistants.create(
-            name="Lab Intake Questionnaire Assistant",
-            instructions="""You are a helpful assistant that provides information about the lab intake questionnaire.
-            Use the provided file to answer questions about the questionnaire structure and content.
-            
-            When providing information, be clear and specific about which question you're referring to.
-            """,
-            tools=[{"type": "file_search"}],
-            model="gpt-4-turbo-preview"
-        )
-        
-        print(f"✅ Assistant created with ID: {assistant.id}")
-        
-        # Save the assistant and file IDs
-        ids_file = Path("vector_store_ids.json")
-        if ids_file.exists():
-            with open(ids_file, 'r') as f:
-                ids = json.load(f)
-        else:
-            ids = {}
-        
-        ids['questionnaire'] = {
-            'assistant_id': assistant.id,
-            'file_id': file.id,
-            'description': 'Lab intake questionnaire with questions and options',
-            'timestamp': pd.Timestamp.now().isoformat()
-        }
-        
-        with open(ids_file, 'w') as f:
-            json.dump(ids, f, indent=2)
-        
-        print(f"✅ Configuration saved to {ids_file}")
-        return assistant.id
+def build_vector_store(registry, file_id: str, content_hash: str) -> str:
+    """Index the uploaded questionnaire into a new vector store and wait until it is ready."""
+    registry.forget_vector_store(content_hash)
+    store = registry.ensure_vector_store(client, [file_id], "Lab Intake Questionnaire", fingerprint=content_hash)
+    print(f"✅ Vector store ready: {store['vector_store_id']} ({store['build']['wall_time']:.1f}s)")
+    return store['vector_store_id']
+
+def create_assistant(vector_store_id: str) -> str:
+    """Create the questionnaire assistant for a vector store; the live one is never modified."""
+    print("Creating assistant with file search capability...")
+    assistant = client.beta.assistants.create(
+        name="Lab Intake Questionnaire Assistant",
+        instructions="""You are a helpful assistant that provides information about the lab intake questionnaire.
+        Use the provided file to answer questions about the questionnaire structure and content.
         
-    except Exception as e:
-        print(f"❌ Error updating vector store: {e}")
-        raise
+        When providing information, be clear and specific about which question you're referring to.
+        """,
+        tools=[{"type": "file_search"}],
+        tool_resources={"file_search": {"vector_store_ids": [vector_store_id]}},
+        model="gpt-4-turbo-preview"
+    )
+    print(f"✅ Assistant created with ID: {assistant.id}")
+    return assistant.id
+
+def sync_questionnaire(text: str, force: bool = False) -> Dict[str, Any]:
+    """Deploy the questionnaire as a new version only when its content hash changed.
+
+    The new file, vector store and assistant are built next to the active
+    version, which keeps serving until indexing has finished; only then is
+    the active pointer switched, so the previous version stays intact for
+    rollback. Returns the active questionnaire version from the deployment
+    registry.
+    """
+    registry = load_registry()
+    record = registry.active(DEPLOYMENT_NAME) or {}
+    content_hash = fingerprint(text)
+
+    if not force and record.get('fingerprint') == content_hash and record.get('vector_store_id'):
+        print(f"✅ Questionnaire unchanged ({content_hash[:12]}), nothing to upload")
+        return record
+
+    # A store built earlier from the same content (e.g. before a rollback) is reused as is
+    vector_store_id = None if force else registry.find_vector_store(client, content_hash)
+    if vector_store_id:
+        file_id = registry.recorded_file_ids(content_hash)[0]
+        print(f"✅ Reusing vector store {vector_store_id} built from this content")
+    else:
+        temp_file = create_temporary_file(text)
+        try:
+            # Upload the file
+            with open(temp_file, "rb") as f:
+                file_id = client.files.create(file=f, purpose="assistants").id
+            print(f"✅ File uploaded with ID: {file_id}")
+        finally:
+            temp_file.unlink(missing_ok=True)
+        try:
+            vector_store_id = build_vector_store(registry, file_id, content_hash)
+        except Exception:
+            # Nothing was activated; drop the upload so failed attempts do not pile up
+            client.files.delete(file_id)
+            raise
+
+    assistant_id = create_assistant(vector_store_id)
+
+    version = registry.deploy(
+        DEPLOYMENT_NAME, assistant_id, vector_store_id, content_hash,
+        file_id=file_id,
+        description='Lab intake questionnaire with questions and options'
+    )
+    print(f"✅ Activated {DEPLOYMENT_NAME} {version}")
+    released = registry.release(client.beta.assistants.delete, client.beta.vector_stores.delete, client.files.delete)
+    for resource_id in released:
+        print(f"🧹 Deleted retired {resource_id}")
+    return registry.active(DEPLOYMENT_NAME)
 
 def main():
-    print("🚀 Starting vector store update with questionnaire data...")
+    print("🚀 Starting vector store sync with questionnaire data...")
+    force = "--force" in sys.argv
     
     try:
         # 1. Get questionnaire data from MongoDB
@@ -109,31 +146,21 @@ def main():
         questions = get_questionnaire_data()
         print(f"✅ Retrieved {len(questions)} questions")
         
-        # 2. Create temporary file with formatted data
-        print("\n📄 Creating temporary file with formatted data...")
-        temp_file = create_temporary_file(questions)
-        print(f"✅ Temporary file created at: {temp_file}")
+        # 2. Format and fingerprint the questionnaire
+        text = format_questionnaire_text(questions)
         
-        # 3. Upload to vector store
-        print("\n⬆️  Uploading to vector store...")
-        vector_store_id = upload_to_vector_store(temp_file)
+        # 3. Sync to the vector store
+        print("\n⬆️  Syncing to vector store...")
+        record = sync_questionnaire(text, force=force)
         
-        print(f"\n🎉 Success! Vector store updated with questionnaire data.")
-        print(f"   Vector Store ID: {vector_store_id}")
+        print(f"\n🎉 Success! Vector store is in sync with the questionnaire.")
+        print(f"   Vector Store ID: {record['vector_store_id']}")
+        print(f"   Assistant ID: {record['assistant_id']}")
         
     except Exception as e:
         print(f"\n❌ Error: {e}")
         import traceback
         traceback.print_exc()
-        
-    finally:
-        # Clean up temporary file
-        if 'temp_file' in locals() and temp_file.exists():
-            try:
-                temp_file.unlink()
-                print(f"\n🧹 Cleaned up temporary file: {temp_file}")
-            except Exception as e:
-                print(f"\n⚠️  Warning: Could not remove temporary file: {e}")
 
 if __name__ == "__main__":
     main()
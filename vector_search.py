@@ -1,9 +1,11 @@
 import os
-import time
 import streamlit as st
 from openai import OpenAI
 from dotenv import load_dotenv
-import time
+import hashlib
+from pathlib import Path
+from search_cache import SearchCache
+from file_search import search_documents
 
 # Load environment variables
 load_dotenv()
@@ -29,12 +31,60 @@ client = get_openai_client()
 # Get vector store ID from environment variables
 VECTOR_STORE_ID = os.getenv("VECTOR_STORE_ID")
 
+# Search result cache settings
+SEARCH_CACHE_PATH = Path(os.getenv("SEARCH_CACHE_PATH", ".cache/search_cache.sqlite3"))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "3600"))
+# Set e.g. SEARCH_CACHE_SIMILARITY=0.92 to serve near-duplicate queries via embeddings
+SEARCH_CACHE_SIMILARITY = os.getenv("SEARCH_CACHE_SIMILARITY")
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+def embed_query(text):
+    response = client.embeddings.create(model=EMBEDDING_MODEL, input=text)
+    return response.data[0].embedding
+
+@st.cache_resource
+def get_search_cache():
+    return SearchCache(
+        ttl_seconds=SEARCH_CACHE_TTL,
+        db_path=SEARCH_CACHE_PATH,
+        embed=embed_query if SEARCH_CACHE_SIMILARITY else None,
+        similarity_threshold=float(SEARCH_CACHE_SIMILARITY or 0.92)
+    )
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_vector_store_version(vector_store_id):
+    """Fingerprint the vector store's file ids; cached briefly to keep lookups cheap"""
+    file_ids = sorted(f.id for f in client.beta.vector_stores.files.list(vector_store_id=vector_store_id, limit=100))
+    return hashlib.sha256(",".join(file_ids).encode("utf-8")).hexdigest()
+
 # Initialize session state
 if 'search_results' not in st.session_state:
     st.session_state.search_results = []
 
-# Function to search vector store
+# Function to search vector store, serving repeated queries from the cache
 def search_vector_store(query, limit=5):
+    if not VECTOR_STORE_ID:
+        return run_file_search(query, limit)
+    try:
+        cache = get_search_cache()
+        store_version = get_vector_store_version(VECTOR_STORE_ID)
+        cache.observe_store_version(VECTOR_STORE_ID, store_version)
+        cached = cache.get(query, VECTOR_STORE_ID, limit, store_version)
+    except Exception as e:
+        # The cache is an optimization; fall back to a live search
+        print(f"Search cache unavailable: {str(e)}")
+        return run_file_search(query, limit)
+    if cached is not None:
+        return cached
+
+    results = run_file_search(query, limit)
+    # Only cache real answers, not errors or empty placeholders
+    if results and results[0]['id'] not in ('no_vector_store', 'no_results'):
+        cache.put(query, VECTOR_STORE_ID, limit, store_version, results)
+    return results
+
+# Run a file-search query through a temporary assistant
+def run_file_search(query, limit=5):
     try:
         if not VECTOR_STORE_ID:
             return [{
@@ -44,116 +94,7 @@ def search_vector_store(query, limit=5):
                 'score': 0
             }]
         
-        # Create an assistant with file search capability
-        assistant = client.beta.assistants.create(
-            name="Comprehensive Document Searcher",
-            instructions="""Return ALL relevant search results from the documents. For each result:
-            1. Include the full text of the matching content
-            2. Separate each result with two newlines
-            3. Do not summarize or combine results
-            4. Include as many results as match the query
-            """,
-            model="gpt-4-turbo-preview",
-            tools=[{"type": "file_search"}],
-            tool_resources={
-                "file_search": {
-                    "vector_store_ids": [VECTOR_STORE_ID]
-                }
-            }
-        )
-        
-        # Create a thread with the vector store
-        thread = client.beta.threads.create(
-            tool_resources={
-                "file_search": {
-                    "vector_store_ids": [VECTOR_STORE_ID]
-                }
-            }
-        )
-        
-        # Add the user's message
-        message = client.beta.threads.messages.create(
-            thread_id=thread.id,
-            role="user",
-            content=query
-        )
-        
-        # Add the user's message
-        message = client.beta.threads.messages.create(
-            thread_id=thread.id,
-            role="user",
-            content=query
-        )
-        
-        # First, create the run
-        run = client.beta.threads.runs.create(
-            thread_id=thread.id,
-            assistant_id=assistant.id,
-            max_completion_tokens=4000,
-            tool_choice={"type": "file_search"}
-        )
-        
-        # Then poll for completion
-        run = client.beta.threads.runs.retrieve(
-            thread_id=thread.id,
-            run_id=run.id
-        )
-        
-        # Wait for the run to complete
-        while run.status in ["queued", "in_progress"]:
-            time.sleep(0.5)
-            run = client.beta.threads.runs.retrieve(
-                thread_id=thread.id,
-                run_id=run.id
-            )
-        
-        # Get the messages
-        messages = client.beta.threads.messages.list(
-            thread_id=thread.id,
-            order="asc"  # Get messages in chronological order
-        )
-        
-        # Process the results
-        results = []
-        for msg in messages.data:
-            if msg.role == "assistant":
-                for content in msg.content:
-                    if content.type == "text":
-                        if hasattr(content, 'text') and hasattr(content.text, 'value'):
-                            # Split the response into individual results
-                            result_texts = content.text.value.split('\n\n')
-                            for i, text in enumerate(result_texts):
-                                if text.strip():
-                                    results.append({
-                                        'id': f"{msg.id}_{i}",
-                                        'filename': f"Result {len(results) + 1}",
-                                        'content': text.strip(),
-                                        'score': 1.0 - (i * 0.01)  # Slight score variation for sorting
-                                    })
-        
-        # Clean up
-        try:
-            client.beta.assistants.delete(assistant.id)
-            client.beta.threads.delete(thread.id)
-        except:
-            pass
-            
-        # Return unique results by content to avoid duplicates
-        seen = set()
-        unique_results = []
-        for result in results:
-            if result['content'] not in seen:
-                seen.add(result['content'])
-                unique_results.append(result)
-        
-        # Sort by score in descending order and limit results
-        unique_results.sort(key=lambda x: x['score'], reverse=True)
-        return unique_results[:limit] if unique_results else [{
-            'id': 'no_results',
-            'filename': 'No Results',
-            'content': 'No relevant information found in the documents.',
-            'score': 0
-        }]
+        return search_documents(client, VECTOR_STORE_ID, query, limit=limit)['results']
         
     except Exception as e:
         st.error(f"Error searching vector store: {str(e)}")
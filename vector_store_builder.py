@@ -0,0 +1,141 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Files per file batch request
+BATCH_SIZE = 100
+METADATA_WORKERS = 8
+
+# Backoff defaults: first poll after 0.5s, growing by 1.6x up to 5s between polls
+INITIAL_DELAY = 0.5
+MAX_DELAY = 5.0
+BACKOFF_FACTOR = 1.6
+DEFAULT_TIMEOUT = 600.0
+
+def fetch_file_metadata(client, file_ids: List[str], max_workers: int = METADATA_WORKERS) -> Dict[str, Any]:
+    """files.retrieve for every id concurrently; failed lookups map to their exception."""
+    def retrieve(file_id: str) -> Any:
+        try:
+            return client.files.retrieve(file_id)
+        except Exception as e:
+            return e
+
+    if not file_ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(file_ids))) as pool:
+        return dict(zip(file_ids, pool.map(retrieve, file_ids)))
+
+class BuildResult:
+    """Outcome of a vector store build, with per-file indexing times."""
+
+    def __init__(self, vector_store_id: str, status: str, file_counts: Dict[str, int],
+                 file_times: Dict[str, float], failed_files: Dict[str, str], wall_time: float):
+        self.vector_store_id = vector_store_id
+        self.status = status
+        self.file_counts = file_counts
+        self.file_times = file_times
+        self.failed_files = failed_files
+        self.wall_time = wall_time
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "vector_store_id": self.vector_store_id,
+            "status": self.status,
+            "file_counts": self.file_counts,
+            "file_times": {k: round(v, 2) for k, v in self.file_times.items()},
+            "failed_files": self.failed_files,
+            "wall_time": round(self.wall_time, 2),
+        }
+
+class VectorStoreBuilder:
+    """Builds a vector store from uploaded files and waits until it is searchable.
+
+    Files are attached with file batches of ``batch_size`` and the batches are
+    polled with adaptive backoff until every file has finished. A file's build
+    time is measured from its batch submission to the poll that first saw it
+    completed, so it is accurate to one polling interval.
+    """
+
+    def __init__(self, client, batch_size: int = BATCH_SIZE, timeout: float = DEFAULT_TIMEOUT,
+                 initial_delay: float = INITIAL_DELAY, max_delay: float = MAX_DELAY):
+        self.client = client
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+
+    def build(self, file_ids: List[str], name: str) -> BuildResult:
+        started = time.monotonic()
+        vector_store = self.client.beta.vector_stores.create(name=name)
+        logger.info("Created vector store %s for %d files", vector_store.id, len(file_ids))
+
+        batches: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(file_ids), self.batch_size):
+            chunk = file_ids[start:start + self.batch_size]
+            batch = self.client.beta.vector_stores.file_batches.create(vector_store.id, file_ids=chunk)
+            batches[batch.id] = {"submitted": time.monotonic(), "files": len(chunk), "done": False}
+
+        file_times: Dict[str, float] = {}
+        failed_files: Dict[str, str] = {}
+        deadline = started + self.timeout
+        delay = self.initial_delay
+        while True:
+            for batch_id, info in batches.items():
+                if not info["done"]:
+                    self._poll_batch(vector_store.id, batch_id, info, file_times, failed_files)
+            if all(info["done"] for info in batches.values()):
+                break
+            if time.monotonic() + delay > deadline:
+                return self._result(vector_store.id, "timed_out", file_times, failed_files, started)
+            time.sleep(delay)
+            delay = min(delay * BACKOFF_FACTOR, self.max_delay)
+
+        status = "ready" if not failed_files else "failed"
+        return self._result(vector_store.id, status, file_times, failed_files, started)
+
+    def _poll_batch(self, vector_store_id: str, batch_id: str, info: Dict[str, Any],
+                    file_times: Dict[str, float], failed_files: Dict[str, str]) -> None:
+        batch = self.client.beta.vector_stores.file_batches.retrieve(batch_id, vector_store_id=vector_store_id)
+        counts = batch.file_counts
+        # List files only when the completed count moved since the last poll
+        if counts.completed > info.get("completed", 0):
+            now = time.monotonic()
+            for vs_file in self.client.beta.vector_stores.file_batches.list_files(
+                    batch_id, vector_store_id=vector_store_id, filter="completed", limit=100):
+                file_times.setdefault(vs_file.id, now - info["submitted"])
+        if counts.failed > info.get("failed", 0) or counts.cancelled > info.get("cancelled", 0):
+            for status in ("failed", "cancelled"):
+                for vs_file in self.client.beta.vector_stores.file_batches.list_files(
+                        batch_id, vector_store_id=vector_store_id, filter=status, limit=100):
+                    error = getattr(vs_file, "last_error", None)
+                    failed_files[vs_file.id] = f"{error.code}: {error.message}" if error else status
+        info["completed"], info["failed"], info["cancelled"] = counts.completed, counts.failed, counts.cancelled
+        info["done"] = counts.in_progress == 0 and batch.status != "in_progress"
+
+    def _result(self, vector_store_id: str, status: str, file_times: Dict[str, float],
+                failed_files: Dict[str, str], started: float) -> BuildResult:
+        store = self.client.beta.vector_stores.retrieve(vector_store_id)
+        counts = store.file_counts
+        return BuildResult(
+            vector_store_id,
+            status,
+            {"completed": counts.completed, "failed": counts.failed, "in_progress": counts.in_progress,
+             "cancelled": counts.cancelled, "total": counts.total},
+            file_times,
+            failed_files,
+            time.monotonic() - started,
+        )
+
+    def discard(self, vector_store_id: str) -> None:
+        """Delete a store that never became ready."""
+        try:
+            self.client.beta.vector_stores.delete(vector_store_id)
+        except Exception as e:
+            logger.warning("Could not delete vector store %s: %s", vector_store_id, e)